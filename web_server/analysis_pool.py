@@ -0,0 +1,110 @@
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+
+class PoolSaturated(Exception):
+    pass
+
+
+class AnalysisTimeout(Exception):
+    pass
+
+
+def _warm_worker():
+    # 프로세스 풀: 워커마다 모델을 한 번 로드해 둔다
+    from model_registry import default_registry
+    default_registry.load()
+
+
+class AnalysisPool:
+    # CPU를 쓰는 분석(pandas/sklearn)을 이벤트 루프 밖의 executor에서 실행한다.
+    # 실행 중 + 대기 중인 작업이 workers + queue_limit을 넘으면 바로 PoolSaturated를 낸다.
+
+    def __init__(self, kind='thread', workers=None, queue_limit=None, timeout=30.0):
+        if kind not in ('thread', 'process'):
+            raise ValueError(f"알 수 없는 pool 종류: {kind}")
+        self.kind = kind
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_limit = self.workers * 2 if queue_limit is None else queue_limit
+        self.timeout = timeout
+        self._executor = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.stats = {'submitted': 0, 'completed': 0, 'failed': 0, 'rejected': 0, 'timed_out': 0}
+
+    @classmethod
+    def from_env(cls, prefix='ANALYSIS_'):
+        env = os.environ
+        workers = env.get(prefix + 'WORKERS')
+        queue_limit = env.get(prefix + 'QUEUE_LIMIT')
+        return cls(
+            kind=env.get(prefix + 'POOL', 'thread'),
+            workers=int(workers) if workers else None,
+            queue_limit=int(queue_limit) if queue_limit else None,
+            timeout=float(env.get(prefix + 'TIMEOUT', '30')),
+        )
+
+    def start(self):
+        with self._lock:
+            if self._executor is None:
+                if self.kind == 'process':
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_worker)
+                else:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='analysis')
+        return self
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    @property
+    def capacity(self):
+        return self.workers + self.queue_limit
+
+    def _done(self, fut):
+        with self._lock:
+            self._in_flight -= 1
+            if fut.cancelled() or fut.exception() is not None:
+                self.stats['failed'] += 1
+            else:
+                self.stats['completed'] += 1
+
+    async def run(self, fn, *args, **kwargs):
+        # 타임아웃이 나도 이미 실행 중인 작업은 끝날 때까지 자리를 차지한다 (in_flight 유지)
+        self.start()
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                self.stats['rejected'] += 1
+                raise PoolSaturated(f"분석 대기열이 가득 찼습니다 ({self._in_flight}/{self.capacity})")
+            self._in_flight += 1
+            self.stats['submitted'] += 1
+            fut = self._executor.submit(functools.partial(fn, *args, **kwargs))
+        fut.add_done_callback(self._done)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(fut), self.timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self.stats['timed_out'] += 1
+            raise AnalysisTimeout(f"분석이 {self.timeout:g}초 안에 끝나지 않았습니다")
+
+    def status(self):
+        with self._lock:
+            in_flight = self._in_flight
+            stats = dict(self.stats)
+        return {
+            'kind': self.kind,
+            'workers': self.workers,
+            'queue_limit': self.queue_limit,
+            'timeout': self.timeout,
+            'started': self._executor is not None,
+            'in_flight': in_flight,
+            'running': min(in_flight, self.workers),
+            'queued': max(0, in_flight - self.workers),
+            'saturated': in_flight >= self.capacity,
+            **stats,
+        }
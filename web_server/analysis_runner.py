@@ -1,17 +1,80 @@
+import asyncio
+import io
+import os
+
 import pandas as pd
 import numpy as np
-import joblib
-import glob
-import os
 import warnings
 
-
-def _read_csv_flexible(path):
-    # cp949 우선, 실패하면 utf-8로 시도
+from csv_ingest import ANALYSIS_COLS, BLOCK_ROWS, iter_csv_blocks, read_csv_columns
+import feature_bank
+from feature_engine import TIME_COL, X_COL, Y_COL, PRESSURE_COL, BUTTON_COL, compact_columns, features_from_columns
+import inference_batcher
+from metrics import StageTimer, traced_peak
+from online_features import OnlineFeatures
+import resampling
+from serialization import sanitize
+from stroke_features import strokes_from_columns
+from model_registry import default_registry, find_model_candidates, find_scaler_candidates, load_joblib
+
+
+def _read_csv_flexible(path, timer=None):
+    # cp949 우선, 실패하면 utf-8로 시도. path 대신 업로드된 bytes도 받음
+    def source():
+        return io.BytesIO(path) if isinstance(path, (bytes, bytearray)) else path
     try:
-        return pd.read_csv(path, encoding='cp949')
+        return pd.read_csv(source(), encoding='cp949')
     except Exception:
-        return pd.read_csv(path, encoding='utf-8')
+        if timer is not None:
+            timer.note('csv_encoding_fallback')
+        return pd.read_csv(source(), encoding='utf-8')
+
+
+def read_columns(path, timer=None):
+    # CSV(경로 또는 bytes) -> {컬럼명: ndarray}. 인코딩 추정 + 필요한 컬럼만 타입 지정해서 읽음 (csv_ingest)
+    timer = timer or StageTimer()
+    with timer.stage('csv_read'):
+        return read_csv_columns(path, timer)
+
+
+# 이 크기(MB) 이상인 CSV 파일은 블록 단위로 읽어서 분석 (0이면 chunk_rows를 직접 줄 때만)
+CHUNKED_MIN_BYTES = int(float(os.environ.get('ANALYZE_CHUNKED_MB', '256')) * (1 << 20))
+# 저메모리 모드: 시간 int64 / 좌표 int32 / 버튼 int8로 좁히고 미분은 float32 (feature_engine.compact_columns)
+LOW_MEMORY = os.environ.get('ANALYZE_LOW_MEMORY', '0') in ('1', 'true', 'yes')
+# 요청마다 tracemalloc으로 최대 할당량 측정 (analysis_memory_peak_bytes, debug 응답의 _debug.memory_peak_bytes)
+TRACE_MEMORY = os.environ.get('ANALYZE_TRACE_MEMORY', '0') in ('1', 'true', 'yes')
+
+
+def features_chunked(path, rows=BLOCK_ROWS, timer=None):
+    # CSV를 rows행씩 읽으면서 feature를 누적 계산 (메모리 사용량이 파일 크기가 아니라 블록 크기에 비례).
+    # 블록 경계의 직전 샘플/펜 상태/상태별 마지막 반지름은 OnlineFeatures가 들고 있다
+    timer = timer or StageTimer()
+    online = OnlineFeatures()
+    extras = None
+    for block in iter_csv_blocks(path, rows):
+        online.add_block(block[TIME_COL], block[X_COL], block[Y_COL],
+                         block.get(PRESSURE_COL), block.get(BUTTON_COL))
+        if extras is None:
+            # 나머지 컬럼(Z 등)은 첫 블록에만 첫 행 값으로 들어 있음
+            extras = {c: v[0] for c, v in block.items() if c not in ANALYSIS_COLS}
+        timer.note('csv_block')
+    timer.samples = online.n
+    result = online.result()
+    row0 = online.row0()
+    for c, v in (extras or {}).items():
+        row0.setdefault(c, v)
+    return result, row0
+
+
+def _chunk_rows(csv_path, chunk_rows):
+    if chunk_rows is not None or isinstance(csv_path, (bytes, bytearray, memoryview)):
+        return chunk_rows
+    try:
+        if CHUNKED_MIN_BYTES and os.path.getsize(csv_path) >= CHUNKED_MIN_BYTES:
+            return BLOCK_ROWS
+    except OSError:
+        pass
+    return None
 
 
 def preprocess_dataframe(df):
@@ -82,44 +145,12 @@ def preprocess_dataframe(df):
     return result, data
 
 
-def _numeric_suffix(fn):
-    import re
-    m = re.search(r"(\d+)(?!.*\d)", fn)
-    return int(m.group(1)) if m else -1
-
-
 def find_and_load_model():
     # Search for candidate joblib files in current and parent directories
-    candidates = []
-    cur = os.path.abspath('.')
-    roots = []
-    # walk up to filesystem root
-    while True:
-        roots.append(cur)
-        parent = os.path.dirname(cur)
-        if parent == cur:
-            break
-        cur = parent
-
-    for r in roots:
-        # 우선순위: BernoulliNB > displacement > 기타 모델
-        pats = ['BernoulliNB*.joblib', 'displacement_prediction_model.joblib*', '*.joblib']
-        for p in pats:
-            found = glob.glob(os.path.join(r, p))
-            for f in found:
-                if f not in candidates:
-                    candidates.append(f)
-
-    # sort candidates by numeric suffix if possible
-    candidates = sorted(candidates, key=_numeric_suffix, reverse=True)
-
     load_errors = []
-    for cand in candidates:
+    for cand in find_model_candidates():
         try:
-            # 버전 호환성 경고 무시하고 로드
-            with warnings.catch_warnings():
-                warnings.simplefilter("ignore")
-                model = joblib.load(cand)
+            model = load_joblib(cand)
             return model, cand
         except Exception as e:
             load_errors.append((cand, str(e)))
@@ -134,28 +165,9 @@ def find_and_load_model():
 
 def find_and_load_scaler():
     # Search upward for scaler files as well
-    candidates = []
-    cur = os.path.abspath('.')
-    roots = []
-    while True:
-        roots.append(cur)
-        parent = os.path.dirname(cur)
-        if parent == cur:
-            break
-        cur = parent
-
-    for r in roots:
-        found = glob.glob(os.path.join(r, 'displacement_scaler.joblib*'))
-        for f in found:
-            if f not in candidates:
-                candidates.append(f)
-
-    for cand in candidates:
+    for cand in find_scaler_candidates():
         try:
-            # 버전 호환성 경고 무시하고 로드
-            with warnings.catch_warnings():
-                warnings.simplefilter("ignore")
-                scaler = joblib.load(cand)
+            scaler = load_joblib(cand)
             return scaler, cand
         except Exception as e:
             warnings.warn(f"스케일러 로드 실패: {cand} -> {e}")
@@ -163,132 +175,277 @@ def find_and_load_scaler():
     return None, None
 
 
-def analyze(csv_path, debug=False):
-    # 읽기
-    df = _read_csv_flexible(csv_path)
-    preproc_result, df_full = preprocess_dataframe(df)
+def _add_memory_peak(result, timer, debug):
+    if debug and timer.memory_peak is not None:
+        debug_info = (result.get('ml') or {}).get('_debug')
+        if isinstance(debug_info, dict):
+            debug_info['memory_peak_bytes'] = timer.memory_peak
+    return result
+
+
+def analyze(csv_path, debug=False, registry=None, timer=None, chunk_rows=None, low_memory=None, trace_memory=None):
+    # timer(metrics.StageTimer)를 넘기면 단계별 소요 시간이 기록된다 (debug=True면 _debug.timings_ms에도 포함)
+    # chunk_rows를 주거나 파일이 ANALYZE_CHUNKED_MB 이상이면 블록 단위로 읽는다 (features_chunked, 리샘플은 적용 안 됨)
+    timer = timer or StageTimer()
+    with traced_peak(timer, TRACE_MEMORY if trace_memory is None else trace_memory):
+        chunk_rows = _chunk_rows(csv_path, chunk_rows)
+        if chunk_rows and snapshot_bank((registry or default_registry).get()):
+            # feature bank(백분위수, 전체 평균으로 채운 신호)는 블록 단위로 누적할 수 없어 전체를 읽는 경로로
+            timer.note('chunked_bank_fallback')
+            chunk_rows = None
+        if chunk_rows:
+            try:
+                with timer.stage('chunked_features'):
+                    preproc_result, row0 = features_chunked(csv_path, chunk_rows, timer)
+            except (ValueError, KeyError, UnicodeDecodeError):
+                # 블록 단위로 읽을 수 없는 파일: 전체를 읽는 기존 경로 (진짜 오류면 거기서 다시 발생)
+                timer.note('chunked_fallback')
+            else:
+                result = analyze_features(preproc_result, row0, debug=debug, registry=registry, timer=timer)
+                return _add_memory_peak(result, timer, debug)
+        # 읽기 + preprocess_dataframe()과 같은 결과를 한 번의 NumPy 패스로 계산 (df_full 대신 첫 행만 받음).
+        # 읽은 컬럼을 여기서 들고 있지 않아야 저메모리 모드에서 원래 float64 배열이 바로 해제된다
+        result = analyze_columns(read_columns(csv_path, timer), debug=debug, registry=registry, timer=timer,
+                                 low_memory=low_memory, trace_memory=False)
+    return _add_memory_peak(result, timer, debug)
+
+
+def _prepare_columns(columns, timer, resampler=None, low_memory=False):
+    # 중복 시간 제거/리샘플(설정 시) + 저메모리 모드의 타입 좁히기 -> (컬럼, 리샘플 정보 또는 None)
+    resampler = resampling.default_resampler if resampler is None else resampler
+    resample_info = None
+    if resampler and TIME_COL in columns:
+        with timer.stage('resample'):
+            columns, resample_info = resampler.apply(columns)
+    if low_memory:
+        with timer.stage('compact'):
+            columns = compact_columns(columns)
+    return columns, resample_info
+
+
+def snapshot_bank(snapshot):
+    # 계산할 추가 feature: 모델 입력의 feature bank(설정 포함), 모델 정보가 없으면 설정(FEATURE_BANK_*). 없으면 None
+    plan = snapshot.plan
+    return plan.bank if plan is not None else feature_bank.default_bank
+
+
+def _column_features(columns, timer, snapshot, derived=None, low_memory=False):
+    # 기본 feature + 추가 feature(설정 또는 모델 입력의 feature bank) -> (feature dict, 첫 행)
+    bank = snapshot_bank(snapshot)
+    if bank and derived is None:
+        derived = {}
+    with timer.stage('features'):
+        preproc_result, row0 = features_from_columns(columns, derived=derived, compact=low_memory)
+    if bank:
+        with timer.stage('feature_bank'):
+            preproc_result.update(bank.compute(columns, derived))
+    return preproc_result, row0
+
+
+def analyze_columns(columns, debug=False, registry=None, timer=None, strokes=False, resampler=None, low_memory=None,
+                    trace_memory=None, defer=False):
+    # CSV를 거치지 않는 경로: {'시간': arr, 'X': arr, 'Y': arr, '압력_NORMAL': arr, '버튼': arr}
+    # strokes=True면 획 세그먼트 인덱스와 획별 통계를 결과의 'strokes'에 넣는다 (stroke_features)
+    # resampler: 중복 시간 제거/리샘플 (resampling.Resampler). None이면 RESAMPLE_* 설정, False면 끔
+    # low_memory / trace_memory: None이면 ANALYZE_LOW_MEMORY / ANALYZE_TRACE_MEMORY 설정
+    # feature_bank 설정(FEATURE_BANK_*)이나 모델 입력에 추가 feature가 있으면 feature dict에 함께 넣는다
+    # defer: analyze_features 참고 (결과의 'ml'이 PendingPrediction일 수 있음)
+    timer = timer or StageTimer()
+    low_memory = LOW_MEMORY if low_memory is None else low_memory
+    with traced_peak(timer, TRACE_MEMORY if trace_memory is None else trace_memory):
+        if TIME_COL in columns:
+            timer.samples = len(columns[TIME_COL])
+        # 리샘플/compact한 컬럼으로 바꿔 들고 있어야 원래 배열이 바로 해제된다
+        columns, resample_info = _prepare_columns(columns, timer, resampler, low_memory)
+        with timer.stage('model_get'):
+            snapshot = (registry or default_registry).get()
+        derived = {} if strokes else None
+        preproc_result, row0 = _column_features(columns, timer, snapshot, derived, low_memory)
+        result = analyze_features(preproc_result, row0, debug=debug, timer=timer, snapshot=snapshot, defer=defer)
+        if resample_info is not None:
+            result['resample'] = resample_info
+        if strokes:
+            with timer.stage('strokes'):
+                result['strokes'] = sanitize(strokes_from_columns(columns, derived))
+    return _add_memory_peak(result, timer, debug)
+
+
+def model_input(snapshot, Xvec):
+    # 입력 벡터 -> (DataFrame, 모델에 넘길 입력). 외부 스케일러는 파이프라인이 아닌 모델에만 적용
+    model, scaler = snapshot.model, snapshot.scaler
+    # Build a DataFrame with feature names (some pipelines expect DataFrame)
+    # Xvec: 한 요청의 벡터 또는 (배치, n_features) 행렬 (inference_batcher)
+    df_input = pd.DataFrame(Xvec.reshape(-1, snapshot.plan.n_features), columns=snapshot.plan.feature_names)
+
+    # If model seems to be a pipeline (has named_steps), prefer passing DataFrame
+    is_pipeline = hasattr(model, 'named_steps')
+    # 컴파일된 채점기(compiled_model)도 파이프라인 전처리를 포함하므로 외부 스케일러 적용 안 함
+    bundled = is_pipeline or getattr(model, 'bundles_preprocessing', False)
+
+    # If external scaler exists and model is not a pipeline, attempt to apply scaler
+    X_for_pred = None
+    if scaler is not None and not bundled:
+        try:
+            scaler_n = getattr(scaler, 'n_features_in_', None)
+            arr = df_input.values
+            if scaler_n is None or scaler_n == arr.shape[1]:
+                X_for_pred = scaler.transform(arr)
+            else:
+                warnings.warn(f"스케일러 입력 차원({scaler_n})과 생성된 입력({arr.shape[1]})이 달라 스케일링을 건너뜁니다.")
+                X_for_pred = arr
+        except Exception as e:
+            warnings.warn(f"스케일러 적용 중 오류: {e}")
+            X_for_pred = df_input.values
+    else:
+        # pass DataFrame if pipeline; otherwise values
+        X_for_pred = df_input if is_pipeline else df_input.values
+    return df_input, X_for_pred
+
+
+def _sanitize_value(v):
+    # 결과 직렬화 안전성 확보 (NaN/Inf -> None, numpy types -> Python native)
+    # 기존 구현 (비교용). 분석 경로는 serialization.sanitize를 사용
+    if v is None:
+        return None
+    # numpy scalar
+    if isinstance(v, (np.floating, float)):
+        if np.isnan(v) or np.isinf(v):
+            return None
+        return float(v)
+    if isinstance(v, (np.integer, int)):
+        return int(v)
+    if isinstance(v, (np.ndarray,)):
+        return [_sanitize_value(x) for x in v.tolist()]
+    if isinstance(v, (list, tuple)):
+        return [_sanitize_value(x) for x in v]
+    if isinstance(v, dict):
+        return {str(k): _sanitize_value(val) for k, val in v.items()}
+    # fallback for other types
+    try:
+        # handle pandas/numpy types
+        if pd.isna(v):
+            return None
+    except Exception:
+        pass
+    return v
+
+
+def _probability(row):
+    # predict_proba 한 행 -> 응답의 probability. 이진분류(정상, 치매) 가정, 아니면 None
+    if len(row) != 2:
+        return None
+    dementia_prob = float(row[1]) * 100  # 치매 확률(%)
+    normal_prob = float(row[0]) * 100    # 정상 확률(%)
+    return {
+        'dementia_probability': round(dementia_prob, 2),
+        'normal_probability': round(normal_prob, 2),
+        'diagnosis': '치매 의심' if dementia_prob >= 50 else '정상'
+    }
+
+
+def _proba_result(snapshot, row):
+    # predict_proba 한 행 -> ml 결과. prediction은 확률의 argmax (predict를 따로 돌리지 않는 배치 경로)
+    return {
+        'prediction': np.asarray(snapshot.model.classes_)[[np.argmax(row)]].tolist(),
+        'probability': _probability(row),
+        'model_file': snapshot.model_file,
+        'scaler_file': snapshot.scaler_file,
+        'model_version': snapshot.model_version,
+        'scaler_version': snapshot.scaler_version
+    }
+
+
+class PendingPrediction:
+    # defer=True로 분석했을 때 결과의 'ml' 자리: 입력 벡터는 batcher에 넘겼고 예측 행은 아직 안 나옴.
+    # 분석 스레드가 배치를 기다리며 pool 자리를 막으면 (특히 워커 1개) 다른 요청의 벡터가 들어올 수 없어
+    # 배치가 항상 1개가 되므로, 기다리는 일은 이벤트 루프(resolve_prediction)가 한다
 
-    # 모델 로드 시도
-    model, model_file = find_and_load_model()
-    scaler, scaler_file = find_and_load_scaler()
+    def __init__(self, future, snapshot, timeout):
+        self.future = future
+        self.snapshot = snapshot
+        self.timeout = timeout
+
+    def finish(self):
+        # 끝난(또는 시간이 지난) future -> sanitize된 ml 결과
+        try:
+            row = np.asarray(self.future.result(timeout=0))
+        except Exception as e:
+            return sanitize({'error': str(e) or type(e).__name__, 'model_file': self.snapshot.model_file})
+        return sanitize(_proba_result(self.snapshot, row))
+
+
+async def resolve_prediction(result, timer=None):
+    # 결과의 'ml'이 PendingPrediction이면 배치 예측을 (cancel 없이) 기다렸다가 ml 결과로 바꾼다
+    pending = result.get('ml') if isinstance(result, dict) else None
+    if isinstance(pending, PendingPrediction):
+        waiter = asyncio.wrap_future(pending.future)
+        # 예측 에러는 finish가 ml 결과에 담는다. 감싼 future의 예외를 꺼내 두지 않으면 asyncio가 경고를 남김
+        waiter.add_done_callback(lambda f: f.cancelled() or f.exception())
+        with (timer or StageTimer()).stage('predict_batch'):
+            await asyncio.wait([waiter], timeout=pending.timeout)
+        result['ml'] = pending.finish()
+    return result
+
+
+def analyze_features(preproc_result, row0, debug=False, registry=None, timer=None, snapshot=None, defer=False):
+    # 이미 계산된 feature dict(+ 첫 행)로 모델 예측. 스트리밍 경로(online_features)도 사용
+    # snapshot: 호출한 쪽에서 이미 가져온 모델/스케일러 (없으면 registry에서)
+    # defer=True이고 batcher가 켜져 있으면 벡터만 넘기고 바로 반환한다 ('ml'은 PendingPrediction).
+    #   호출한 쪽이 이벤트 루프에서 resolve_prediction으로 마무리해야 한다 (debug는 항상 바로 예측)
+    timer = timer or StageTimer()
+    # 프로세스에 이미 로드된 모델/스케일러 사용 (파일이 바뀐 경우에만 재로드)
+    if snapshot is None:
+        with timer.stage('model_get'):
+            snapshot = (registry or default_registry).get()
+    model, model_file = snapshot.model, snapshot.model_file
+    scaler_file = snapshot.scaler_file
 
     ml_result = None
     if model is None:
         warnings.warn('모델을 찾지 못함')
     else:
-        # 실제 전처리 결과(preproc_result, df_full)를 모델 입력으로 매핑하려 시도
-        n_features = getattr(model, 'n_features_in_', None)
-        feature_names = None
-
-        if hasattr(model, 'feature_names_in_'):
-            try:
-                feature_names = list(model.feature_names_in_)
-            except Exception:
-                feature_names = None
-
-        # 파이프라인인 경우 내부 스텝에서 feature_names 추출 시도
-        if feature_names is None and hasattr(model, 'named_steps'):
-            for step in model.named_steps.values():
-                if hasattr(step, 'feature_names_in_'):
-                    try:
-                        feature_names = list(step.feature_names_in_)
-                        break
-                    except Exception:
-                        continue
-
-        # 기본: n_features로 'col_0'.. 이름 생성
-        if feature_names is None and n_features is not None:
-            feature_names = [f'col_{i}' for i in range(n_features)]
+        # 모델 입력 이름 -> feature 매핑은 모델 로드 시 한 번 컴파일됨 (feature_plan.FeaturePlan)
+        plan = snapshot.plan
 
-        if n_features is None and feature_names is None:
+        if plan is None:
             ml_result = {'warning': '모델에 필요한 feature 정보가 없어 예측을 수행하지 못함', 'model_file': model_file}
         else:
-            # 단일-샘플(집계) 입력 벡터 생성: 가능한 경우 preproc_result의 값 매핑
-            import re
-            Xvec = []
-            for fname in feature_names:
-                val = None
-                # 1) 정확한 키 매칭
-                if isinstance(preproc_result, dict) and fname in preproc_result:
-                    val = preproc_result[fname]
-                # 2) 컬럼명이 모델이 기대하는 이름과 일치하면 df_full의 첫 행 사용
-                elif fname in df_full.columns:
-                    try:
-                        val = df_full.iloc[0][fname]
-                    except Exception:
-                        val = 0
-                else:
-                    # 3) 숫자 접미사 제거해서 base 이름으로 매핑 (예: air_time1 -> air_time)
-                    base = re.sub(r"\d+$", "", fname)
-                    if isinstance(preproc_result, dict) and base in preproc_result:
-                        val = preproc_result[base]
-                    else:
-                        # 4) 정규화된 키 비교(소문자, 언더스코어)
-                        fname_norm = re.sub(r"\W+", "_", fname.lower())
-                        mapped = None
-                        if isinstance(preproc_result, dict):
-                            for k in preproc_result.keys():
-                                if re.sub(r"\W+", "_", k.lower()) == fname_norm or re.sub(r"\W+", "_", k.lower()) == re.sub(r"\W+", "_", base.lower()):
-                                    mapped = preproc_result[k]
-                                    break
-                        if mapped is not None:
-                            val = mapped
-                        else:
-                            # 기본값 0
-                            val = 0
-
-                # sanitize numeric
-                try:
-                    if val is None:
-                        Xvec.append(0.0)
-                    else:
-                        Xvec.append(float(np.nan_to_num(val, nan=0.0, posinf=0.0, neginf=0.0)))
-                except Exception:
-                    Xvec.append(0.0)
-
-            # Build a mapping dict and create DataFrame with feature names (some pipelines expect DataFrame)
-            mapping = {fname: Xvec[i] for i, fname in enumerate(feature_names)}
-            df_input = pd.DataFrame([mapping], columns=feature_names)
-
-            # If model seems to be a pipeline (has named_steps), prefer passing DataFrame
-            is_pipeline = hasattr(model, 'named_steps')
-
-            # If external scaler exists and model is not a pipeline, attempt to apply scaler
-            X_for_pred = None
-            if scaler is not None and not is_pipeline:
-                try:
-                    scaler_n = getattr(scaler, 'n_features_in_', None)
-                    arr = df_input.values
-                    if scaler_n is None or scaler_n == arr.shape[1]:
-                        X_for_pred = scaler.transform(arr)
-                    else:
-                        warnings.warn(f"스케일러 입력 차원({scaler_n})과 생성된 입력({arr.shape[1]})이 달라 스케일링을 건너뜁니다.")
-                        X_for_pred = arr
-                except Exception as e:
-                    warnings.warn(f"스케일러 적용 중 오류: {e}")
-                    X_for_pred = df_input.values
-            else:
-                # pass DataFrame if pipeline; otherwise values
-                X_for_pred = df_input if is_pipeline else df_input.values
+            # 단일-샘플(집계) 입력 벡터: 컴파일된 인덱스로 한 번에 gather
+            feature_names = plan.feature_names
+            with timer.stage('mapping'):
+                Xvec = plan.vector(preproc_result, row0)
+
+            # 서버에서는 동시 요청들과 묶어서 predict_proba 한 번 (inference_batcher)
+            batcher = inference_batcher.default_batcher
+            batched = batcher is not None and hasattr(model, 'predict_proba') and hasattr(model, 'classes_')
+            if batched and defer and not debug:
+                pending = PendingPrediction(batcher.submit(snapshot, Xvec), snapshot, batcher.timeout)
+                with timer.stage('sanitize'):
+                    return {'preprocessing': sanitize(preproc_result), 'ml': pending, 'artifacts': snapshot.info()}
+            df_input = None
+            if not batched or debug:
+                with timer.stage('model_input'):
+                    df_input, X_for_pred = model_input(snapshot, Xvec)
 
             # 예측 시도
             try:
-                pred = model.predict(X_for_pred)
+                if batched:
+                    # prediction은 확률의 argmax (predict를 따로 돌리지 않음)
+                    with timer.stage('predict_batch'):
+                        proba = batcher.predict_proba(snapshot, Xvec)[np.newaxis, :]
+                    pred = np.asarray(model.classes_)[np.argmax(proba, axis=1)]
+                else:
+                    with timer.stage('predict'):
+                        pred = model.predict(X_for_pred)
                 pred_proba = None
                 
                 # predict_proba가 있으면 확률 추출
                 if hasattr(model, 'predict_proba'):
                     try:
-                        proba = model.predict_proba(X_for_pred)
-                        # 이진분류(정상, 치매) 가정
-                        if proba.shape[1] == 2:
-                            dementia_prob = float(proba[0][1]) * 100  # 치매 확률(%)
-                            normal_prob = float(proba[0][0]) * 100    # 정상 확률(%)
-                            pred_proba = {
-                                'dementia_probability': round(dementia_prob, 2),
-                                'normal_probability': round(normal_prob, 2),
-                                'diagnosis': '치매 의심' if dementia_prob >= 50 else '정상'
-                            }
+                        if not batched:
+                            with timer.stage('predict_proba'):
+                                proba = model.predict_proba(X_for_pred)
+                        pred_proba = _probability(proba[0])
                     except Exception as e:
                         warnings.warn(f"predict_proba 추출 실패: {e}")
                 
@@ -301,7 +458,9 @@ def analyze(csv_path, debug=False):
                     'prediction': pred_list,
                     'probability': pred_proba,
                     'model_file': model_file,
-                    'scaler_file': scaler_file
+                    'scaler_file': scaler_file,
+                    'model_version': snapshot.model_version,
+                    'scaler_version': snapshot.scaler_version
                 }
 
                 # include debug info if requested
@@ -310,7 +469,7 @@ def analyze(csv_path, debug=False):
                         ml_result['_debug'] = {
                             'raw_pred': pred.tolist() if hasattr(pred, 'tolist') else pred_list,
                             'predict_proba_raw': proba.tolist() if 'proba' in locals() and hasattr(proba, 'tolist') else None,
-                            'input_vector': mapping,
+                            'input_vector': dict(zip(feature_names, Xvec.tolist())),
                             'input_df': df_input.to_dict(orient='records') if isinstance(df_input, pd.DataFrame) else None
                         }
                     except Exception as e:
@@ -318,35 +477,101 @@ def analyze(csv_path, debug=False):
             except Exception as e:
                 ml_result = {'error': str(e), 'model_file': model_file}
 
-    # 결과 직렬화 안전성 확보 (NaN/Inf -> None, numpy types -> Python native)
-    def _sanitize_value(v):
-        if v is None:
-            return None
-        # numpy scalar
-        if isinstance(v, (np.floating, float)):
-            if np.isnan(v) or np.isinf(v):
-                return None
-            return float(v)
-        if isinstance(v, (np.integer, int)):
-            return int(v)
-        if isinstance(v, (np.ndarray,)):
-            return [_sanitize_value(x) for x in v.tolist()]
-        if isinstance(v, (list, tuple)):
-            return [_sanitize_value(x) for x in v]
-        if isinstance(v, dict):
-            return {str(k): _sanitize_value(val) for k, val in v.items()}
-        # fallback for other types
-        try:
-            # handle pandas/numpy types
-            if pd.isna(v):
-                return None
-        except Exception:
-            pass
-        return v
-
-    sanitized = {
-        'preprocessing': _sanitize_value(preproc_result),
-        'ml': _sanitize_value(ml_result)
-    }
+    with timer.stage('sanitize'):
+        sanitized = {
+            'preprocessing': sanitize(preproc_result),
+            'ml': sanitize(ml_result),
+            'artifacts': snapshot.info()
+        }
+
+    # 단계별 소요 시간 (이 함수 밖에서 측정되는 단계는 호출한 쪽에서 추가)
+    if debug and isinstance(sanitized['ml'], dict) and '_debug' in sanitized['ml']:
+        sanitized['ml']['_debug']['timings_ms'] = timer.ms()
 
     return sanitized
+
+
+def analyze_streamed(preproc_result, row0, columns=None, debug=False, registry=None, timer=None, defer=False):
+    # 누적 계산한 feature(OnlineFeatures, /ws/strokes)로 예측. feature bank가 필요하면 누적할 수 없으므로
+    # columns(OnlineFeatures(keep_samples=True).columns())로 계산한다. 샘플이 없으면 0으로 채워 예측하지 않고 ValueError
+    timer = timer or StageTimer()
+    with timer.stage('model_get'):
+        snapshot = (registry or default_registry).get()
+    bank = snapshot_bank(snapshot)
+    if bank:
+        if columns is None:
+            raise ValueError(f"feature bank 계산에 필요한 샘플이 없습니다: {', '.join(bank.names()[:5])}")
+        with timer.stage('feature_bank'):
+            preproc_result = dict(preproc_result, **bank.compute(columns))
+    return analyze_features(preproc_result, row0, debug=debug, timer=timer, snapshot=snapshot, defer=defer)
+
+
+def session_features(columns, registry=None, timer=None, resampler=None, low_memory=None):
+    # 일괄 채점의 세션별 단계: analyze_columns와 같은 feature 계산까지만 (예측은 analyze_batch에서 모아서)
+    # -> {'preprocessing': feature dict, 'row0': 첫 행, 'snapshot': feature를 계산한 모델 스냅샷,
+    #     'resample': 리샘플 정보(있을 때만)}
+    timer = timer or StageTimer()
+    low_memory = LOW_MEMORY if low_memory is None else low_memory
+    if TIME_COL in columns:
+        timer.samples = len(columns[TIME_COL])
+    columns, resample_info = _prepare_columns(columns, timer, resampler, low_memory)
+    with timer.stage('model_get'):
+        snapshot = (registry or default_registry).get()
+    preproc_result, row0 = _column_features(columns, timer, snapshot, low_memory=low_memory)
+    out = {'preprocessing': preproc_result, 'row0': row0, 'snapshot': snapshot}
+    if resample_info is not None:
+        out['resample'] = resample_info
+    return out
+
+
+def _score_sessions(sessions, snapshot, timer):
+    # 같은 스냅샷으로 feature를 계산한 세션들 -> 결과 목록 (predict_proba 한 번)
+    model, plan = snapshot.model, snapshot.plan
+    if model is None or plan is None or not (hasattr(model, 'predict_proba') and hasattr(model, 'classes_')):
+        results = [analyze_features(s['preprocessing'], s['row0'], timer=timer, snapshot=snapshot) for s in sessions]
+    else:
+        with timer.stage('mapping'):
+            X = np.vstack([plan.vector(s['preprocessing'], s['row0']) for s in sessions])
+        try:
+            with timer.stage('model_input'):
+                _, X_for_pred = model_input(snapshot, X)
+            with timer.stage('predict_batch'):
+                proba = np.asarray(model.predict_proba(X_for_pred))
+            ml_results = [_proba_result(snapshot, row) for row in proba]
+        except Exception as e:
+            ml_results = [{'error': str(e), 'model_file': snapshot.model_file}] * len(sessions)
+        with timer.stage('sanitize'):
+            results = [{
+                'preprocessing': sanitize(s['preprocessing']),
+                'ml': sanitize(ml),
+                'artifacts': snapshot.info()
+            } for s, ml in zip(sessions, ml_results)]
+    return results
+
+
+def analyze_batch(sessions, registry=None, timer=None):
+    # session_features() 결과 목록 -> 세션마다 analyze_columns와 같은 형식의 결과.
+    # 세션은 feature를 계산한 스냅샷으로 채점한다 (그 사이 모델이 다시 로드돼도 feature 구성과 모델이 어긋나지 않게).
+    # 스냅샷마다 입력 벡터를 한 행렬로 쌓아 model_input + predict_proba를 한 번만 호출하고 (보통 스냅샷은 하나),
+    # prediction은 확률의 argmax (inference_batcher와 같은 방식). predict_proba가 없는 모델은 세션마다 기존 경로
+    timer = timer or StageTimer()
+    current = None
+    groups = {}
+    for i, s in enumerate(sessions):
+        snapshot = s.get('snapshot')
+        if snapshot is None:
+            if current is None:
+                with timer.stage('model_get'):
+                    current = (registry or default_registry).get()
+            snapshot = current
+        groups.setdefault(id(snapshot), (snapshot, []))[1].append(i)
+    results = [None] * len(sessions)
+    for snapshot, indices in groups.values():
+        scored = _score_sessions([sessions[i] for i in indices], snapshot, timer)
+        for i, result in zip(indices, scored):
+            results[i] = result
+    for s, result in zip(sessions, results):
+        if 'resample' in s:
+            result['resample'] = s['resample']
+    timer.note('batch_sessions', len(sessions))
+    return results
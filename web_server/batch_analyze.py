@@ -0,0 +1,262 @@
+import argparse
+import csv
+import glob
+import importlib.util
+import multiprocessing
+import os
+import sys
+import time
+import warnings
+
+import pandas as pd
+
+from analysis_runner import analyze, analyze_columns
+from feature_bank import default_bank
+from feature_engine import FEATURE_KEYS
+from metrics import StageTimer
+from model_registry import default_registry
+from session_store import SessionStore
+
+
+# 사용법 (web_server/ 에서):
+#   python batch_analyze.py uploads ../dummy_normal.csv -o results.csv
+#   python batch_analyze.py uploads -o results.parquet --workers 8
+#   python batch_analyze.py uploads -o results.csv --resume   # 중단된 실행 이어서
+#   python batch_analyze.py big/ -o results.csv --chunk-rows 100000   # 큰 파일을 블록 단위로 (메모리 제한)
+#   python batch_analyze.py sessions -o results.csv   # 세션 저장소(session_store.py)의 모든 세션
+#
+# 결과: 파일당 한 행 (feature + 예측). 실패한 파일은 <출력>.errors.csv 에 따로 기록하고 계속 진행한다.
+# parquet 출력은 <출력>.partial.csv 에 먼저 쌓은 뒤 끝나면 변환한다 (중단 시 partial에서 재개).
+
+# FEATURE_BANK_*를 설정하면 그 feature도 컬럼으로 (모델 학습용 feature 추출)
+BANK_KEYS = default_bank.names() if default_bank is not None else []
+OUTPUT_COLUMNS = (['file', 'n_samples'] + list(FEATURE_KEYS) + BANK_KEYS +
+                  ['prediction', 'dementia_probability', 'normal_probability', 'diagnosis',
+                   'model_version', 'scaler_version', 'elapsed_ms'])
+ERROR_COLUMNS = ['file', 'error']
+
+# 세션 저장소의 세션은 'session:<저장소 경로>#<세션 id>'로 다룬다 (file 컬럼에도 그대로)
+SESSION_PREFIX = 'session:'
+
+# 워커 설정 (_init_worker에서 지정)
+_chunk_rows = None
+_stores = {}
+
+
+def is_session_store(path):
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, 'index.jsonl'))
+
+
+def collect_files(inputs, pattern='*.csv'):
+    # 디렉토리는 pattern으로 재귀 검색, 파일은 그대로. 중복 제거 후 정렬
+    files = set()
+    for p in inputs:
+        if is_session_store(p):
+            root = os.path.abspath(p)
+            files.update(f'{SESSION_PREFIX}{root}#{e["id"]}' for e in SessionStore(root).entries())
+        elif os.path.isdir(p):
+            files.update(glob.glob(os.path.join(p, '**', pattern), recursive=True))
+        elif os.path.isfile(p):
+            files.add(p)
+        else:
+            print(f"경고: 입력을 찾을 수 없습니다: {p}", file=sys.stderr)
+    return sorted(f if f.startswith(SESSION_PREFIX) else os.path.abspath(f) for f in files)
+
+
+def _init_worker(chunk_rows=None):
+    # 워커마다 모델/스케일러를 한 번만 로드 (파일마다 다시 찾지 않음)
+    global _chunk_rows
+    _chunk_rows = chunk_rows
+    warnings.simplefilter('ignore')
+    default_registry.load()
+
+
+def score_file(path):
+    # 파일 하나 -> ('ok', 결과 행) 또는 ('error', 에러 행). 예외는 워커 밖으로 내보내지 않는다
+    start = time.perf_counter()
+    try:
+        timer = StageTimer()
+        if path.startswith(SESSION_PREFIX):
+            # 저장소에서는 CSV 파싱 없이 컬럼 배열을 바로 읽는다
+            root, session_id = path[len(SESSION_PREFIX):].rsplit('#', 1)
+            if root not in _stores:
+                _stores[root] = SessionStore(root)
+            result = analyze_columns(_stores[root].read(session_id), timer=timer)
+        else:
+            result = analyze(path, timer=timer, chunk_rows=_chunk_rows)
+        ml = result.get('ml') or {}
+        if 'error' in ml or 'prediction' not in ml:
+            raise RuntimeError(ml.get('error') or ml.get('warning') or '모델을 찾지 못함')
+        proba = ml.get('probability') or {}
+        pred = ml['prediction']
+        row = {'file': path, 'n_samples': timer.samples}
+        row.update({k: result['preprocessing'].get(k) for k in FEATURE_KEYS + tuple(BANK_KEYS)})
+        row.update({
+            'prediction': pred[0] if isinstance(pred, list) and len(pred) == 1 else pred,
+            'dementia_probability': proba.get('dementia_probability'),
+            'normal_probability': proba.get('normal_probability'),
+            'diagnosis': proba.get('diagnosis'),
+            'model_version': ml.get('model_version'),
+            'scaler_version': ml.get('scaler_version'),
+            'elapsed_ms': round((time.perf_counter() - start) * 1000, 3),
+        })
+        return 'ok', row
+    except Exception as e:
+        return 'error', {'file': path, 'error': f'{type(e).__name__}: {e}'}
+
+
+def _done_files(path):
+    # 이미 결과가 있는 파일 목록 (재개용). 마지막 줄이 잘려 있으면 그 행은 버린다
+    if not os.path.exists(path):
+        return set(), []
+    rows = []
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            if None in row.values() or None in row:
+                break
+            rows.append(row)
+    return {r['file'] for r in rows}, rows
+
+
+class _CsvSink:
+    # 한 행씩 바로 쓰고 flush (중단되어도 그때까지의 결과는 남음)
+
+    def __init__(self, path, columns, keep_rows=()):
+        self.path = path
+        self.columns = columns
+        self._f = open(path, 'w', newline='', encoding='utf-8')
+        self._w = csv.DictWriter(self._f, fieldnames=columns)
+        self._w.writeheader()
+        self._w.writerows(keep_rows)
+        self._f.flush()
+
+    def write(self, row):
+        self._w.writerow(row)
+        self._f.flush()
+
+    def close(self):
+        self._f.close()
+
+
+class _Progress:
+
+    # stream=None 이면 집계만 하고 출력하지 않음
+
+    def __init__(self, total, interval=1.0, stream=sys.stderr):
+        self.total = total
+        self.interval = interval
+        self.stream = stream
+        self.start = time.perf_counter()
+        self._last = 0.0
+        self.files = 0
+        self.samples = 0
+        self.errors = 0
+
+    def update(self, samples=0, error=False):
+        self.files += 1
+        self.samples += samples
+        self.errors += int(error)
+        now = time.perf_counter()
+        if now - self._last >= self.interval:
+            self._last = now
+            self.report()
+
+    def report(self, end='\r'):
+        if self.stream is None:
+            return
+        elapsed = max(time.perf_counter() - self.start, 1e-9)
+        print(f"[{self.files}/{self.total}] {self.files / elapsed:.1f} files/s, "
+              f"{self.samples / elapsed:,.0f} samples/s, 실패 {self.errors}",
+              end=end, file=self.stream, flush=True)
+
+
+def run_batch(files, output, workers=None, resume=False, chunksize=1, progress=True, chunk_rows=None):
+    # 결과 요약 dict를 돌려준다
+    parquet = output.endswith('.parquet')
+    if parquet and importlib.util.find_spec('pyarrow') is None and importlib.util.find_spec('fastparquet') is None:
+        raise RuntimeError("parquet 출력에는 pyarrow 또는 fastparquet이 필요합니다")
+    table_path = output + '.partial.csv' if parquet else output
+    error_path = output + '.errors.csv'
+
+    done, keep_rows = set(), []
+    if resume:
+        if parquet and os.path.exists(output) and not os.path.exists(table_path):
+            pd.read_parquet(output).to_csv(table_path, index=False, encoding='utf-8')
+        done, keep_rows = _done_files(table_path)
+    todo = [f for f in files if f not in done]
+
+    # 실패한 파일은 재개 시 다시 시도하므로 에러 파일은 매번 새로 쓴다
+    sink = _CsvSink(table_path, OUTPUT_COLUMNS, keep_rows)
+    errors = _CsvSink(error_path, ERROR_COLUMNS)
+    prog = _Progress(len(todo), stream=sys.stderr if progress else None)
+    workers = workers or os.cpu_count() or 1
+    interrupted = False
+    pool = multiprocessing.Pool(processes=min(workers, max(len(todo), 1)), initializer=_init_worker,
+                                initargs=(chunk_rows,))
+    try:
+        for status, row in pool.imap_unordered(score_file, todo, chunksize=chunksize):
+            if status == 'ok':
+                sink.write(row)
+            else:
+                errors.write(row)
+            prog.update(samples=row.get('n_samples', 0), error=status != 'ok')
+        pool.close()
+    except KeyboardInterrupt:
+        interrupted = True
+        pool.terminate()
+    finally:
+        pool.join()
+        sink.close()
+        errors.close()
+        prog.report(end='\n')
+
+    if parquet and not interrupted:
+        pd.read_csv(table_path, encoding='utf-8').to_parquet(output, index=False)
+        os.remove(table_path)
+
+    return {
+        'total': len(files),
+        'skipped': len(files) - len(todo),
+        'processed': prog.files,
+        'errors': prog.errors,
+        'samples': prog.samples,
+        'elapsed': time.perf_counter() - prog.start,
+        'interrupted': interrupted,
+        'output': output,
+        'errors_file': error_path,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='CSV 기록 여러 개를 한 번에 분석해 feature + 예측을 하나의 CSV/Parquet으로 저장')
+    parser.add_argument('inputs', nargs='+', help='CSV 파일 또는 디렉토리 (디렉토리는 재귀 검색, 세션 저장소 디렉토리는 모든 세션)')
+    parser.add_argument('-o', '--output', required=True, help='출력 경로 (.csv 또는 .parquet)')
+    parser.add_argument('--pattern', default='*.csv', help='디렉토리 검색 패턴 (기본 *.csv)')
+    parser.add_argument('--workers', type=int, default=None, help='프로세스 수 (기본 CPU 수)')
+    parser.add_argument('--chunksize', type=int, default=1, help='워커에 한 번에 넘길 파일 수')
+    parser.add_argument('--chunk-rows', type=int, default=None,
+                        help='CSV를 이 행 수씩 나눠 읽음 (기본: ANALYZE_CHUNKED_MB 이상인 파일만)')
+    parser.add_argument('--resume', action='store_true', help='출력에 이미 있는 파일은 건너뛰고 이어서 실행')
+    parser.add_argument('--quiet', action='store_true', help='진행 상황 출력 안 함')
+    args = parser.parse_args(argv)
+
+    files = collect_files(args.inputs, args.pattern)
+    if not files:
+        print("분석할 파일이 없습니다", file=sys.stderr)
+        return 1
+    try:
+        summary = run_batch(files, args.output, workers=args.workers, resume=args.resume,
+                            chunksize=args.chunksize, progress=not args.quiet, chunk_rows=args.chunk_rows)
+    except RuntimeError as e:
+        print(f"오류: {e}", file=sys.stderr)
+        return 2
+    print(f"완료: {summary['processed']}개 처리, {summary['skipped']}개 건너뜀, 실패 {summary['errors']}개 "
+          f"-> {summary['output']} (실패 목록: {summary['errors_file']})")
+    if summary['interrupted']:
+        print("중단됨: 같은 명령에 --resume을 붙이면 이어서 실행합니다", file=sys.stderr)
+        return 130
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
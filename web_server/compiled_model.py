@@ -0,0 +1,191 @@
+import argparse
+import hashlib
+import os
+import sys
+import warnings
+
+import numpy as np
+
+
+# 학습된 파이프라인(ColumnTransformer[SimpleImputer -> StandardScaler] -> BernoulliNB)을
+# sklearn 없이 NumPy만으로 채점하는 형태로 컴파일해서 .npz로 저장/로드한다.
+#   python compiled_model.py ../BernoulliNB_best.joblib            # -> ../BernoulliNB_best.npz
+#   python compiled_model.py ../BernoulliNB_best.joblib -o out.npz
+# 채점: 결측 대체 -> 표준화 -> 이진화 -> (n, d) @ (d, k) 행렬곱 한 번 + 클래스 bias -> softmax
+# export에만 sklearn이 필요하고, 로드/채점은 numpy만 쓴다. allow_pickle=False로 읽으므로 코드 실행 없음.
+FORMAT_VERSION = 1
+
+
+class CompiledBernoulliNB:
+    # sklearn 추정기와 같은 이름의 속성/메서드(feature_names_in_, classes_, predict, predict_proba)만 제공.
+    # 전처리(결측 대체 + 표준화)가 포함되어 있으므로 외부 스케일러를 다시 적용하면 안 된다
+    bundles_preprocessing = True
+
+    def __init__(self, arrays):
+        self.feature_names_in_ = arrays['feature_names'].astype(object)
+        self.n_features_in_ = len(self.feature_names_in_)
+        self.classes_ = arrays['classes']
+        self.columns = arrays['columns']
+        self.fill = arrays['fill']
+        self.mean = arrays['mean']
+        self.scale = arrays['scale']
+        self.binarize = float(arrays['binarize'])
+        self.weights = arrays['weights']
+        self.bias = arrays['bias']
+        self.source_sha256 = str(arrays['source_sha256'])
+        # export한 원본 파일 이름 (이전 형식에는 없음 -> 같은 이름의 .joblib으로 간주)
+        self.source_name = str(arrays['source_name']) if 'source_name' in arrays else ''
+        self.sklearn_version = str(arrays['sklearn_version'])
+
+    def _binary(self, X):
+        X = np.array(X, dtype=np.float64, ndmin=2)
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(f"입력 차원이 다릅니다: {X.shape[1]} (모델 {self.n_features_in_})")
+        X = X[:, self.columns]
+        missing = np.isnan(X)
+        if missing.any():
+            X[missing] = np.broadcast_to(self.fill, X.shape)[missing]
+        X -= self.mean
+        X /= self.scale
+        return (X > self.binarize).astype(np.float64)
+
+    def joint_log_likelihood(self, X):
+        jll = self._binary(X) @ self.weights
+        jll += self.bias
+        return jll
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.joint_log_likelihood(X), axis=1)]
+
+    def predict_log_proba(self, X):
+        # scipy.special.logsumexp와 같은 방식 (최댓값을 빼고 exp 합)
+        jll = self.joint_log_likelihood(X)
+        top = jll.max(axis=1, keepdims=True)
+        norm = np.log(np.exp(jll - top).sum(axis=1, keepdims=True)) + top
+        return jll - norm
+
+    def predict_proba(self, X):
+        return np.exp(self.predict_log_proba(X))
+
+
+def load(path):
+    with np.load(path, allow_pickle=False) as data:
+        arrays = {k: data[k] for k in data.files}
+    if int(arrays.get('format_version', -1)) != FORMAT_VERSION:
+        raise ValueError(f"지원하지 않는 컴파일 모델 형식입니다: {path}")
+    return CompiledBernoulliNB(arrays)
+
+
+def source_path(model, path):
+    # .npz 옆에 있는 원본 .joblib 경로 (export 때 기록한 이름, 없으면 같은 이름)
+    name = model.source_name or os.path.splitext(os.path.basename(path))[0] + '.joblib'
+    return os.path.join(os.path.dirname(os.path.abspath(path)), name)
+
+
+def _numeric_step(pre):
+    # ColumnTransformer에서 실제로 컬럼이 있는 변환기는 숫자 파이프라인(imputer -> scaler) 하나여야 한다
+    from sklearn.compose import ColumnTransformer
+    from sklearn.impute import SimpleImputer
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    if not isinstance(pre, ColumnTransformer):
+        raise ValueError(f"지원하지 않는 전처리 단계: {type(pre).__name__}")
+    active = [(name, trans, cols) for name, trans, cols in pre.transformers_
+              if name != 'remainder' and len(cols)]
+    if len(active) != 1 or getattr(pre, '_remainder', ('remainder', 'drop', []))[1] != 'drop':
+        raise ValueError("숫자 컬럼 변환기 하나만 있는 ColumnTransformer만 지원합니다")
+    _, trans, cols = active[0]
+    steps = trans.steps if isinstance(trans, Pipeline) else [('', trans)]
+    imputer = scaler = None
+    for _, step in steps:
+        if isinstance(step, SimpleImputer) and imputer is None and scaler is None:
+            if step.add_indicator or not np.isnan(step.missing_values):
+                raise ValueError("missing_values=nan, add_indicator=False인 SimpleImputer만 지원합니다")
+            imputer = step
+        elif isinstance(step, StandardScaler) and scaler is None:
+            scaler = step
+        else:
+            raise ValueError(f"지원하지 않는 전처리 단계: {type(step).__name__}")
+    return list(cols), imputer, scaler
+
+
+def compile_pipeline(model):
+    # 파이프라인 -> .npz에 저장할 배열 dict
+    import sklearn
+    from sklearn.naive_bayes import BernoulliNB
+    from sklearn.pipeline import Pipeline
+
+    if not isinstance(model, Pipeline) or not isinstance(model.steps[-1][1], BernoulliNB):
+        raise ValueError("BernoulliNB로 끝나는 Pipeline만 컴파일할 수 있습니다")
+    if len(model.steps) != 2:
+        raise ValueError("전처리 단계가 하나(ColumnTransformer)인 파이프라인만 지원합니다")
+    cols, imputer, scaler = _numeric_step(model.steps[0][1])
+    nb = model.steps[-1][1]
+    if nb.binarize is None:
+        raise ValueError("binarize=None인 BernoulliNB는 지원하지 않습니다")
+
+    names = [str(n) for n in model.feature_names_in_]
+    columns = np.array([names.index(str(c)) for c in cols], dtype=np.int64)
+    d = len(columns)
+    if imputer is not None:
+        fill = np.asarray(imputer.statistics_, dtype=np.float64)
+        if fill.shape != (d,) or np.isnan(fill).any():
+            raise ValueError("SimpleImputer 통계값이 입력 컬럼과 맞지 않거나 비어 있는 컬럼이 있습니다")
+    else:
+        fill = np.full(d, np.nan)
+    mean = np.asarray(scaler.mean_ if scaler is not None and scaler.with_mean else np.zeros(d), dtype=np.float64)
+    scale = np.asarray(scaler.scale_ if scaler is not None and scaler.with_std else np.ones(d), dtype=np.float64)
+
+    # BernoulliNB._joint_log_likelihood와 같은 식: X @ (log p - log(1-p)).T + (class prior + sum log(1-p))
+    neg_prob = np.log(1 - np.exp(nb.feature_log_prob_))
+    weights = np.ascontiguousarray((nb.feature_log_prob_ - neg_prob).T)
+    bias = nb.class_log_prior_ + neg_prob.sum(axis=1)
+    return {
+        'format_version': np.int64(FORMAT_VERSION),
+        'feature_names': np.array(names, dtype=str),
+        'classes': np.asarray(nb.classes_),
+        'columns': columns,
+        'fill': fill,
+        'mean': mean,
+        'scale': scale,
+        'binarize': np.float64(nb.binarize),
+        'weights': weights,
+        'bias': bias,
+        'sklearn_version': np.array(sklearn.__version__),
+    }
+
+
+def export(model_path, output=None):
+    from model_registry import file_sha256, load_joblib
+
+    output = output or os.path.splitext(model_path)[0] + '.npz'
+    arrays = compile_pipeline(load_joblib(model_path))
+    arrays['source_sha256'] = np.array(file_sha256(model_path))
+    arrays['source_name'] = np.array(os.path.basename(model_path))
+    tmp = output + '.tmp'
+    with open(tmp, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(tmp, output)
+    return output
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='BernoulliNB 파이프라인 -> NumPy 전용 채점기(.npz)')
+    parser.add_argument('model', help='학습된 파이프라인 (.joblib)')
+    parser.add_argument('-o', '--output', default=None, help='출력 경로 (기본: 모델과 같은 이름의 .npz)')
+    args = parser.parse_args(argv)
+    warnings.simplefilter('ignore')
+    try:
+        output = export(args.model, args.output)
+    except ValueError as e:
+        print(f"오류: {e}", file=sys.stderr)
+        return 2
+    with open(output, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    print(f"저장: {output} ({os.path.getsize(output):,} bytes, sha256 {digest[:12]})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,210 @@
+import codecs
+import csv
+import importlib.util
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+from feature_engine import TIME_COL, BUTTON_COL, X_COL, Y_COL, PRESSURE_COL, dataframe_columns
+
+
+# 분석용 CSV 읽기: _read_csv_flexible() + dataframe_columns()와 같은 결과를 더 적은 비용으로
+# - 인코딩: 앞부분(PREFIX_BYTES)만 보고 cp949/utf-8 결정 (파일 전체를 cp949로 파싱했다가 다시 읽지 않음).
+#   한글은 헤더에만 있으므로 헤더 한 줄만 디코딩하고, 본문이 ASCII면 pandas의 인코딩 변환(디코딩 후 utf-8 재인코딩)을 건너뜀
+# - 컬럼: 분석에 쓰는 5개만 전체를 읽고, 나머지(Z 등)는 모델 매핑용으로 첫 행 값만 읽음
+# - dtype: 시간 int64(안 되면 float64), 나머지 float64로 지정해서 타입 추론 생략
+# - 본문이 ASCII 정수만으로 된 파일(태블릿 기록 형식)은 pandas 대신 np.fromstring으로 한 번에 파싱
+#   (빈 값, 소수, 따옴표 등이 하나라도 있으면 아래 pandas 경로로)
+# - 엔진: pyarrow가 설치되어 있으면 사용 (CSV_ENGINE=auto|pyarrow|c 로 고정 가능)
+# 타입 지정 파싱이 안 되는 파일(중복 컬럼, 문자열 값 등)은 기존과 같은 일반 파싱으로 처리한다.
+PREFIX_BYTES = 64 * 1024
+# 블록 단위 읽기(iter_csv_blocks)의 기본 블록 크기 (행)
+BLOCK_ROWS = 256 * 1024
+ANALYSIS_COLS = (TIME_COL, BUTTON_COL, X_COL, Y_COL, PRESSURE_COL)
+ENCODINGS = ('cp949', 'utf-8')
+
+
+def _clean(name):
+    # feature_engine.normalize_columns()과 같은 컬럼명 정리
+    return str(name).strip().replace('"', '')
+
+
+def sniff_encoding(prefix):
+    # 기존 순서와 같이 cp949를 우선. 앞부분이 cp949로 디코딩되지 않을 때만 utf-8
+    try:
+        codecs.getincrementaldecoder('cp949')().decode(prefix, final=False)
+        return 'cp949'
+    except UnicodeDecodeError:
+        return 'utf-8'
+
+
+def csv_engine():
+    choice = os.environ.get('CSV_ENGINE', 'auto')
+    if choice == 'auto':
+        return 'pyarrow' if importlib.util.find_spec('pyarrow') is not None else 'c'
+    return choice
+
+
+def _load(source):
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source)
+    with open(source, 'rb') as f:
+        return f.read()
+
+
+def _first_value(v):
+    # 첫 행의 나머지 컬럼 값 (모델 매핑에서 float로 변환되어 쓰임). 빈 값은 NaN
+    if v == '':
+        return float('nan')
+    for conv in (int, float):
+        try:
+            return conv(v)
+        except ValueError:
+            continue
+    return v
+
+
+def _is_ascii(data, start, chunk=1 << 20):
+    # data[start:].isascii()와 같지만 본문 전체를 복사하지 않는다
+    view = memoryview(data)
+    return all(bytes(view[i:i + chunk]).isascii() for i in range(start, len(data), chunk))
+
+
+def _read_integers(data, start, names, usecols, chunk=1 << 20):
+    # 정수만 있는 본문 -> {원래 컬럼명: ndarray} (pandas 타입 지정 파싱과 같은 dtype). 이 방법으로 못 읽으면 None
+    # 줄 단위로 자른 chunk마다 줄바꿈을 쉼표로 바꿔 값 하나의 나열로 파싱하고 (\r, 마지막 줄바꿈은 fromstring이 무시),
+    # 미리 잡은 컬럼 배열에 바로 채운다 (본문 전체 복사나 전체 컬럼 표를 만들지 않음)
+    if start >= len(data):
+        return None
+    rows = data.count(b'\n', start) + (not data.endswith(b'\n'))
+    width = len(names)
+    index = [names.index(n) for n in usecols]
+    out = {n: np.empty(rows, dtype=np.int64 if _clean(n) == TIME_COL else np.float64) for n in usecols}
+    info = np.iinfo(np.int64)
+    done = 0
+    pos = start
+    while pos < len(data):
+        end = data.find(b'\n', pos + chunk)
+        end = len(data) if end < 0 else end + 1
+        lines = data.count(b'\n', pos, end) + (end == len(data) and not data.endswith(b'\n'))
+        try:
+            values = np.fromstring(data[pos:end].replace(b'\n', b','), dtype=np.int64, sep=',')
+        except ValueError:
+            return None
+        # 값 개수가 줄 수 x 컬럼과 다르거나(빈 줄, 칸 수가 다른 행) int64 범위를 넘는 값(포화됨)은 pandas 경로에서 처리
+        if values.size != lines * width or values.max() == info.max or values.min() == info.min:
+            return None
+        table = values.reshape(lines, width)
+        for n, i in zip(usecols, index):
+            out[n][done:done + lines] = table[:, i]
+        done += lines
+        pos = end
+    return out
+
+
+def _read_generic(data, encoding):
+    return dataframe_columns(pd.read_csv(io.BytesIO(data), encoding=encoding))
+
+
+def _read_typed(data, encoding, engine):
+    # 타입 지정 파싱. 이 방법으로 읽을 수 없는 파일이면 None
+    # pandas 경로의 본문은 data[start:]를 복사하지 않고 같은 버퍼의 BytesIO 위치를 옮겨서 읽는다 (큰 업로드에서 요청당 메모리).
+    # 정수 경로(_read_integers)도 본문을 chunk 단위로만 복사한다
+    end = data.find(b'\n')
+    header_line = data if end < 0 else data[:end + 1]
+    start = len(header_line)
+    names = next(csv.reader([header_line.decode(encoding).rstrip('\r\n')]), [])
+    cleaned = [_clean(n) for n in names]
+    if TIME_COL not in cleaned:
+        raise ValueError("CSV에 '시간' 컬럼이 없습니다")
+    if len(set(names)) != len(names) or len(set(cleaned)) != len(cleaned):
+        return None
+
+    usecols = [n for n, c in zip(names, cleaned) if c in ANALYSIS_COLS]
+    ascii_body = _is_ascii(data, start)
+    parsed = _read_integers(data, start, names, usecols) if ascii_body else None
+    if parsed is not None:
+        return _with_first_row(parsed, usecols, cleaned, data, start, encoding)
+    body_encoding = None if ascii_body else encoding
+    df = None
+    for time_dtype in ('int64', 'float64'):
+        dtype = dict.fromkeys(usecols, np.dtype(np.float64))
+        dtype[names[cleaned.index(TIME_COL)]] = np.dtype(time_dtype)
+        src = io.BytesIO(data)
+        src.seek(start)
+        try:
+            df = pd.read_csv(src, header=None, names=names, usecols=usecols, dtype=dtype,
+                             encoding=body_encoding, engine=engine)
+            break
+        except (ValueError, TypeError, OverflowError):
+            continue
+    if df is None:
+        return None
+    return _with_first_row({n: df[n].to_numpy() for n in usecols}, usecols, cleaned, data, start, encoding)
+
+
+def _with_first_row(parsed, usecols, cleaned, data, start, encoding):
+    columns = {_clean(n): parsed[n] for n in usecols}
+    if len(columns[TIME_COL]):
+        # features_from_columns()는 나머지 컬럼의 첫 값만 쓰므로 길이 1 배열로 넘긴다
+        end = data.find(b'\n', start)
+        first_line = data[start:end if end >= 0 else len(data)]
+        first = next(csv.reader([first_line.decode(encoding).rstrip('\r')]), [])
+        for c, v in zip(cleaned, first):
+            if c not in columns:
+                columns[c] = np.asarray([_first_value(v)])
+    return columns
+
+
+def read_csv_columns(source, timer=None):
+    # CSV(경로 또는 bytes) -> {컬럼명: ndarray}.
+    # _read_csv_flexible()처럼 첫 인코딩으로 실패하면 다른 인코딩으로 다시 시도한다
+    data = _load(source)
+    first = sniff_encoding(data[:PREFIX_BYTES])
+    order = [first] + [e for e in ENCODINGS if e != first]
+    engine = csv_engine()
+    first_error = None
+    for i, encoding in enumerate(order):
+        try:
+            columns = _read_typed(data, encoding, engine)
+            return columns if columns is not None else _read_generic(data, encoding)
+        except Exception as e:
+            first_error = first_error or e
+            if timer is not None and i < len(order) - 1:
+                timer.note('csv_encoding_fallback')
+    raise first_error
+
+
+def iter_csv_blocks(path, rows=BLOCK_ROWS):
+    # 큰 CSV를 메모리에 다 올리지 않고 rows행씩 {컬럼명: ndarray}로 돌려준다 (분석용 5개 컬럼, 모두 float64).
+    # 첫 블록에는 나머지 컬럼의 첫 행 값(길이 1 배열)도 들어 있다.
+    # 중복 컬럼이나 숫자가 아닌 값처럼 타입 지정 파싱이 안 되는 파일은 ValueError -> read_csv_columns()로 읽을 것
+    with open(path, 'rb') as f:
+        encoding = sniff_encoding(f.read(PREFIX_BYTES))
+        f.seek(0)
+        header_line = f.readline()
+        names = next(csv.reader([header_line.decode(encoding).rstrip('\r\n')]), [])
+        cleaned = [_clean(n) for n in names]
+        if TIME_COL not in cleaned:
+            raise ValueError("CSV에 '시간' 컬럼이 없습니다")
+        if len(set(names)) != len(names) or len(set(cleaned)) != len(cleaned):
+            raise ValueError('중복된 컬럼이 있어 블록 단위로 읽을 수 없습니다')
+        body_start = f.tell()
+        first_line = f.readline()
+        f.seek(body_start)
+        first = next(csv.reader([first_line.decode(encoding).rstrip('\r\n')]), [])
+        extras = {c: np.asarray([_first_value(v)]) for c, v in zip(cleaned, first) if c not in ANALYSIS_COLS}
+
+        usecols = [n for n, c in zip(names, cleaned) if c in ANALYSIS_COLS]
+        dtype = dict.fromkeys(usecols, np.dtype(np.float64))
+        # pyarrow 엔진은 chunksize를 지원하지 않으므로 C 엔진
+        with pd.read_csv(f, header=None, names=names, usecols=usecols, dtype=dtype, encoding=encoding,
+                         chunksize=rows, engine='c') as reader:
+            for df in reader:
+                columns = {_clean(n): df[n].to_numpy() for n in usecols}
+                if extras:
+                    columns.update(extras)
+                    extras = None
+                yield columns
@@ -0,0 +1,193 @@
+import os
+import re
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from feature_engine import BUTTON_COL, TIME_COL, X_COL, Y_COL, _fill_with_mean, _radii, compute_derivatives
+
+
+# 모델 실험용 추가 feature (기본 17개 feature와 별도, 설정한 것만 계산):
+#   gmrt_<상태>_lag<d>        펜 상태별 반지름 sqrt(X²+Y²) 시계열의 lag d GMRT (d=1이 gmrt_on_paper/gmrt_in_air와 같은 정의)
+#   <신호>_p<q>_<상태>        펜 상태별 SPEED/ACCELERATION/JERK(평균으로 채운 뒤)의 q 백분위수 (선형 보간)
+# 상태: on_paper(버튼 1), in_air(버튼 0), 신호: speed, acc, jerk
+# 설정 (기본은 모두 비어 있어 계산하지 않음):
+#   FEATURE_BANK_GMRT_LAGS=1-8          lag 목록 ('1-8', '1,2,4,8')
+#   FEATURE_BANK_PERCENTILES=10,50,90   백분위수 목록
+#   FEATURE_BANK_SIGNALS=speed,acc,jerk / FEATURE_BANK_STATES=on_paper,in_air
+# 모델 입력 이름이 위 형식이면 설정과 상관없이 그 feature도 계산된다 (feature_plan).
+# 반지름은 상태별로 한 번만 만들고(extract_features와 공유), 모든 lag는 sliding window의 block 단위 차이로 한 번에,
+# 한 (신호, 상태)의 백분위수는 np.percentile 한 번으로 계산하므로 feature 수에 비례해서 느려지지 않는다.
+STATES = {'on_paper': 1, 'in_air': 0}
+SIGNALS = ('speed', 'acc', 'jerk')
+_GMRT_NAME = re.compile(r'^gmrt_(on_paper|in_air)_lag(\d+)$')
+_PERCENTILE_NAME = re.compile(r'^(speed|acc|jerk)_p(\d+(?:\.\d+)?)_(on_paper|in_air)$')
+# extract_features(derived=)가 넣어 주는 상태별 반지름
+_RADII_KEYS = {'on_paper': 'radii_on', 'in_air': 'radii_air'}
+# lag 차이 행렬을 이 행 수씩 만든다 (block x lag 수 float64)
+BLOCK_ROWS = 8192
+
+
+def _parse_list(text, conv):
+    # '1-4,8' -> [1, 2, 3, 4, 8]
+    values = []
+    for part in filter(None, (p.strip() for p in text.split(','))):
+        if conv is int and '-' in part:
+            lo, hi = (int(v) for v in part.split('-', 1))
+            values.extend(range(lo, hi + 1))
+        else:
+            values.append(conv(part))
+    return values
+
+
+def parse_name(name):
+    # -> ('gmrt', 상태, lag) / ('percentile', 신호, q, 상태) / None
+    m = _GMRT_NAME.match(name)
+    if m and int(m.group(2)) > 0:
+        return 'gmrt', m.group(1), int(m.group(2))
+    m = _PERCENTILE_NAME.match(name)
+    if m and 0 <= float(m.group(2)) <= 100:
+        return 'percentile', m.group(1), float(m.group(2)), m.group(3)
+    return None
+
+
+def gmrt_lags(radii, lags):
+    # 각 lag d에 대해 (1/(n-d)) * sum|r[i+d] - r[i]| (NaN 차이는 건너뜀, n <= d면 0). feature_engine._gmrt와 같은 정의.
+    # win[i, j] = r[i+j]인 strided view에서 block마다 (block, lag 수) 차이를 만들어 열별로 더한다
+    n = len(radii)
+    lags = np.asarray(lags, dtype=np.intp)
+    out = np.zeros(len(lags))
+    valid = lags < n
+    if not valid.any():
+        return out
+    use = lags[valid]
+    k = int(use.max())
+    total = np.nansum if np.isnan(radii).any() else np.sum
+    sums = np.zeros(len(use))
+    win = sliding_window_view(radii, k + 1)
+    for start in range(0, n - k, BLOCK_ROWS):
+        w = win[start:start + BLOCK_ROWS]
+        diff = w[:, use] - w[:, :1]
+        np.abs(diff, out=diff)
+        sums += total(diff, axis=0)
+    # 마지막 k개 시작점은 window가 없다: lag d는 i+d < n인 만큼만
+    for j, d in enumerate(use):
+        if d < k:
+            sums[j] += total(np.abs(radii[n - k + d:] - radii[n - k:n - d]))
+    out[valid] = sums / (n - use)
+    return out
+
+
+def _format_q(q):
+    return f'{q:g}'
+
+
+class FeatureBank:
+
+    def __init__(self, gmrt_lags=None, percentiles=None):
+        # gmrt_lags: {상태: lag 목록}, percentiles: {(신호, 상태): q 목록}
+        self.gmrt_lags = {s: tuple(sorted(set(lags))) for s, lags in (gmrt_lags or {}).items() if lags}
+        self.percentiles = {key: tuple(sorted(set(qs))) for key, qs in (percentiles or {}).items() if qs}
+        for state in self.gmrt_lags:
+            if state not in STATES:
+                raise ValueError(f"알 수 없는 펜 상태: {state}")
+        for signal, state in self.percentiles:
+            if signal not in SIGNALS or state not in STATES:
+                raise ValueError(f"알 수 없는 신호/펜 상태: {signal}/{state}")
+
+    @classmethod
+    def from_names(cls, names):
+        # feature 이름 목록 -> 그 feature만 계산하는 bank (형식이 다른 이름은 ValueError)
+        gmrt, percentiles = {}, {}
+        for name in names:
+            parsed = parse_name(name)
+            if parsed is None:
+                raise ValueError(f"feature bank 이름이 아닙니다: {name}")
+            if parsed[0] == 'gmrt':
+                gmrt.setdefault(parsed[1], []).append(parsed[2])
+            else:
+                percentiles.setdefault((parsed[1], parsed[3]), []).append(parsed[2])
+        return cls(gmrt, percentiles)
+
+    @classmethod
+    def from_env(cls, prefix='FEATURE_BANK_'):
+        # 아무것도 설정하지 않았으면 None
+        env = os.environ
+        lags = _parse_list(env.get(prefix + 'GMRT_LAGS', ''), int)
+        qs = _parse_list(env.get(prefix + 'PERCENTILES', ''), float)
+        signals = _parse_list(env.get(prefix + 'SIGNALS', ','.join(SIGNALS)), str)
+        states = _parse_list(env.get(prefix + 'STATES', ','.join(STATES)), str)
+        if any(d <= 0 for d in lags):
+            raise ValueError(f"{prefix}GMRT_LAGS는 1 이상이어야 합니다: {lags}")
+        if any(not 0 <= q <= 100 for q in qs):
+            raise ValueError(f"{prefix}PERCENTILES는 0~100이어야 합니다: {qs}")
+        bank = cls({s: lags for s in states}, {(sig, s): qs for sig in signals for s in states})
+        return bank or None
+
+    def __bool__(self):
+        return bool(self.gmrt_lags or self.percentiles)
+
+    def union(self, other):
+        if not other:
+            return self
+        gmrt = {s: list(self.gmrt_lags.get(s, ())) + list(other.gmrt_lags.get(s, ()))
+                for s in set(self.gmrt_lags) | set(other.gmrt_lags)}
+        percentiles = {key: list(self.percentiles.get(key, ())) + list(other.percentiles.get(key, ()))
+                       for key in set(self.percentiles) | set(other.percentiles)}
+        return FeatureBank(gmrt, percentiles)
+
+    def names(self):
+        names = [f'gmrt_{state}_lag{d}' for state in STATES for d in self.gmrt_lags.get(state, ())]
+        names += [f'{signal}_p{_format_q(q)}_{state}' for signal in SIGNALS for state in STATES
+                  for q in self.percentiles.get((signal, state), ())]
+        return names
+
+    def describe(self):
+        # 결과 캐시 키 등에 쓰는 설정 문자열
+        return ','.join(self.names())
+
+    def _signals(self, columns, derived):
+        # 평균으로 채운 SPEED/ACCELERATION/JERK (extract_features가 계산한 것을 우선 사용)
+        if all(s in derived for s in SIGNALS):
+            return derived
+        _, _, _, speed, acc, jerk = compute_derivatives(np.asarray(columns[TIME_COL]), columns[X_COL], columns[Y_COL])
+        return {'speed': _fill_with_mean(speed)[0], 'acc': _fill_with_mean(acc)[0], 'jerk': _fill_with_mean(jerk)[0]}
+
+    def compute(self, columns, derived=None):
+        # -> {feature 이름: float}. 버튼 컬럼이 없으면 모두 None
+        if columns.get(BUTTON_COL) is None:
+            return dict.fromkeys(self.names())
+        derived = derived or {}
+        b = np.asarray(columns[BUTTON_COL])
+        masks = {}
+
+        def mask(state):
+            if state not in masks:
+                masks[state] = b == STATES[state]
+            return masks[state]
+
+        out = {}
+        for state, lags in self.gmrt_lags.items():
+            radii = derived.get(_RADII_KEYS[state])
+            if radii is None:
+                radii = _radii(np.asarray(columns[X_COL]), np.asarray(columns[Y_COL]), mask(state))
+            out.update((f'gmrt_{state}_lag{d}', float(v)) for d, v in zip(lags, gmrt_lags(radii, lags)))
+        if self.percentiles:
+            signals = self._signals(columns, derived)
+            for (signal, state), qs in self.percentiles.items():
+                sub = signals[signal][mask(state)]
+                values = np.percentile(sub, qs) if sub.size else np.full(len(qs), np.nan)
+                out.update((f'{signal}_p{_format_q(q)}_{state}', float(v)) for q, v in zip(qs, values))
+        return {name: out[name] for name in self.names()}
+
+
+def bank_for(names=()):
+    # 설정(FEATURE_BANK_*)의 bank + 모델이 입력으로 쓰는 bank feature
+    requested = FeatureBank.from_names(names) if names else None
+    if default_bank is None:
+        return requested
+    return default_bank.union(requested)
+
+
+# analysis_runner가 사용 (FEATURE_BANK_* 환경 변수, 기본 None = 끔)
+default_bank = FeatureBank.from_env()
@@ -0,0 +1,344 @@
+import numpy as np
+
+
+# preprocess_dataframe()가 돌려주는 17개 feature (순서 포함 동일)
+FEATURE_KEYS = (
+    'air_time', 'gmrt_in_air', 'gmrt_on_paper', 'max_x_extension', 'max_y_extension',
+    'mean_acc_in_air', 'mean_acc_on_paper', 'mean_gmrt', 'mean_jerk_in_air', 'mean_jerk_on_paper',
+    'mean_speed_in_air', 'mean_speed_on_paper', 'num_of_pendown', 'paper_time',
+    'pressure_mean', 'pressure_var', 'total_time',
+)
+
+# 입력 컬럼 (태블릿 CSV 기준 이름)
+TIME_COL, BUTTON_COL, X_COL, Y_COL, PRESSURE_COL = '시간', '버튼', 'X', 'Y', '압력_NORMAL'
+DERIVED_COLS = ('TIME_DIFF', 'TIME_DIFF_DELTA', 'DISTANCE', 'SPEED', 'ACCELERATION', 'JERK')
+
+
+# pandas(nanops, bottleneck 미사용)와 같은 순서로 합산해야 결과가 비트 단위로 같다:
+# NaN 자리를 0으로 채운 전체 배열을 한 번에 sum 한 뒤 유효 개수로 나눈다.
+def _nanmean(v, nan_mask=None):
+    if nan_mask is None:
+        nan_mask = np.isnan(v)
+    count = v.size - int(np.count_nonzero(nan_mask))
+    if count == 0:
+        return np.nan
+    if count != v.size:
+        v = np.where(nan_mask, 0.0, v)
+    # float32 배열(저메모리 모드)도 float64로 누적
+    return v.sum(dtype=np.float64) / count
+
+
+def _nanvar(v, ddof=1):
+    nan_mask = np.isnan(v)
+    count = v.size - int(np.count_nonzero(nan_mask))
+    if count <= ddof:
+        return np.nan
+    if count != v.size:
+        v = np.where(nan_mask, 0.0, v)
+    avg = v.sum() / count
+    sqr = (avg - v) ** 2
+    if count != v.size:
+        sqr[nan_mask] = 0.0
+    return sqr.sum() / (count - ddof)
+
+
+def _nanmax(v):
+    nan_mask = np.isnan(v)
+    if nan_mask.all():
+        return np.nan
+    return v[~nan_mask].max() if nan_mask.any() else v.max()
+
+
+def _fill_with_mean(v):
+    # inf -> NaN 후 평균으로 채움 (pandas replace + fillna(mean)과 동일)
+    # 반환값: 채운 뒤에도 NaN이 남는지 (전부 NaN인 경우에만 True)
+    # _nanmean처럼 결측 자리를 0으로 두고 합산하되, 복사본 대신 v 자체를 쓴다 (합산 순서가 같아 결과도 같음)
+    bad = ~np.isfinite(v)
+    if bad.any():
+        count = v.size - int(np.count_nonzero(bad))
+        if count == 0:
+            v[bad] = np.nan
+            return v, True
+        v[bad] = 0.0
+        v[bad] = v.sum(dtype=np.float64) / count
+    return v, False
+
+
+def _masked_mean(v, mask, has_nan):
+    # v[mask].mean() (pandas). fill 이후에는 NaN이 없으므로 isnan 검사를 건너뛴다
+    sub = v[mask]
+    if has_nan:
+        return _nanmean(sub)
+    return sub.sum(dtype=np.float64) / sub.size if sub.size else np.nan
+
+
+def _gmrt(radii, d=1, has_nan=True):
+    # radii: 한 펜 상태로 걸러낸 sqrt(X²+Y²) 시계열
+    n = len(radii)
+    if n <= d:
+        return 0
+    distances = np.abs(radii[d:] - radii[:-d])
+    if has_nan:
+        distances = distances[~np.isnan(distances)]
+    return (1 / (n - d)) * distances.sum()
+
+
+def _as_float(a):
+    return np.ascontiguousarray(a, dtype=np.float64)
+
+
+def compute_derivatives(t, x, y):
+    # TIME_DIFF / TIME_DIFF_DELTA / DISTANCE / SPEED / ACCELERATION / JERK (fill 전 원본)
+    n = len(t)
+    time_diff = _as_float(t - (t[0] + 1))
+
+    delta = np.empty(n)
+    delta[0] = np.nan
+    np.subtract(time_diff[1:], time_diff[:-1], out=delta[1:])
+    delta[delta == 0] = np.nan
+
+    xf, yf = _as_float(x), _as_float(y)
+    distance = np.empty(n)
+    distance[0] = np.nan
+    dx = xf[1:] - xf[:-1]
+    dy = yf[1:] - yf[:-1]
+    np.sqrt(dx * dx + dy * dy, out=distance[1:])
+
+    speed = distance / delta
+    acc = np.empty(n)
+    acc[0] = np.nan
+    np.subtract(speed[1:], speed[:-1], out=acc[1:])
+    acc /= delta
+    jerk = np.empty(n)
+    jerk[0] = np.nan
+    np.subtract(acc[1:], acc[:-1], out=jerk[1:])
+    jerk /= delta
+    return time_diff, delta, distance, speed, acc, jerk
+
+
+# 저메모리 모드(compact=True)에서 정수로 바꿔도 되는 좌표 범위: 차이까지 float32로 정확히 표현됨
+_COMPACT_COORD_LIMIT = 1 << 23
+
+
+def _narrow(v, dtype, limit=None):
+    # 값이 하나도 바뀌지 않을 때만 좁은 정수 dtype으로 (NaN/inf/소수가 있으면 원래 배열 그대로)
+    v = np.asarray(v)
+    if v.dtype == dtype or v.size == 0 or v.dtype.kind not in 'iuf':
+        return v
+    info = np.iinfo(dtype)
+    lo, hi = (info.min, info.max) if limit is None else (-limit, limit)
+    if not (lo <= v.min() and v.max() <= hi):
+        return v
+    if v.dtype.kind in 'iu':
+        return v.astype(dtype)
+    narrowed = v.astype(dtype)
+    return narrowed if np.array_equal(narrowed, v) else v
+
+
+def compact_columns(columns):
+    # 저메모리 모드 입력: 시간 -> int64, 정수값 좌표 -> int32, 0/1 버튼 -> int8. 압력 등 나머지는 그대로
+    out = dict(columns)
+    for c, dtype, limit in ((TIME_COL, np.int64, None), (X_COL, np.int32, _COMPACT_COORD_LIMIT),
+                            (Y_COL, np.int32, _COMPACT_COORD_LIMIT), (BUTTON_COL, np.int8, None)):
+        if out.get(c) is not None:
+            out[c] = _narrow(out[c], dtype, limit)
+    return out
+
+
+def compute_derivatives_compact(t, x, y, keep=True):
+    # compute_derivatives의 저메모리 버전: 시간 차이는 입력 dtype(int64) 그대로, 미분은 float32.
+    # dx/dy 제곱합과 sqrt는 DISTANCE 버퍼 안에서 계산한다.
+    # keep=False면 TIME_DIFF 배열을 만들지 않고(정수 시간일 때, None) SPEED를 DISTANCE 버퍼에 덮어쓴다
+    n = len(t)
+    if keep or t.dtype.kind == 'f':
+        time_diff = t - (t[0] + 1)
+        steps = time_diff
+    else:
+        # 정수 시간의 차이는 TIME_DIFF 차이와 같다
+        time_diff, steps = None, t
+
+    delta = np.empty(n, dtype=np.float32)
+    delta[0] = np.nan
+    np.subtract(steps[1:], steps[:-1], out=delta[1:])
+    delta[delta == 0] = np.nan
+
+    distance = np.empty(n, dtype=np.float32)
+    distance[0] = np.nan
+    d = distance[1:]
+    np.subtract(x[1:], x[:-1], out=d)
+    d *= d
+    dy = np.empty(n - 1, dtype=np.float32)
+    np.subtract(y[1:], y[:-1], out=dy)
+    dy *= dy
+    d += dy
+    del dy
+    np.sqrt(d, out=d)
+
+    speed = np.empty_like(distance) if keep else distance
+    np.divide(distance, delta, out=speed)
+    acc = np.empty(n, dtype=np.float32)
+    acc[0] = np.nan
+    np.subtract(speed[1:], speed[:-1], out=acc[1:])
+    acc /= delta
+    jerk = np.empty(n, dtype=np.float32)
+    jerk[0] = np.nan
+    np.subtract(acc[1:], acc[:-1], out=jerk[1:])
+    jerk /= delta
+    return time_diff, delta, distance, speed, acc, jerk
+
+
+def _radii(x, y, mask):
+    # 한 펜 상태의 sqrt(X²+Y²) (float64, 전체 길이 배열을 만들지 않음)
+    xs = x[mask].astype(np.float64)
+    ys = y[mask].astype(np.float64)
+    xs *= xs
+    ys *= ys
+    xs += ys
+    return np.sqrt(xs, out=xs)
+
+
+def extract_features(t, x, y, button=None, pressure=None, return_row0=False, derived=None, compact=False):
+    # preprocess_dataframe()과 같은 feature dict를 NumPy 배열에서 한 번에 계산한다.
+    # 펜 상태 마스크는 한 번만 만들고, 중간 DataFrame 컬럼은 만들지 않는다.
+    # derived(dict)를 주면 계산한 미분 배열(fill 이후)과 펜 상태별 반지름을 넣어 준다 (획별 통계/feature_bank가 다시 계산하지 않도록)
+    # compact=True: 저메모리 모드. 입력은 compact_columns()의 좁은 dtype 그대로 쓰고 미분은 float32
+    # (feature 차이는 run_low_memory_report.py 참고)
+    t = np.asarray(t)
+    if len(t) == 0:
+        raise ValueError("분석할 샘플이 없습니다")
+    if compact:
+        xf, yf = np.asarray(x), np.asarray(y)
+        time_diff, delta, distance, speed, acc, jerk = compute_derivatives_compact(t, xf, yf, keep=derived is not None)
+    else:
+        xf, yf = _as_float(x), _as_float(y)
+        time_diff, delta, distance, speed, acc, jerk = compute_derivatives(t, xf, yf)
+    if time_diff is None:
+        total_time = t[-1] - (t[0] + 1)
+        first = (t[0] - (t[0] + 1), delta[0], distance[0])
+    else:
+        total_time = time_diff[-1]
+        # 첫 행 값은 fill 전에 (compact 모드에서는 SPEED가 DISTANCE 버퍼를 덮어쓸 수 있음)
+        first = (time_diff[0], delta[0], distance[0])
+    speed, speed_nan = _fill_with_mean(speed)
+    acc, _ = _fill_with_mean(acc)
+    jerk, jerk_nan = _fill_with_mean(jerk)
+    # ACCELERATION은 첫 행 값만 쓴다
+    acc0 = acc[0]
+    if derived is not None:
+        derived.update(time_diff=time_diff, distance=distance, speed=speed, acc=acc, jerk=jerk)
+    del acc
+
+    if button is not None:
+        b = np.asarray(button) if compact else _as_float(button)
+        on = b == 1
+        air = b == 0
+        if compact:
+            radii_on, radii_air = _radii(xf, yf, on), _radii(xf, yf, air)
+            radii_nan = bool(np.isnan(radii_on).any() or np.isnan(radii_air).any())
+        else:
+            radii = np.sqrt(xf * xf + yf * yf)
+            radii_nan = bool(np.isnan(radii).any())
+            radii_on, radii_air = radii[on], radii[air]
+            del radii
+        gmrt_on_paper = _gmrt(radii_on, has_nan=radii_nan)
+        gmrt_in_air = _gmrt(radii_air, has_nan=radii_nan)
+        if derived is not None:
+            # 펜 상태별 반지름 (feature_bank의 여러 lag GMRT가 다시 계산하지 않도록)
+            derived.update(radii_on=radii_on, radii_air=radii_air)
+        del radii_on, radii_air
+        mean_speed_on_paper = float(_masked_mean(speed, on, speed_nan))
+        mean_speed_in_air = float(_masked_mean(speed, air, speed_nan))
+        if time_diff is not None and np.isnan(time_diff).any():
+            td_valid = ~np.isnan(time_diff)
+            air_time = int(np.count_nonzero(td_valid & air))
+            paper_time = int(np.count_nonzero(td_valid & on))
+        else:
+            air_time = int(np.count_nonzero(air))
+            paper_time = int(np.count_nonzero(on))
+        pendowns = int(np.count_nonzero((b[1:] - b[:-1]) == 1))
+        mean_jerk_in_air = float(_masked_mean(jerk, air, jerk_nan))
+        mean_jerk_on_paper = float(_masked_mean(jerk, on, jerk_nan))
+    else:
+        gmrt_on_paper = gmrt_in_air = None
+        mean_speed_on_paper = mean_speed_in_air = None
+        air_time = paper_time = pendowns = None
+        mean_jerk_in_air = mean_jerk_on_paper = None
+
+    if pressure is not None:
+        p = _as_float(pressure)
+        pressure_mean = float(_nanmean(p))
+        pressure_var = float(_nanvar(p))
+    else:
+        pressure_mean = pressure_var = None
+
+    result = {
+        'air_time': air_time,
+        'gmrt_in_air': float(gmrt_in_air) if gmrt_in_air is not None else None,
+        'gmrt_on_paper': float(gmrt_on_paper) if gmrt_on_paper is not None else None,
+        'max_x_extension': float(_nanmax(xf)),
+        'max_y_extension': float(_nanmax(yf)),
+        'mean_acc_in_air': mean_speed_in_air,
+        'mean_acc_on_paper': mean_speed_on_paper,
+        'mean_gmrt': float(((gmrt_on_paper or 0) + (gmrt_in_air or 0)) / 2),
+        'mean_jerk_in_air': mean_jerk_in_air,
+        'mean_jerk_on_paper': mean_jerk_on_paper,
+        'mean_speed_in_air': mean_speed_in_air,
+        'mean_speed_on_paper': mean_speed_on_paper,
+        'num_of_pendown': pendowns,
+        'paper_time': paper_time,
+        'pressure_mean': pressure_mean,
+        'pressure_var': pressure_var,
+        'total_time': float(total_time),
+    }
+    if not return_row0:
+        return result
+
+    # analyze()의 feature 매핑은 df_full의 첫 행만 읽으므로 그 한 행만 만든다
+    row0 = {TIME_COL: t[0], X_COL: xf[0], Y_COL: yf[0]}
+    if button is not None:
+        row0[BUTTON_COL] = b[0]
+    if pressure is not None:
+        row0[PRESSURE_COL] = p[0]
+    row0.update(zip(DERIVED_COLS, first + (speed[0], acc0, jerk[0])))
+    return result, row0
+
+
+def normalize_columns(df):
+    # 컬럼명 정리 ('"시간"', ' 버튼' 등)
+    df.columns = df.columns.str.strip().str.replace('"', '')
+    if TIME_COL not in df.columns:
+        raise ValueError("CSV에 '시간' 컬럼이 없습니다")
+    return df
+
+
+def features_from_columns(columns, derived=None, compact=False):
+    # {'시간': arr, 'X': arr, 'Y': arr, ('버튼', '압력_NORMAL', 그 밖의 원본 컬럼)} -> (feature dict, 첫 행 dict)
+    # compact=True면 저메모리 모드 (compact_columns()로 좁힌 컬럼을 넘길 것)
+    if TIME_COL not in columns:
+        raise ValueError("CSV에 '시간' 컬럼이 없습니다")
+    result, row0 = extract_features(
+        columns[TIME_COL],
+        columns[X_COL],
+        columns[Y_COL],
+        button=columns.get(BUTTON_COL),
+        pressure=columns.get(PRESSURE_COL),
+        return_row0=True,
+        derived=derived,
+        compact=compact,
+    )
+    # 모델이 원본 컬럼(예: Z)을 feature로 쓰는 경우를 위해 첫 행의 나머지 컬럼도 포함
+    for c, arr in columns.items():
+        if c not in row0 and len(arr):
+            row0[c] = arr[0]
+    return result, row0
+
+
+def dataframe_columns(df):
+    # DataFrame -> {컬럼명: ndarray} (컬럼명 정리 포함)
+    df = normalize_columns(df)
+    return {c: df[c].to_numpy() for c in df.columns}
+
+
+def features_from_dataframe(df):
+    # DataFrame -> (feature dict, 첫 행 dict). preprocess_dataframe()의 빠른 대체 경로
+    return features_from_columns(dataframe_columns(df))
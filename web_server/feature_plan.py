@@ -0,0 +1,139 @@
+import re
+
+import numpy as np
+
+import feature_bank
+from feature_engine import FEATURE_KEYS, DERIVED_COLS, TIME_COL, X_COL, Y_COL, PRESSURE_COL, BUTTON_COL
+
+
+# 모델 입력으로 쓸 수 있는 값: feature dict 17개 + df_full 첫 행의 알려진 컬럼
+ROW0_COLS = (TIME_COL, BUTTON_COL, X_COL, Y_COL, PRESSURE_COL) + DERIVED_COLS
+SOURCES = tuple(FEATURE_KEYS) + ROW0_COLS
+DEFAULT_INDEX = len(SOURCES)  # 항상 0.0인 슬롯
+
+
+def _norm(name):
+    return re.sub(r"\W+", "_", name.lower())
+
+
+def _num(v):
+    if v is None:
+        return np.nan
+    try:
+        return float(v)
+    except Exception:
+        return 0.0
+
+
+def model_feature_names(model):
+    # 모델이 기대하는 입력 이름: feature_names_in_ -> 파이프라인 내부 스텝 -> col_0.. (n_features_in_)
+    feature_names = None
+    if hasattr(model, 'feature_names_in_'):
+        try:
+            feature_names = list(model.feature_names_in_)
+        except Exception:
+            feature_names = None
+
+    # 파이프라인인 경우 내부 스텝에서 feature_names 추출 시도
+    if feature_names is None and hasattr(model, 'named_steps'):
+        for step in model.named_steps.values():
+            if hasattr(step, 'feature_names_in_'):
+                try:
+                    feature_names = list(step.feature_names_in_)
+                    break
+                except Exception:
+                    continue
+
+    n_features = getattr(model, 'n_features_in_', None)
+    if feature_names is None and n_features is not None:
+        feature_names = [f'col_{i}' for i in range(n_features)]
+    return feature_names
+
+
+def _resolve(fname):
+    # analyze()가 요청마다 하던 매칭 규칙을 그대로, 로드 시 한 번만 적용
+    # 1) 정확한 키 매칭
+    if fname in FEATURE_KEYS:
+        return fname, 'exact'
+    # 2) df_full 첫 행의 컬럼
+    if fname in ROW0_COLS:
+        return fname, 'row0'
+    # 3) 숫자 접미사 제거해서 base 이름으로 매핑 (예: air_time1 -> air_time)
+    base = re.sub(r"\d+$", "", fname)
+    if base in FEATURE_KEYS:
+        return base, 'base'
+    # 4) 정규화된 키 비교(소문자, 언더스코어)
+    fname_norm, base_norm = _norm(fname), _norm(base)
+    for k in FEATURE_KEYS:
+        if _norm(k) in (fname_norm, base_norm):
+            return k, 'normalized'
+    # 5) feature_bank 형식 이름 (gmrt_on_paper_lag3, speed_p90_in_air 등): 요청 시 feature dict에서 찾는다
+    if feature_bank.parse_name(fname) is not None:
+        return None, 'bank'
+    return None, 'default'
+
+
+class FeaturePlan:
+    # 모델 입력 이름 -> SOURCES 인덱스 배열. 요청마다 source 벡터 하나를 만들고 한 번의 gather로 입력을 채운다
+
+    def __init__(self, feature_names):
+        self.feature_names = list(feature_names)
+        self.mapping = []
+        index = []
+        for fname in self.feature_names:
+            source, rule = _resolve(fname)
+            self.mapping.append((fname, source, rule))
+            index.append(SOURCES.index(source) if source is not None else DEFAULT_INDEX)
+        self.index = np.asarray(index, dtype=np.intp)
+        self.default_mask = self.index == DEFAULT_INDEX
+        # 정적으로 못 찾은 이름은 feature_bank feature이거나 CSV의 다른 원본 컬럼(예: Z)일 수 있으므로
+        # 요청 시 feature dict와 첫 행에서 한 번 더 찾는다
+        self.dynamic = [(i, fname) for i, (fname, source, _) in enumerate(self.mapping) if source is None]
+        # 이 모델을 쓸 때 계산할 feature_bank (설정한 bank + 모델 입력에 있는 bank feature, 없으면 None)
+        self.bank = feature_bank.bank_for([fname for fname, _, rule in self.mapping if rule == 'bank'])
+
+    @property
+    def n_features(self):
+        return len(self.feature_names)
+
+    @property
+    def defaulted(self):
+        return [fname for fname, source, rule in self.mapping if source is None and rule != 'bank']
+
+    def vector(self, preproc_result, row0=None):
+        # (n_features,) float64. None/NaN/inf -> 0.0
+        row0 = row0 or {}
+        src = np.empty(DEFAULT_INDEX + 1)
+        for i, k in enumerate(FEATURE_KEYS):
+            src[i] = _num(preproc_result.get(k))
+        for i, c in enumerate(ROW0_COLS, start=len(FEATURE_KEYS)):
+            src[i] = _num(row0.get(c))
+        src[DEFAULT_INDEX] = 0.0
+        np.nan_to_num(src, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
+        vec = src[self.index]
+        for i, fname in self.dynamic:
+            if fname in preproc_result:
+                value = preproc_result[fname]
+            elif fname in row0:
+                value = row0[fname]
+            else:
+                continue
+            vec[i] = np.nan_to_num(_num(value), nan=0.0, posinf=0.0, neginf=0.0)
+        return vec
+
+    def describe(self):
+        return {
+            'n_features': self.n_features,
+            'n_defaulted': len(self.defaulted),
+            'defaulted': self.defaulted,
+            'bank': self.bank.names() if self.bank else [],
+            'mapping': [{'feature': f, 'source': s, 'rule': r} for f, s, r in self.mapping],
+        }
+
+
+def compile_feature_plan(model):
+    # 모델에 입력 정보가 없으면 None
+    feature_names = model_feature_names(model)
+    if feature_names is None:
+        return None
+    return FeaturePlan(feature_names)
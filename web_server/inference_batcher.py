@@ -0,0 +1,147 @@
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from metrics import metrics
+
+
+# 동시에 들어온 요청들의 모델 입력 벡터를 모아서 predict_proba를 한 번만 호출한다 (micro-batching).
+# 첫 벡터가 들어온 뒤 window초 동안(또는 max_batch개가 찰 때까지) 기다렸다가 한 배치로 실행하고,
+# 결과 행을 각 요청에 돌려준다. prediction은 확률의 argmax로 만들므로 predict를 따로 호출하지 않는다.
+# 스레드 기반이라 같은 프로세스 안의 요청끼리만 묶인다 (ANALYSIS_POOL=process 워커에서는 쓰지 않음).
+#   INFERENCE_BATCH=0               끄기 (요청마다 predict + predict_proba)
+#   INFERENCE_BATCH_WINDOW_MS=2     묶는 시간 창
+#   INFERENCE_BATCH_MAX=32          배치 최대 크기
+batch_size = metrics.histogram('inference_batch_size', 'Feature vectors per predict_proba call',
+                               buckets=(1, 2, 4, 8, 16, 32, 64, 128))
+batch_wait = metrics.histogram('inference_batch_wait_seconds', 'Time a request waited for its batch to start')
+
+
+class InferenceBatcher:
+
+    def __init__(self, window=0.002, max_batch=32, timeout=30.0):
+        if max_batch < 1:
+            raise ValueError(f"max_batch는 1 이상이어야 합니다: {max_batch}")
+        self.window = window
+        self.max_batch = max_batch
+        self.timeout = timeout
+        self._cond = threading.Condition()
+        self._queue = []
+        self._thread = None
+        self._pid = None
+        self._closed = False
+        self.stats = {'requests': 0, 'batches': 0, 'failed_batches': 0, 'largest_batch': 0}
+
+    @classmethod
+    def from_env(cls, prefix='INFERENCE_BATCH'):
+        # 꺼져 있으면 None
+        env = os.environ
+        if env.get(prefix, '1') in ('0', 'false', 'no'):
+            return None
+        return cls(window=float(env.get(prefix + '_WINDOW_MS', '2')) / 1000,
+                   max_batch=int(env.get(prefix + '_MAX', '32')))
+
+    def _ensure_thread(self):
+        # 처음 쓸 때 시작 (fork된 워커에서는 부모의 스레드가 없으므로 다시 시작)
+        if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._loop, name='inference-batcher', daemon=True)
+            self._thread.start()
+
+    def submit(self, snapshot, xvec):
+        # -> Future (결과: 이 벡터의 predict_proba 행)
+        fut = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("inference batcher가 종료되었습니다")
+            self._ensure_thread()
+            self._queue.append((time.monotonic(), snapshot, xvec, fut))
+            self._cond.notify()
+        return fut
+
+    def predict_proba(self, snapshot, xvec):
+        return self.submit(snapshot, xvec).result(timeout=self.timeout)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._queue and not self._closed:
+                self._cond.wait()
+            if not self._queue:
+                return None
+            deadline = self._queue[0][0] + self.window
+            while len(self._queue) < self.max_batch and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = self._queue[:self.max_batch]
+            del self._queue[:self.max_batch]
+            return batch
+
+    def _loop(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            started = time.monotonic()
+            # 요청 도중 모델이 재로드되었을 수 있으므로 같은 모델/스케일러끼리 묶는다
+            groups = {}
+            for item in batch:
+                snapshot = item[1]
+                groups.setdefault((id(snapshot.model), id(snapshot.scaler)), []).append(item)
+            for items in groups.values():
+                for enqueued, _, _, _ in items:
+                    batch_wait.observe(started - enqueued)
+                self._run(items)
+
+    def _run(self, items):
+        from analysis_runner import model_input
+
+        snapshot = items[0][1]
+        futures = [fut for _, _, _, fut in items]
+        try:
+            _, X = model_input(snapshot, np.vstack([x for _, _, x, _ in items]))
+            proba = np.asarray(snapshot.model.predict_proba(X))
+        except Exception as e:
+            self.stats['failed_batches'] += 1
+            for fut in futures:
+                fut.set_exception(e)
+            return
+        batch_size.observe(len(items))
+        self.stats['requests'] += len(items)
+        self.stats['batches'] += 1
+        self.stats['largest_batch'] = max(self.stats['largest_batch'], len(items))
+        for row, fut in zip(proba, futures):
+            fut.set_result(row)
+
+    def status(self):
+        with self._cond:
+            queued = len(self._queue)
+        stats = dict(self.stats)
+        return {
+            'window_ms': self.window * 1000,
+            'max_batch': self.max_batch,
+            'queued': queued,
+            'mean_batch': round(stats['requests'] / stats['batches'], 3) if stats['batches'] else None,
+            **stats,
+        }
+
+
+# 서버(main.py)가 설정한다. None이면 analysis_runner는 요청마다 직접 예측
+default_batcher = None
+
+
+def configure(batcher):
+    global default_batcher
+    previous, default_batcher = default_batcher, batcher
+    if previous is not None and previous is not batcher:
+        previous.close()
+    return batcher
@@ -1,14 +1,72 @@
-from fastapi import FastAPI, UploadFile, File
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, UploadFile, File, BackgroundTasks, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-import uvicorn
+import asyncio
 import os
+import warnings
+from contextlib import asynccontextmanager
 from pathlib import Path
-from analysis_runner import analyze
+from analysis_pool import AnalysisPool, AnalysisTimeout, PoolSaturated
+from analysis_runner import (LOW_MEMORY, analyze_batch, analyze_columns, analyze_streamed, read_columns,
+                             resolve_prediction, session_features, snapshot_bank)
+from feature_engine import TIME_COL
+import feature_bank
+import inference_batcher
+from metrics import (CONTENT_TYPE as METRICS_CONTENT_TYPE, StageTimer, errors, http_latency, http_requests, metrics,
+                     record_analysis, record_stages, run_timed, stage_latency)
+from model_registry import default_registry
+from online_features import OnlineFeatures
+from readiness import readiness
+import resampling
+from result_cache import ResultCache
+from serialization import FastJSONResponse, dumps, loads
+from session_store import SessionStore
+from stroke_codec import (BINARY_CONTENT_TYPE, decode_binary, is_columnar, json_columns_to_columns,
+                          parse_sample, records_to_columns, write_strokes_csv)
+import synthetic_handwriting
 import time
-import csv
 
-app = FastAPI()
+
+# 시작 시 warm-up 예측에 쓰는 합성 샘플 수
+WARMUP_SAMPLES = int(os.environ.get('WARMUP_SAMPLES', '500'))
+
+
+async def _warm_up():
+    # 합성 데이터로 분석 경로 전체(feature -> 매핑 -> 예측)를 한 번 실행. 성공해야 /ready가 준비 상태
+    try:
+        columns = synthetic_handwriting.generate(WARMUP_SAMPLES)
+        result = await analysis_pool.run(analyze_columns, columns)
+        ml = result.get('ml') or {}
+        if 'prediction' not in ml:
+            raise RuntimeError(ml.get('error') or ml.get('warning') or '모델을 찾지 못함')
+        readiness.mark(True)
+    except Exception as e:
+        warnings.warn(f"warm-up 예측 실패: {e}")
+        readiness.mark(False, f'{type(e).__name__}: {e}')
+
+
+@asynccontextmanager
+async def lifespan(app):
+    global session_store
+    # 모델/스케일러는 서버 시작 시 한 번만 찾아서 로드 (serve.py가 fork 전에 로드했다면 그대로 사용)
+    default_registry.get()
+    if SESSION_PERSIST == 'store' and session_store is None:
+        session_store = SessionStore.from_env()
+    analysis_pool.start()
+    # 동시 요청의 예측을 묶어서 실행 (스레드 풀일 때만: 프로세스 풀 워커는 각자 예측)
+    if analysis_pool.kind == 'thread':
+        inference_batcher.configure(inference_batcher.InferenceBatcher.from_env())
+    warm_up = asyncio.create_task(_warm_up())
+    yield
+    warm_up.cancel()
+    # serve.py 워커: 종료 전에 마지막 값을 남긴다 (단일 프로세스면 아무것도 안 함)
+    metrics.flush()
+    inference_batcher.configure(None)
+    analysis_pool.shutdown(wait=False)
+
+
+# 응답은 serialization.dumps로 (orjson이 있으면 orjson)
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
 
 # CORS: 개발 환경에서 프론트엔드(예: http://localhost:3000)에서 백엔드로 요청할 수 있도록 허용
 app.add_middleware(
@@ -21,66 +79,514 @@ app.add_middleware(
 
 WORKDIR = Path(__file__).resolve().parent
 
+# /analyze_strokes 원본 세션을 남길지 여부 (응답 이후 백그라운드에서 저장)
+PERSIST_STROKES = os.environ.get('PERSIST_STROKES', '1') not in ('0', 'false', 'no')
 
-@app.post('/analyze')
-async def analyze_endpoint(file: UploadFile = File(...)):
-    # 저장
-    upload_path = WORKDIR / 'uploads'
-    upload_path.mkdir(exist_ok=True)
-    file_path = upload_path / file.filename
-    with open(file_path, 'wb') as f:
-        content = await file.read()
-        f.write(content)
+# 원본 세션 저장 위치 (SESSION_PERSIST)
+#   store(기본): session_store.py의 segment 파일 + index (SESSION_STORE_DIR 등)
+#   uploads: 이전 방식, 요청마다 uploads/에 CSV 파일   off: 저장 안 함
+PERSIST_MODES = ('store', 'uploads', 'off')
+SESSION_PERSIST = os.environ.get('SESSION_PERSIST', 'store')
+if SESSION_PERSIST not in PERSIST_MODES:
+    raise ValueError(f"SESSION_PERSIST는 {'/'.join(PERSIST_MODES)} 중 하나여야 합니다: {SESSION_PERSIST}")
+# lifespan에서 만든다 (import만 해도 저장 디렉토리가 생기지 않도록)
+session_store = None
+
+# 분석 작업용 executor (ANALYSIS_POOL=thread|process, ANALYSIS_WORKERS, ANALYSIS_QUEUE_LIMIT, ANALYSIS_TIMEOUT)
+analysis_pool = AnalysisPool.from_env()
 
+# 분석 결과 캐시 (RESULT_CACHE_SIZE=0 이면 메모리 캐시 끔, RESULT_CACHE_TTL, RESULT_CACHE_DIR, RESULT_CACHE_DISK_MB)
+result_cache = ResultCache.from_env()
+
+
+# 자체 집계가 있는 구성요소는 /metrics 렌더링 시점에 값을 읽는다
+metrics.gauge('analysis_pool_in_flight', 'Analyses running or queued in the worker pool',
+              callback=lambda: {(): analysis_pool.status()['in_flight']})
+metrics.counter('analysis_pool_tasks_total', 'Worker pool task outcomes', ('outcome',),
+                callback=lambda: {(k,): v for k, v in analysis_pool.status().items()
+                                  if k in ('submitted', 'completed', 'failed', 'rejected', 'timed_out')})
+metrics.counter('result_cache_lookups_total', 'Result cache lookups by outcome', ('result',),
+                callback=lambda: {(k,): v for k, v in result_cache.status().items() if k in ('hits', 'disk_hits', 'misses')})
+metrics.gauge('result_cache_entries', 'Entries in the in-memory result cache',
+              callback=lambda: {(): result_cache.status()['entries']})
+metrics.counter('model_load_events_total', 'Model/scaler load attempts by kind and outcome', ('kind', 'status'),
+                callback=lambda: dict(default_registry.load_counts))
+
+_ERROR_KINDS = {503: 'saturated', 504: 'timeout'}
+
+
+@app.middleware('http')
+async def observe_requests(request: Request, call_next):
+    # 엔드포인트(라우트 경로)별 요청 수/상태 코드와 latency
+    start = time.perf_counter()
+    status_code = 500
     try:
-        result = analyze(str(file_path))
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        route = request.scope.get('route')
+        endpoint = getattr(route, 'path', None) or 'unmatched'
+        http_latency.observe(time.perf_counter() - start, endpoint=endpoint, method=request.method)
+        http_requests.inc(endpoint=endpoint, method=request.method, status=status_code)
+
+
+async def _cache_lookup(columns, debug, **options):
+    # (key, 캐시된 결과 또는 None). 모델/스케일러 버전이 바뀌었으면 여기서 캐시가 비워진다.
+    # 샘플 해시, 모델 재로드, 디스크 읽기가 이벤트 루프를 막지 않도록 스레드에서 실행한다
+    # (캐시는 이 프로세스에 있으므로 프로세스 풀이 아닌 기본 스레드 executor).
+    # debug 결과는 요청마다 다른 단계별 시간/메모리가 들어 있어 캐시하지 않는다
+    if debug or not result_cache.enabled:
+        return None, None
+    return await asyncio.to_thread(_cache_key_lookup, columns, options)
+
+
+def _cache_key_lookup(columns, options):
+    version = default_registry.get().version
+    result_cache.check_version(version)
+    if resampling.default_resampler is not None:
+        # 리샘플 설정이 다르면 같은 입력이어도 결과가 다르다 (디스크 캐시는 재시작 후에도 남음)
+        options['resample'] = resampling.default_resampler.describe()
+    if feature_bank.default_bank is not None:
+        # 설정한 추가 feature가 결과의 preprocessing에 들어간다 (모델이 요구하는 것은 모델 버전에 묶여 있음)
+        options['feature_bank'] = feature_bank.default_bank.describe()
+    if LOW_MEMORY:
+        # 저메모리 모드의 float32 미분은 feature 값이 조금 다르다
+        options['low_memory'] = True
+    key = result_cache.key(version, columns, debug=False, **options)
+    return key, result_cache.get(key)
+
+
+def _cacheable(result):
+    # 예측까지 끝난 결과만 캐시한다. 예측 에러(배치 시간 초과, 모델 예외 등)는 다시 시도하면 풀릴 수 있으므로
+    # 캐시하면 TTL 동안 같은 샘플의 재시도가 모두 이전 에러를 받게 된다
+    ml = result.get('ml') if isinstance(result, dict) else None
+    return isinstance(ml, dict) and 'prediction' in ml
+
+
+async def _cache_store(key, result):
+    if key is not None and _cacheable(result):
+        await asyncio.to_thread(result_cache.put, key, result)
+
+
+async def _run_analysis(fn, *args, **kwargs):
+    # 이벤트 루프를 막지 않도록 pool에서 실행. (결과, 에러 응답) 중 하나를 돌려준다
+    try:
+        return await analysis_pool.run(fn, *args, **kwargs), None
+    except PoolSaturated as e:
+        return None, FastJSONResponse({'error': str(e)}, status_code=503, headers={'Retry-After': '1'})
+    except AnalysisTimeout as e:
+        return None, FastJSONResponse({'error': str(e)}, status_code=504)
     except Exception as e:
-        return JSONResponse({'error': str(e)}, status_code=500)
+        return None, FastJSONResponse({'error': str(e)}, status_code=500)
+
+
+async def _run_timed(source, fn, *args, **kwargs):
+    # fn(..., timer=)을 pool에서 실행하고 단계별 시간을 메트릭에 반영. (결과, StageTimer, 에러 응답)
+    # defer=True로 실행한 분석은 pool 자리를 비운 뒤 여기(이벤트 루프)서 배치 예측을 기다린다
+    out, error = await _run_analysis(run_timed, fn, *args, **kwargs)
+    if error is not None:
+        errors.inc(source=source, kind=_ERROR_KINDS.get(error.status_code, 'exception'))
+        return None, None, error
+    result, state = out
+    timer = StageTimer.from_state(state)
+    await resolve_prediction(result, timer)
+    ml = result.get('ml') if isinstance(result, dict) else None
+    if isinstance(ml, dict) and 'error' in ml:
+        errors.inc(source=source, kind='predict')
+    return result, record_stages(timer), None
+
+
+def _add_debug_timings(result, *timers):
+    # debug 응답의 _debug.timings_ms에 분석 함수 밖(요청 파싱, 캐시 조회 등)에서 잰 단계도 추가
+    debug_info = (result.get('ml') or {}).get('_debug')
+    if isinstance(debug_info, dict):
+        for timer in timers:
+            debug_info.setdefault('timings_ms', {}).update(timer.ms())
+
+
+def _timed_task(stage, fn, *args):
+    # 응답 이후 실행되는 작업(원본 저장 등)의 시간도 단계별 메트릭으로 남긴다
+    start = time.perf_counter()
+    try:
+        fn(*args)
+    finally:
+        stage_latency.observe(time.perf_counter() - start, stage=stage)
+
+
+def _persist(background_tasks, source, columns, result, name=None, content=None):
+    # 분석한 세션을 응답 이후 저장. content가 있으면(uploads 모드) 업로드 원본 bytes를 그대로 쓴다
+    if session_store is not None:
+        background_tasks.add_task(_timed_task, 'persist', session_store.append, columns, result, source, name)
+    elif SESSION_PERSIST == 'uploads':
+        upload_path = WORKDIR / 'uploads'
+        upload_path.mkdir(exist_ok=True)
+        if content is not None:
+            background_tasks.add_task(_timed_task, 'persist', (upload_path / name).write_bytes, content)
+        else:
+            filename = f'strokes_{int(time.time() * 1000)}.csv'
+            background_tasks.add_task(_timed_task, 'persist', write_strokes_csv, upload_path / filename, columns)
+
+
+def _parse_records(records, timer=None):
+    with (timer or StageTimer()).stage('parse'):
+        return records_to_columns(records)
+
+
+@app.post('/analyze')
+async def analyze_endpoint(background_tasks: BackgroundTasks, file: UploadFile = File(...), strokes: bool = True):
+    # 응답의 'strokes': 획 세그먼트 인덱스(start/end 샘플)와 획별 통계. ?strokes=false면 생략
+    req_timer = StageTimer()
+    with req_timer.stage('upload_read'):
+        content = await file.read()
+    columns, _, error = await _run_timed('analyze', read_columns, content)
+    if error is not None:
+        return error
+
+    # 같은 샘플 + 같은 모델이면 다시 분석하지 않고, 세션을 또 저장하지도 않는다
+    with req_timer.stage('cache_lookup'):
+        key, cached = await _cache_lookup(columns, debug=False, strokes=strokes)
+    record_stages(req_timer)
+    if cached is not None:
+        return FastJSONResponse(cached, headers={'X-Cache': 'hit'})
+
+    result, timer, error = await _run_timed('analyze', analyze_columns, columns, strokes=strokes, defer=True)
+    if error is not None:
+        return error
+    record_analysis('analyze', timer.samples)
+    await _cache_store(key, result)
+
+    # 저장 (파일 이름은 index의 name으로만 남기므로 같은 이름의 업로드가 서로 덮어쓰지 않음)
+    _persist(background_tasks, 'analyze', columns, result, name=file.filename, content=content)
+
+    return FastJSONResponse(result, headers={'X-Cache': 'miss'}, background=background_tasks)
 
-    return JSONResponse(result)
+
+def _truthy(v):
+    return str(v).lower() in ('1', 'true', 'yes')
 
 
 @app.post('/analyze_strokes')
-async def analyze_strokes(payload: dict):
-    # payload should be { "records": [ {timestamp_ms, x, y, pressure, button}, ... ], "debug": true }
-    records = payload.get('records') if isinstance(payload, dict) else None
-    debug = bool(payload.get('debug', False)) if isinstance(payload, dict) else False
-    if not records or not isinstance(records, list):
-        return JSONResponse({'error': 'No records provided'}, status_code=400)
-
-    upload_path = WORKDIR / 'uploads'
-    upload_path.mkdir(exist_ok=True)
-    filename = f'strokes_{int(time.time() * 1000)}.csv'
-    file_path = upload_path / filename
-
-    # write CSV with expected column names for analyze()
-    with open(file_path, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        writer.writerow(['시간', 'X', 'Y', '압력_NORMAL', '버튼'])
-        for r in records:
+async def analyze_strokes(request: Request, background_tasks: BackgroundTasks):
+    # 입력 형식 (Content-Type으로 구분)
+    # - application/json 행 형식: { "records": [ {timestamp_ms, x, y, pressure, button}, ... ], "debug": true }
+    # - application/json 컬럼 형식: { "records": {"t": [...], "x": [...], "y": [...], "pressure": [...], "button": [...]} }
+    #   (또는 "records" 없이 최상위에 "t", "x", ...)
+    # - application/x-strokes: stroke_codec.decode_binary 형식, debug는 ?debug=1
+    content_type = request.headers.get('content-type', '').split(';')[0].strip().lower()
+    req_timer = StageTimer()
+    if content_type in (BINARY_CONTENT_TYPE, 'application/octet-stream'):
+        debug = _truthy(request.query_params.get('debug', ''))
+        try:
+            with req_timer.stage('decode'):
+                columns = decode_binary(await request.body())
+        except ValueError as e:
+            return FastJSONResponse({'error': str(e)}, status_code=400)
+        records = None
+    else:
+        try:
+            with req_timer.stage('decode'):
+                payload = loads(await request.body())
+        except Exception:
+            return FastJSONResponse({'error': 'Invalid JSON body'}, status_code=400)
+        if not isinstance(payload, dict):
+            return FastJSONResponse({'error': 'No records provided'}, status_code=400)
+        records = payload.get('records')
+        if records is None and is_columnar(payload):
+            records = payload
+        debug = bool(payload.get('debug', False)) or _truthy(request.query_params.get('debug', ''))
+        if isinstance(records, dict):
             try:
-                if isinstance(r, (list, tuple)):
-                    t, x, y, pressure, button = r
-                elif isinstance(r, dict):
-                    t = r.get('timestamp_ms') or r.get('t') or r.get('시간')
-                    x = r.get('x')
-                    y = r.get('y')
-                    pressure = r.get('pressure') or r.get('압력') or r.get('압력_NORMAL')
-                    button = r.get('button') or r.get('버튼')
-                else:
-                    continue
-                writer.writerow([t, x, y, pressure, button])
-            except Exception:
-                # skip malformed rows
+                with req_timer.stage('decode'):
+                    columns = json_columns_to_columns(records)
+            except (TypeError, ValueError) as e:
+                return FastJSONResponse({'error': str(e)}, status_code=400)
+            records = None
+        elif not records or not isinstance(records, list):
+            return FastJSONResponse({'error': 'No records provided'}, status_code=400)
+
+    # CSV로 쓰고 다시 읽지 않고 컬럼 배열로 바로 분석
+    parse_timer = None
+    if records is not None:
+        columns, parse_timer, error = await _run_timed('analyze_strokes', _parse_records, records)
+        if error is not None:
+            return error
+    if len(columns[TIME_COL]) == 0:
+        return FastJSONResponse({'error': 'No records provided'}, status_code=400)
+
+    # 재시도로 같은 세션이 다시 오면 캐시된 결과를 돌려주고 저장도 건너뛴다
+    with req_timer.stage('cache_lookup'):
+        key, cached = await _cache_lookup(columns, debug)
+    record_stages(req_timer)
+    if cached is not None:
+        return FastJSONResponse(cached, headers={'X-Cache': 'hit'})
+
+    result, timer, error = await _run_timed('analyze_strokes', analyze_columns, columns, debug=debug, defer=True)
+    if error is not None:
+        return error
+    record_analysis('analyze_strokes', timer.samples)
+    if debug:
+        _add_debug_timings(result, req_timer, *([parse_timer] if parse_timer is not None else []))
+    await _cache_store(key, result)
+
+    if PERSIST_STROKES:
+        _persist(background_tasks, 'analyze_strokes', columns, result)
+
+    return FastJSONResponse(result, headers={'X-Cache': 'miss'}, background=background_tasks)
+
+
+# /analyze_batch: 한 요청의 최대 세션 수, predict_proba 한 번에 넣는 최대 세션 수
+BATCH_MAX_SESSIONS = int(os.environ.get('BATCH_MAX_SESSIONS', '1000'))
+BATCH_PREDICT_MAX = int(os.environ.get('BATCH_PREDICT_MAX', '256'))
+NDJSON_CONTENT_TYPE = 'application/x-ndjson'
+
+
+async def _batch_sessions(request):
+    # -> ([(세션 이름, 'csv' 또는 'json', 데이터)], 에러 응답)
+    content_type = request.headers.get('content-type', '').split(';')[0].strip().lower()
+    if content_type == 'multipart/form-data':
+        # 필드 이름과 상관없이 모든 파일 (보통 files=...)
+        form = await request.form(max_files=BATCH_MAX_SESSIONS + 1)
+        sessions = [(value.filename or key, 'csv', await value.read())
+                    for key, value in form.multi_items() if not isinstance(value, str)]
+    else:
+        try:
+            payload = loads(await request.body())
+        except Exception:
+            return None, FastJSONResponse({'error': 'Invalid JSON body'}, status_code=400)
+        items = payload.get('sessions') if isinstance(payload, dict) else payload
+        if not isinstance(items, list):
+            return None, FastJSONResponse({'error': 'No sessions provided'}, status_code=400)
+        sessions = [((s.get('id') if isinstance(s, dict) else None) or str(i), 'json', s)
+                    for i, s in enumerate(items)]
+    if not sessions:
+        return None, FastJSONResponse({'error': 'No sessions provided'}, status_code=400)
+    if len(sessions) > BATCH_MAX_SESSIONS:
+        return None, FastJSONResponse({'error': f'too many sessions: {len(sessions)} > {BATCH_MAX_SESSIONS}'},
+                                      status_code=413)
+    return sessions, None
+
+
+def _error_line(head, error):
+    # 에러 응답(FastJSONResponse) -> NDJSON 한 줄의 내용
+    return {**head, 'status_code': error.status_code, 'error': loads(error.body).get('error')}
+
+
+async def _batch_prepare(index, name, kind, data):
+    # 세션 하나: 컬럼 배열 -> 캐시 조회 -> feature. 예측은 _score_batch에서 모아서 한 번에
+    # -> ('error'|'cached'|'features', NDJSON 줄의 앞부분, 캐시 키, 컬럼, 결과 또는 feature)
+    head = {'index': index, 'id': name}
+    if kind == 'csv':
+        columns, _, error = await _run_timed('analyze_batch', read_columns, data)
+    else:
+        # 세션마다 /analyze_strokes의 JSON 형식 ({"records": [...]}, {"records": {"t": [...], ...}}, 또는 최상위에 "t", ...)
+        records = data.get('records') if isinstance(data, dict) else None
+        if records is None and is_columnar(data):
+            records = data
+        error = None
+        if isinstance(records, dict):
+            try:
+                columns = json_columns_to_columns(records)
+            except (TypeError, ValueError) as e:
+                return 'error', {**head, 'status_code': 400, 'error': str(e)}, None, None, None
+        elif records and isinstance(records, list):
+            columns, _, error = await _run_timed('analyze_batch', _parse_records, records)
+        else:
+            columns = None
+    if error is not None:
+        return 'error', _error_line(head, error), None, None, None
+    if columns is None or len(columns.get(TIME_COL, ())) == 0:
+        return 'error', {**head, 'status_code': 400, 'error': 'No records provided'}, None, None, None
+
+    head['n_samples'] = len(columns[TIME_COL])
+    key, cached = await _cache_lookup(columns, False)
+    if cached is not None:
+        return 'cached', head, key, columns, cached
+    features, _, error = await _run_timed('analyze_batch', session_features, columns)
+    if error is not None:
+        return 'error', _error_line(head, error), None, None, None
+    return 'features', head, key, columns, features
+
+
+async def _score_batch(sessions, background_tasks):
+    # 세션별 feature 계산은 pool에서 병렬로 (한 요청이 pool을 다 차지하지 않도록 워커 수만큼만),
+    # 끝난 세션의 feature는 모아 두었다가 모두 끝나거나 BATCH_PREDICT_MAX개가 차면 predict_proba 한 번으로 채점.
+    # 결과는 끝나는 순서대로 한 줄씩 (index로 요청 순서를 알 수 있음), 마지막 줄은 요약
+    start = time.perf_counter()
+    limit = asyncio.Semaphore(analysis_pool.workers)
+    summary = {'done': True, 'sessions': len(sessions), 'scored': 0, 'cached': 0, 'errors': 0, 'predict_calls': 0}
+
+    async def prepare(index, item):
+        async with limit:
+            return await _batch_prepare(index, *item)
+
+    def emit(line):
+        return dumps(line) + b'\n'
+
+    async def flush(pending):
+        results, _, error = await _run_timed('analyze_batch', analyze_batch, [p[4] for p in pending])
+        summary['predict_calls'] += 1
+        for i, (_, head, key, columns, _) in enumerate(pending):
+            if error is not None:
+                summary['errors'] += 1
+                yield emit(_error_line(head, error))
                 continue
+            result = results[i]
+            record_analysis('analyze_batch', head['n_samples'])
+            if not _cacheable(result):
+                # 예측 에러(모델 예외 등)는 feature와 함께 그대로 돌려주되 캐시/저장하지 않고 에러로 센다
+                summary['errors'] += 1
+                yield emit({**head, **result})
+                continue
+            await _cache_store(key, result)
+            name, kind, content = sessions[head['index']]
+            if kind == 'csv' or PERSIST_STROKES:
+                _persist(background_tasks, 'analyze_batch', columns, result,
+                         name=name if kind == 'csv' else None, content=content if kind == 'csv' else None)
+            summary['scored'] += 1
+            yield emit({**head, **result})
 
+    tasks = [asyncio.create_task(prepare(i, item)) for i, item in enumerate(sessions)]
+    pending = []
     try:
-        result = analyze(str(file_path), debug=debug)
-    except Exception as e:
-        return JSONResponse({'error': str(e)}, status_code=500)
+        for remaining, done in zip(range(len(tasks) - 1, -1, -1), asyncio.as_completed(tasks)):
+            status, head, key, columns, out = await done
+            if status == 'error':
+                summary['errors'] += 1
+                yield emit(head)
+            elif status == 'cached':
+                summary['cached'] += 1
+                yield emit({**head, **out, 'cache': 'hit'})
+            else:
+                pending.append((status, head, key, columns, out))
+            if pending and (len(pending) >= BATCH_PREDICT_MAX or remaining == 0):
+                async for line in flush(pending):
+                    yield line
+                pending = []
+    finally:
+        # 클라이언트가 중간에 끊으면 남은 세션은 버린다
+        for task in tasks:
+            task.cancel()
+    summary['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 3)
+    yield emit(summary)
+
+
+@app.post('/analyze_batch')
+async def analyze_batch_endpoint(request: Request, background_tasks: BackgroundTasks):
+    # 여러 세션을 한 요청으로 채점. 응답은 NDJSON (세션마다 한 줄, 마지막 줄은 {"done": true, ...} 요약)
+    # - multipart/form-data: CSV 파일 여러 개 (/analyze와 같은 형식, 보통 files=...)
+    # - application/json: {"sessions": [{"id": "p1", "records": [...]}, ...]} 또는 세션 목록
+    #   (세션마다 /analyze_strokes의 행 형식 또는 컬럼 형식)
+    # 세션 줄: {"index": 요청 안의 순서, "id": 파일 이름/세션 id, "n_samples": ..., "preprocessing", "ml", "artifacts"}
+    #          실패한 세션은 {"index", "id", "status_code", "error"} (다른 세션은 계속 채점)
+    sessions, error = await _batch_sessions(request)
+    if error is not None:
+        return error
+    return StreamingResponse(_score_batch(sessions, background_tasks), media_type=NDJSON_CONTENT_TYPE,
+                             background=background_tasks)
+
+
+async def _send_json(websocket, data):
+    # websocket.send_json과 같은 text 메시지, 직렬화만 serialization.dumps로
+    await websocket.send_text(dumps(data).decode('utf-8'))
+
+
+def _online_features():
+    # 지금 모델(또는 FEATURE_BANK_*)에 feature bank가 있으면 bank 계산용으로 샘플도 모아 둔다
+    return OnlineFeatures(keep_samples=bool(snapshot_bank(default_registry.snapshot())))
+
+
+@app.websocket('/ws/strokes')
+async def stream_strokes(websocket: WebSocket):
+    # 포인터 샘플을 그리는 동안 보내면 feature를 샘플당 O(1)로 누적한다.
+    # {"type": "samples", "records": [...]}  -> 누적 ("ack": true 이면 {"type": "ack", "n": ...})
+    # {"type": "provisional", "debug": false} -> 지금까지의 중간 결과
+    # {"type": "end", "debug": false}         -> 최종 결과 후 다음 세션을 위해 초기화
+    # {"type": "reset"}                       -> 버리고 초기화
+    await websocket.accept()
+    online = _online_features()
+    try:
+        while True:
+            message = await websocket.receive()
+            if message['type'] == 'websocket.disconnect':
+                break
+            # JSON이 아닌 메시지는 연결을 끊지 않고 에러로 답한다
+            try:
+                msg = loads(message['text'] if message.get('text') is not None else message.get('bytes'))
+            except (TypeError, ValueError):
+                await _send_json(websocket, {'type': 'error', 'error': 'Invalid JSON message'})
+                continue
+            kind = msg.get('type', 'samples') if isinstance(msg, dict) else None
+            if kind == 'samples':
+                records = msg.get('records')
+                if not isinstance(records, list):
+                    await _send_json(websocket, {'type': 'error', 'error': 'No records provided'})
+                    continue
+                skipped = 0
+                for r in records:
+                    row = parse_sample(r)
+                    if row is None:
+                        skipped += 1
+                        continue
+                    online.add(*row)
+                if msg.get('ack'):
+                    await _send_json(websocket, {'type': 'ack', 'n': online.n, 'skipped': skipped})
+            elif kind in ('provisional', 'end'):
+                if online.n == 0:
+                    await _send_json(websocket, {'type': 'error', 'error': 'No records provided'})
+                    continue
+                start = time.perf_counter()
+                result, _, error = await _run_timed(
+                    'ws', analyze_streamed, online.result(), online.row0(), online.columns(),
+                    debug=bool(msg.get('debug', False)), defer=True)
+                http_latency.observe(time.perf_counter() - start, endpoint='/ws/strokes', method=kind)
+                if error is None and kind == 'end':
+                    record_analysis('ws', online.n)
+                if error is not None:
+                    await _send_json(websocket, {'type': 'error', 'status_code': error.status_code,
+                                                 'error': loads(error.body).get('error')})
+                else:
+                    await _send_json(websocket, {'type': 'result' if kind == 'end' else 'provisional',
+                                                 'n': online.n, **result})
+                if kind == 'end':
+                    online = _online_features()
+            elif kind == 'reset':
+                online = _online_features()
+            else:
+                await _send_json(websocket, {'type': 'error', 'error': f'unknown message type: {kind}'})
+    except WebSocketDisconnect:
+        pass
+
+
+@app.get('/status')
+async def status():
+    batcher = inference_batcher.default_batcher
+    return {'pool': analysis_pool.status(), 'model': default_registry.info(), 'cache': result_cache.status(),
+            'batcher': batcher.status() if batcher is not None else None,
+            'sessions': session_store.status() if session_store is not None else {'persist': SESSION_PERSIST}}
+
+
+@app.get('/ready')
+async def ready():
+    # 모든 워커의 warm-up 예측이 성공하기 전까지 503
+    state = readiness.status()
+    return FastJSONResponse(state, status_code=200 if state['ready'] else 503)
+
+
+@app.get('/metrics')
+async def metrics_endpoint():
+    # Prometheus text format
+    return PlainTextResponse(metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
 
-    return JSONResponse(result)
+@app.get('/model')
+async def model_info():
+    # 로드된 모델/스케일러와 컴파일된 feature 매핑 (0으로 채워지는 입력 포함)
+    default_registry.get()
+    return default_registry.info(include_plan=True)
 
 
 if __name__ == '__main__':
-    uvicorn.run('main:app', host='0.0.0.0', port=8000, reload=True)
+    # 실행 옵션(워커 수, --reload 등)은 serve.py 참고
+    import serve
+    serve.main()
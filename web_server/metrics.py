@@ -0,0 +1,336 @@
+import bisect
+import glob
+import json
+import math
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+# Prometheus text format(0.0.4) 메트릭. prometheus_client 없이 필요한 것(counter/gauge/histogram)만 구현
+# 요청 latency는 0.5ms ~ 30s 범위
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class StageTimer:
+    # 한 번의 분석에서 단계별 소요 시간(초, 같은 단계는 누적)과 이벤트 횟수, 샘플 수를 모은다.
+    # 프로세스 풀에서도 그대로 돌려받을 수 있도록 값은 dict/int만 쓴다
+
+    def __init__(self):
+        self.durations = {}
+        self.events = {}
+        self.samples = 0
+        # traced_peak()로 잰 최대 추가 할당량 (bytes, 재지 않았으면 None)
+        self.memory_peak = None
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name, seconds):
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+
+    def note(self, event, n=1):
+        self.events[event] = self.events.get(event, 0) + n
+
+    def ms(self):
+        return {name: round(seconds * 1000, 3) for name, seconds in self.durations.items()}
+
+    def state(self):
+        return {'durations': dict(self.durations), 'events': dict(self.events), 'samples': self.samples,
+                'memory_peak': self.memory_peak}
+
+    @classmethod
+    def from_state(cls, state):
+        timer = cls()
+        timer.durations = dict(state['durations'])
+        timer.events = dict(state['events'])
+        timer.samples = state['samples']
+        timer.memory_peak = state.get('memory_peak')
+        return timer
+
+
+# tracemalloc은 프로세스 전역이라 측정 구간끼리 겹치면 서로의 할당이 섞인다: 측정하는 동안은 한 번에 하나씩
+_trace_lock = threading.RLock()
+_trace_depth = 0
+
+
+@contextmanager
+def traced_peak(timer, enabled=True):
+    # 구간 안에서 새로 할당된 메모리의 최대치(시작 시점 대비, bytes)를 timer.memory_peak에 기록.
+    # NumPy 배열 버퍼도 tracemalloc에 잡힌다. 측정 중에는 모든 할당이 느려지고 측정 구간이 직렬화되므로 측정용 설정
+    global _trace_depth
+    if not enabled:
+        yield
+        return
+    with _trace_lock:
+        if _trace_depth:
+            # 이미 바깥 구간에서 재는 중 (analyze -> analyze_columns)
+            yield
+            return
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        _trace_depth += 1
+        try:
+            yield
+        finally:
+            _trace_depth -= 1
+            timer.memory_peak = tracemalloc.get_traced_memory()[1] - base
+            if started:
+                tracemalloc.stop()
+
+
+def run_timed(fn, *args, **kwargs):
+    # pool에서 실행: fn(..., timer=timer) -> (결과, timer 상태). 스레드/프로세스 풀 모두에서 측정값을 돌려받기 위함
+    timer = StageTimer()
+    result = fn(*args, timer=timer, **kwargs)
+    return result, timer.state()
+
+
+def _escape(v):
+    return str(v).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(keys, values, extra=None):
+    pairs = list(zip(keys, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+
+def _fmt(v):
+    if v == math.inf:
+        return '+Inf'
+    if isinstance(v, float) and v.is_integer() and abs(v) < 1e15:
+        return str(int(v))
+    return repr(v) if isinstance(v, float) else str(v)
+
+
+class _Metric:
+    # callback을 주면 값을 직접 쌓지 않고 렌더링 시점에 callback()이 돌려준 {label tuple: 값}을 쓴다
+    # (pool/캐시/registry처럼 이미 자체 집계가 있는 경우)
+
+    def __init__(self, name, help, labels=(), callback=None):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labels)
+        self.callback = callback
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(k, '')) for k in self.labelnames)
+
+    def samples(self):
+        if self.callback is not None:
+            values = self.callback()
+        else:
+            with self._lock:
+                values = dict(self._values)
+        return [(self.name, _labels(self.labelnames, k), v) for k, v in sorted(values.items())
+                if v is not None]
+
+
+class Counter(_Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    type = 'gauge'
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    type = 'histogram'
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels, None)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][bisect.bisect_left(self.buckets, value)] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def samples(self):
+        with self._lock:
+            items = sorted((k, ([*counts], total, n)) for k, (counts, total, n) in self._values.items())
+        out = []
+        for key, (counts, total, n) in items:
+            cumulative = 0
+            for bound, c in zip(self.buckets + (math.inf,), counts):
+                cumulative += c
+                out.append((self.name + '_bucket', _labels(self.labelnames, key, ('le', _fmt(float(bound)))), cumulative))
+            out.append((self.name + '_sum', _labels(self.labelnames, key), total))
+            out.append((self.name + '_count', _labels(self.labelnames, key), n))
+        return out
+
+
+class MetricsRegistry:
+    # serve.py 멀티 워커: 워커마다 자기 값을 directory/worker-<번호>.json에 주기적으로 남기고,
+    # /metrics를 받은 워커가 모든 워커 파일을 합쳐서(counter/histogram/gauge 모두 합계) 답한다.
+    # 다른 워커의 값은 최대 flush 간격만큼 늦다. 죽었다가 다시 뜬 워커는 같은 번호의 이전 파일에서
+    # counter/histogram 값을 이어받으므로 합계가 줄어들지 않는다 (Prometheus가 counter reset으로 보지 않음)
+
+    def __init__(self):
+        self._metrics = []
+        self._dir = None
+        self._worker = None
+        self._base = {}
+        self._flush_lock = threading.Lock()
+
+    def add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labels=(), callback=None):
+        return self.add(Counter(name, help, labels, callback))
+
+    def gauge(self, name, help, labels=(), callback=None):
+        return self.add(Gauge(name, help, labels, callback))
+
+    def histogram(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        return self.add(Histogram(name, help, labels, buckets))
+
+    def _path(self, worker):
+        return os.path.join(self._dir, f'worker-{worker}.json')
+
+    @staticmethod
+    def _read(path):
+        # {metric 이름: {(sample 이름, labels): 값}}. 없거나 쓰는 중인 파일은 빈 dict
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return {name: {(n, labels): v for n, labels, v in samples} for name, samples in data.items()}
+
+    def _own(self):
+        # 이 프로세스의 값 (+ 같은 번호의 이전 워커가 남긴 counter/histogram 값)
+        own = {}
+        for m in self._metrics:
+            values = {(name, labels): value for name, labels, value in m.samples()}
+            for key, value in self._base.get(m.name, {}).items():
+                values[key] = values.get(key, 0) + value
+            own[m.name] = values
+        return own
+
+    def enable_multiprocess(self, directory, worker, interval=1.0):
+        # 워커 프로세스에서 fork 후 호출 (serve.py)
+        self._dir = directory
+        self._worker = worker
+        kinds = {m.name: m.type for m in self._metrics}
+        previous = self._read(self._path(worker))
+        self._base = {name: values for name, values in previous.items() if kinds.get(name) in ('counter', 'histogram')}
+        self.flush()
+        thread = threading.Thread(target=self._flush_loop, args=(interval,), name='metrics-flush', daemon=True)
+        thread.start()
+
+    def _flush_loop(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self.flush()
+            except Exception:
+                pass
+
+    def flush(self):
+        if self._dir is None:
+            return
+        data = {name: [[n, labels, v] for (n, labels), v in values.items()] for name, values in self._own().items()}
+        path = self._path(self._worker)
+        tmp = f'{path}.{os.getpid()}.tmp'
+        with self._flush_lock:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp, path)
+
+    def _merged(self):
+        # 이 워커는 지금 값, 다른 워커는 마지막으로 남긴 파일
+        merged = self._own()
+        for path in glob.glob(os.path.join(self._dir, 'worker-*.json')):
+            if path == self._path(self._worker):
+                continue
+            for name, values in self._read(path).items():
+                if name not in merged:
+                    continue
+                target = merged[name]
+                for key, value in values.items():
+                    target[key] = target.get(key, 0) + value
+        return merged
+
+    def render(self):
+        merged = self._merged() if self._dir is not None else None
+        lines = []
+        for m in self._metrics:
+            lines.append(f'# HELP {m.name} {m.help}')
+            lines.append(f'# TYPE {m.name} {m.type}')
+            if merged is None:
+                samples = m.samples()
+            else:
+                samples = [(name, labels, value) for (name, labels), value in merged[m.name].items()]
+            for name, labels, value in samples:
+                lines.append(f'{name}{labels} {_fmt(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+metrics = MetricsRegistry()
+
+http_requests = metrics.counter('http_requests_total', 'HTTP requests by endpoint and status code',
+                                ('endpoint', 'method', 'status'))
+http_latency = metrics.histogram('http_request_duration_seconds', 'HTTP request latency by endpoint',
+                                 ('endpoint', 'method'))
+stage_latency = metrics.histogram('analysis_stage_duration_seconds', 'Time spent in each analysis stage',
+                                  ('stage',))
+analyses = metrics.counter('analysis_requests_total', 'Completed analyses by entry point', ('source',))
+samples = metrics.counter('analysis_samples_total', 'Pen samples analyzed by entry point', ('source',))
+analysis_events = metrics.counter('analysis_events_total', 'Notable events during analysis (e.g. CSV encoding fallback)',
+                                  ('event',))
+errors = metrics.counter('analysis_errors_total', 'Analysis failures by entry point and kind', ('source', 'kind'))
+# ANALYZE_TRACE_MEMORY=1일 때만 기록됨 (64KB ~ 4GB)
+memory_peak = metrics.histogram('analysis_memory_peak_bytes', 'Peak memory allocated during one analysis (tracemalloc)',
+                                buckets=tuple(float(1 << k) for k in range(16, 33, 2)))
+
+
+def record_stages(timer):
+    # 단계별 측정값(StageTimer 또는 state dict)을 전역 메트릭에 반영
+    if isinstance(timer, dict):
+        timer = StageTimer.from_state(timer)
+    for stage, seconds in timer.durations.items():
+        stage_latency.observe(seconds, stage=stage)
+    for event, n in timer.events.items():
+        analysis_events.inc(n, event=event)
+    if timer.memory_peak is not None:
+        memory_peak.observe(timer.memory_peak)
+    return timer
+
+
+def record_analysis(source, n_samples):
+    analyses.inc(source=source)
+    samples.inc(n_samples, source=source)
@@ -0,0 +1,365 @@
+import argparse
+import glob
+import hashlib
+import inspect
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import warnings
+
+import joblib
+import numpy as np
+
+import compiled_model
+from feature_plan import model_feature_names
+
+
+# 모델(+스케일러)을 한 번 검증/패치/정규화해서 버전이 붙은 아티팩트 디렉토리로 저장한다.
+# (patch_simpleimputer*.py, 서버 시작 시 모든 *.joblib* 후보를 경고를 끄고 시도하던 방식을 대체)
+#   python model_artifact.py build ../BernoulliNB_best.joblib --scaler ../displacement_scaler.joblib5
+#   python model_artifact.py verify ../artifacts/BernoulliNB_best-1a2b3c4d5e6f
+#   python model_artifact.py list
+#
+# <root>/artifacts/<모델 이름>-<버전>/
+#   manifest.json   형식 버전, sklearn/numpy 버전, feature 이름, 입력 차원, 파일별 sha256, 적용한 패치
+#   model.joblib    비압축 joblib (joblib.load(mmap_mode='r')로 배열을 메모리 매핑)
+#   scaler.joblib   (있을 때만)
+#   model.npz       sklearn 없이 채점하는 compiled_model 형식 (컴파일 가능한 파이프라인일 때만, MODEL_COMPILED=1)
+# 서버(model_registry)는 manifest 검증을 통과한 아티팩트만 로드한다 (MODEL_ARTIFACTS 참고).
+FORMAT_VERSION = 1
+MANIFEST = 'manifest.json'
+ROOT_NAME = 'artifacts'
+
+
+class ArtifactError(ValueError):
+    pass
+
+
+def _sklearn_version():
+    import sklearn
+    return sklearn.__version__
+
+
+def _load(path, mmap_mode=None):
+    # 버전 불일치 경고는 버리지 않고 manifest에 남긴다 (메시지 첫 줄만)
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        try:
+            obj = joblib.load(path, mmap_mode=mmap_mode)
+        except Exception as e:
+            raise ArtifactError(f"로드 실패: {path} -> {type(e).__name__}: {str(e).splitlines()[0] if str(e) else ''}")
+    return obj, sorted({f'{w.category.__name__}: {str(w.message).splitlines()[0]}' for w in caught})
+
+
+def _walk(est, path):
+    # 추정기 트리를 구조대로 순회 (Pipeline / ColumnTransformer / FeatureUnion)
+    yield path, est
+    children = []
+    if hasattr(est, 'steps'):
+        children = [(name, step) for name, step in est.steps]
+    elif hasattr(est, 'transformers'):
+        # 학습된 복제본(transformers_)과 get_params가 읽는 원본(transformers) 모두
+        children = [(name, t) for name, t, _ in est.transformers]
+        children += [(f'{name}(fitted)', t) for name, t, _ in getattr(est, 'transformers_', [])]
+    elif hasattr(est, 'transformer_list'):
+        children = list(est.transformer_list)
+    for name, child in children:
+        if child is None or isinstance(child, str):
+            continue
+        yield from _walk(child, f'{path}/{name}')
+
+
+def _missing_params(est):
+    # 학습 당시 sklearn에는 없던 생성자 파라미터 (예: Pipeline.transform_input) -> 기본값
+    try:
+        signature = inspect.signature(type(est).__init__)
+    except (TypeError, ValueError):
+        return {}
+    missing = {}
+    for name, p in signature.parameters.items():
+        if name == 'self' or p.kind in (p.VAR_POSITIONAL, p.VAR_KEYWORD):
+            continue
+        if name not in vars(est) and p.default is not p.empty:
+            missing[name] = p.default
+    return missing
+
+
+def patch_estimator(model):
+    # 현재 sklearn에서 추론/get_params가 동작하도록 빠진 속성만 채운다. 적용한 패치 목록을 돌려준다
+    from sklearn.impute import SimpleImputer
+
+    patches = []
+    for path, est in _walk(model, type(model).__name__):
+        if not hasattr(est, 'get_params'):
+            continue
+        for name, default in _missing_params(est).items():
+            setattr(est, name, default)
+            patches.append(f'{path}: {name}={default!r}')
+        if isinstance(est, SimpleImputer) and '_fill_dtype' not in vars(est):
+            stats = getattr(est, 'statistics_', None)
+            dtype = stats.dtype if isinstance(stats, np.ndarray) else np.dtype('float64')
+            est._fill_dtype = dtype
+            patches.append(f'{path}: _fill_dtype={dtype}')
+    return patches
+
+
+def _probe_input(model, feature_names):
+    # analysis_runner.model_input()과 같은 형태의 0 입력 한 행
+    X = np.zeros((1, len(feature_names)))
+    if hasattr(model, 'named_steps'):
+        import pandas as pd
+        return pd.DataFrame(X, columns=feature_names)
+    return X
+
+
+def validate(model, scaler=None):
+    # 서버가 실제로 하는 호출(get_params, predict, predict_proba, scaler.transform)을 한 번씩 해 본다
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        return _validate(model, scaler)
+
+
+def _validate(model, scaler):
+    try:
+        model.get_params(deep=True)
+    except Exception as e:
+        raise ArtifactError(f"모델 파라미터를 읽을 수 없습니다: {e}")
+    feature_names = model_feature_names(model)
+    if not feature_names:
+        raise ArtifactError("모델에 입력 feature 정보(feature_names_in_/n_features_in_)가 없습니다")
+    X = _probe_input(model, feature_names)
+    try:
+        pred = np.asarray(model.predict(X))
+    except Exception as e:
+        raise ArtifactError(f"모델 predict 실패: {e}")
+    if pred.shape[:1] != (1,):
+        raise ArtifactError(f"predict 출력 형태가 이상합니다: {pred.shape}")
+    classes = getattr(model, 'classes_', None)
+    if hasattr(model, 'predict_proba'):
+        try:
+            proba = np.asarray(model.predict_proba(X))
+        except Exception as e:
+            raise ArtifactError(f"모델 predict_proba 실패: {e}")
+        if classes is not None and proba.shape != (1, len(classes)):
+            raise ArtifactError(f"predict_proba 출력 형태가 classes_와 다릅니다: {proba.shape}")
+
+    info = {
+        'type': type(model).__name__,
+        'steps': [f'{name}:{type(step).__name__}' for name, step in getattr(model, 'steps', [])],
+        'feature_names': [str(f) for f in feature_names],
+        'n_features_in': len(feature_names),
+        'classes': [c.item() if hasattr(c, 'item') else c for c in classes] if classes is not None else None,
+        'pipeline': hasattr(model, 'named_steps'),
+    }
+    if scaler is not None:
+        n = getattr(scaler, 'n_features_in_', None)
+        if not hasattr(scaler, 'transform') or n is None:
+            raise ArtifactError("스케일러에 transform/n_features_in_이 없습니다")
+        try:
+            scaler.transform(np.zeros((1, n)))
+        except Exception as e:
+            raise ArtifactError(f"스케일러 transform 실패: {e}")
+        if not info['pipeline'] and n != info['n_features_in']:
+            # 파이프라인이 아닌 모델은 외부 스케일러를 거쳐 예측하므로 차원이 같아야 한다
+            raise ArtifactError(f"스케일러 입력 차원({n})과 모델 입력 차원({info['n_features_in']})이 다릅니다")
+        info['scaler'] = {'type': type(scaler).__name__, 'n_features_in': int(n)}
+    return info
+
+
+def build(model_path, scaler_path=None, out_root=None, name=None):
+    # 새 아티팩트 디렉토리 경로를 돌려준다. 같은 내용의 아티팩트가 이미 있으면 그 경로
+    from model_registry import file_sha256
+
+    model, model_warnings = _load(model_path)
+    scaler, scaler_warnings = _load(scaler_path) if scaler_path else (None, [])
+    patches = patch_estimator(model)
+    if scaler is not None:
+        patches += patch_estimator(scaler)
+    info = validate(model, scaler)
+
+    out_root = out_root or os.path.join(os.path.dirname(os.path.abspath(model_path)), ROOT_NAME)
+    os.makedirs(out_root, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix='.build-', dir=out_root)
+    try:
+        files = {'model': 'model.joblib'}
+        joblib.dump(model, os.path.join(tmp, 'model.joblib'))
+        if scaler is not None:
+            files['scaler'] = 'scaler.joblib'
+            joblib.dump(scaler, os.path.join(tmp, 'scaler.joblib'))
+        checksums = {kind: file_sha256(os.path.join(tmp, fn)) for kind, fn in files.items()}
+        # 버전: 원본 파일 + 빌드 환경으로 결정 (pickle 바이트는 같은 객체라도 실행마다 조금씩 다를 수 있음)
+        sources = [file_sha256(model_path), file_sha256(scaler_path) if scaler_path else '',
+                   _sklearn_version(), str(FORMAT_VERSION)]
+        version = hashlib.sha256('\n'.join(sources).encode()).hexdigest()[:12]
+        try:
+            arrays = compiled_model.compile_pipeline(model)
+        except ValueError:
+            arrays = None
+        if arrays is not None:
+            files['compiled'] = 'model.npz'
+            arrays['source_sha256'] = np.array(checksums['model'])
+            arrays['source_name'] = np.array(files['model'])
+            np.savez(os.path.join(tmp, files['compiled']), **arrays)
+            checksums['compiled'] = file_sha256(os.path.join(tmp, files['compiled']))
+        name = name or os.path.basename(model_path).split('.')[0]
+        final = os.path.join(out_root, f'{name}-{version}')
+
+        manifest = {
+            'format_version': FORMAT_VERSION,
+            'name': name,
+            'version': version,
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'sklearn_version': _sklearn_version(),
+            'numpy_version': np.__version__,
+            'python_version': platform.python_version(),
+            'feature_names': info['feature_names'],
+            'n_features_in': info['n_features_in'],
+            'model': {'file': files['model'], 'sha256': checksums['model'], 'type': info['type'],
+                      'steps': info['steps'], 'classes': info['classes'], 'pipeline': info['pipeline'],
+                      'source': os.path.abspath(model_path), 'source_sha256': sources[0]},
+            'scaler': None,
+            'compiled': ({'file': files['compiled'], 'sha256': checksums['compiled'],
+                          'format_version': compiled_model.FORMAT_VERSION} if 'compiled' in files else None),
+            'patches': patches,
+            'load_warnings': model_warnings + scaler_warnings,
+        }
+        if scaler is not None:
+            manifest['scaler'] = dict(info['scaler'], file=files['scaler'], sha256=checksums['scaler'],
+                                      source=os.path.abspath(scaler_path), source_sha256=sources[1])
+        with open(os.path.join(tmp, MANIFEST), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False)
+            f.write('\n')
+        if os.path.exists(final):
+            return final
+        os.chmod(tmp, 0o755)
+        os.replace(tmp, final)
+        return final
+    finally:
+        if os.path.exists(tmp):
+            shutil.rmtree(tmp)
+
+
+def read_manifest(artifact_dir):
+    try:
+        with open(os.path.join(artifact_dir, MANIFEST), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        raise ArtifactError(f"manifest를 읽을 수 없습니다: {e}")
+
+
+def verify(artifact_dir, manifest=None):
+    # 로드 전 검사: 형식 버전, sklearn 버전, 파일 sha256. 문제가 있으면 ArtifactError
+    from model_registry import file_sha256
+
+    manifest = manifest or read_manifest(artifact_dir)
+    if manifest.get('format_version') != FORMAT_VERSION:
+        raise ArtifactError(f"지원하지 않는 아티팩트 형식: {manifest.get('format_version')}")
+    if manifest.get('sklearn_version') != _sklearn_version():
+        raise ArtifactError(f"sklearn 버전이 다릅니다: 아티팩트 {manifest.get('sklearn_version')}, "
+                            f"설치됨 {_sklearn_version()} (이 환경에서 다시 build 필요)")
+    for kind in ('model', 'scaler', 'compiled'):
+        entry = manifest.get(kind)
+        if entry is None:
+            if kind == 'model':
+                raise ArtifactError("manifest에 model 항목이 없습니다")
+            continue
+        path = os.path.join(artifact_dir, entry['file'])
+        if not os.path.isfile(path):
+            raise ArtifactError(f"{kind} 파일이 없습니다: {path}")
+        if file_sha256(path) != entry['sha256']:
+            raise ArtifactError(f"{kind} 파일 checksum이 manifest와 다릅니다: {path}")
+    return manifest
+
+
+def load(artifact_dir, mmap_mode='r', compiled=False):
+    # (manifest, model, scaler). 배열은 메모리 매핑 (워커 프로세스끼리 페이지 캐시 공유).
+    # compiled=True이고 아티팩트에 model.npz가 있으면 sklearn 파이프라인 대신 compiled_model 채점기
+    manifest = verify(artifact_dir)
+    if compiled and manifest.get('compiled'):
+        model = compiled_model.load(os.path.join(artifact_dir, manifest['compiled']['file']))
+    else:
+        model, _ = _load(os.path.join(artifact_dir, manifest['model']['file']), mmap_mode)
+    scaler = None
+    if manifest.get('scaler'):
+        scaler, _ = _load(os.path.join(artifact_dir, manifest['scaler']['file']), mmap_mode)
+    names = [str(f) for f in model_feature_names(model) or []]
+    if names != manifest['feature_names'] or len(names) != manifest['n_features_in']:
+        raise ArtifactError("모델 입력 feature가 manifest와 다릅니다")
+    return manifest, model, scaler
+
+
+def artifact_roots(start=None):
+    # MODEL_ARTIFACT_DIR가 있으면 그것만, 없으면 start(기본 CWD)부터 위로 올라가며 artifacts/
+    root = os.environ.get('MODEL_ARTIFACT_DIR')
+    if root:
+        return [os.path.abspath(root)]
+    from model_registry import _search_roots
+    return [os.path.join(r, ROOT_NAME) for r in _search_roots(start)]
+
+
+def roots_signature(start=None):
+    # 아티팩트 루트들의 mtime (없으면 None). build는 임시 디렉토리를 rename해서 넣으므로 새 아티팩트가 생기면 바뀐다
+    sig = []
+    for root in artifact_roots(start):
+        try:
+            sig.append(os.stat(root).st_mtime_ns)
+        except OSError:
+            sig.append(None)
+    return tuple(sig)
+
+
+def find_artifacts(start=None):
+    # manifest가 있는 아티팩트 디렉토리 목록 (가장 가까운 루트 먼저, 같은 루트 안에서는 최신 먼저)
+    found = []
+    for root in artifact_roots(start):
+        dirs = [os.path.dirname(p) for p in glob.glob(os.path.join(root, '*', MANIFEST))]
+        found.extend(sorted(dirs, key=lambda d: os.path.getmtime(os.path.join(d, MANIFEST)), reverse=True))
+    return found
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='모델/스케일러 아티팩트 빌드 및 검증')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p_build = sub.add_parser('build', help='모델(+스케일러)을 검증/패치해서 아티팩트로 저장')
+    p_build.add_argument('model', help='학습된 모델 (.joblib*)')
+    p_build.add_argument('--scaler', default=None, help='외부 스케일러 (.joblib*)')
+    p_build.add_argument('-o', '--output', default=None, help=f'아티팩트 루트 (기본: 모델 옆 {ROOT_NAME}/)')
+    p_build.add_argument('--name', default=None, help='아티팩트 이름 (기본: 모델 파일 이름)')
+    p_verify = sub.add_parser('verify', help='아티팩트 manifest/checksum 검증 + 로드')
+    p_verify.add_argument('artifact')
+    sub.add_parser('list', help='서버가 찾는 위치의 아티팩트와 검증 결과')
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == 'build':
+            path = build(args.model, args.scaler, args.output, args.name)
+            manifest = read_manifest(path)
+            print(f"저장: {path}")
+            for p in manifest['patches']:
+                print(f"  패치: {p}")
+            for w in manifest['load_warnings']:
+                print(f"  경고: {w}")
+            return 0
+        if args.command == 'verify':
+            manifest, _, _ = load(args.artifact)
+            print(f"OK: {manifest['name']}-{manifest['version']} (입력 {manifest['n_features_in']}개, "
+                  f"sklearn {manifest['sklearn_version']})")
+            return 0
+        for path in find_artifacts():
+            try:
+                verify(path)
+                print(f"OK    {path}")
+            except ArtifactError as e:
+                print(f"오류  {path}: {e}")
+        return 0
+    except ArtifactError as e:
+        print(f"오류: {e}", file=sys.stderr)
+        return 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
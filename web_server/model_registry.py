@@ -0,0 +1,416 @@
+import glob
+import hashlib
+import os
+import re
+import threading
+import time
+import warnings
+
+import joblib
+
+from feature_plan import compile_feature_plan
+import model_artifact
+
+
+# 우선순위: BernoulliNB > displacement > 기타 모델
+MODEL_PATTERNS = ['BernoulliNB*.joblib', 'displacement_prediction_model.joblib*', '*.joblib']
+# MODEL_COMPILED=1: compiled_model.py로 export한 NumPy 채점기(.npz)를 먼저 찾는다 (sklearn 파이프라인 대신)
+COMPILED_PATTERNS = ['BernoulliNB*.npz']
+SCALER_PATTERNS = ['displacement_scaler.joblib*']
+# 모델 로드 방식 (model_artifact.py로 빌드한 아티팩트)
+#   auto(기본): manifest 검증을 통과한 아티팩트가 있으면 그것만, 없으면 위 패턴으로 파일 검색
+#   required: 아티팩트만 (없으면 모델 없이 시작)   off: 파일 검색만
+ARTIFACT_MODES = ('auto', 'required', 'off')
+
+
+def _numeric_suffix(fn):
+    m = re.search(r"(\d+)(?!.*\d)", fn)
+    return int(m.group(1)) if m else -1
+
+
+def _search_roots(start=None):
+    # start(기본: CWD)부터 파일시스템 루트까지
+    cur = os.path.abspath(start or '.')
+    roots = []
+    while True:
+        roots.append(cur)
+        parent = os.path.dirname(cur)
+        if parent == cur:
+            break
+        cur = parent
+    return roots
+
+
+def find_candidates(patterns, start=None):
+    candidates = []
+    for r in _search_roots(start):
+        for p in patterns:
+            for f in glob.glob(os.path.join(r, p)):
+                if f not in candidates:
+                    candidates.append(f)
+    return candidates
+
+
+def find_model_candidates(start=None):
+    # sort candidates by numeric suffix if possible
+    candidates = sorted(find_candidates(MODEL_PATTERNS, start), key=_numeric_suffix, reverse=True)
+    if os.environ.get('MODEL_COMPILED', '0') == '1':
+        candidates = find_candidates(COMPILED_PATTERNS, start) + candidates
+    return candidates
+
+
+def find_scaler_candidates(start=None):
+    return find_candidates(SCALER_PATTERNS, start)
+
+
+def load_joblib(path):
+    # 버전 호환성 경고 무시하고 로드
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return joblib.load(path)
+
+
+def load_artifact(path):
+    # .npz는 컴파일된 채점기 (compiled_model), 나머지는 joblib
+    if path.endswith('.npz'):
+        import compiled_model
+        model = compiled_model.load(path)
+        check_source(model, path)
+        return model
+    return load_joblib(path)
+
+
+def check_source(model, path):
+    # 원본 .joblib이 옆에 있으면 export 당시의 sha256과 비교한다. 다르면 다시 학습한 뒤
+    # export를 안 한 것이므로 쓰지 않는다 (-> 다음 후보인 .joblib 파이프라인으로 대체)
+    source = source_path(model, path)
+    if source and os.path.exists(source) and file_sha256(source) != model.source_sha256:
+        raise ValueError(f"컴파일 모델이 원본과 다릅니다: {os.path.basename(source)}가 export 이후 바뀌었습니다 "
+                         f"(python compiled_model.py {os.path.basename(source)}로 다시 export)")
+
+
+def source_path(obj, path):
+    # 컴파일된 채점기(.npz)면 원본 .joblib 경로, 아니면 None
+    if not path.endswith('.npz'):
+        return None
+    import compiled_model
+    return compiled_model.source_path(obj, path)
+
+
+def file_signature(path):
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size)
+
+
+def optional_signature(path):
+    # 없는 파일은 None (원본 .joblib 없이 .npz만 배포한 경우)
+    try:
+        return file_signature(path)
+    except OSError:
+        return None
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+class Artifact:
+    # 로드된 모델/스케일러 한 개와 그 파일의 버전 정보
+
+    def __init__(self, obj, path, signature, sha256, plan=None, manifest=None, source=None,
+                 source_signature=None, preferred=None):
+        self.obj = obj
+        self.path = path
+        self.signature = signature
+        self.sha256 = sha256
+        # 모델인 경우: 입력 이름 -> feature 매핑 (로드 시 한 번 컴파일)
+        self.plan = plan
+        # 아티팩트에서 로드한 경우 그 manifest (파일은 바뀌지 않으므로 재로드 검사 안 함)
+        self.manifest = manifest
+        # 컴파일된 채점기(.npz)인 경우 원본 .joblib 경로와 그 (mtime, size).
+        # 원본만 다시 학습돼 바뀌어도 (.npz는 그대로) 재로드 검사가 알아챈다
+        self.source = source
+        self.source_signature = source_signature
+        # 원본과 달라진 .npz 대신 로드된 후보인 경우 (.npz 경로, 원본 경로, 그때의 두 시그니처).
+        # 다시 export되면 .npz로 돌아간다
+        self.preferred = preferred
+
+    @classmethod
+    def from_file(cls, obj, path, signature, sha256, plan=None, preferred=None):
+        source = source_path(obj, path)
+        return cls(obj, path, signature, sha256, plan, source=source,
+                   source_signature=optional_signature(source) if source else None, preferred=preferred)
+
+    def state(self):
+        # 재로드 검사에 쓰는 현재 파일 상태 (원본이 없으면 .npz/.joblib 자신의 시그니처만)
+        return file_signature(self.path), optional_signature(self.source) if self.source else None
+
+    @property
+    def version(self):
+        name = os.path.basename(self.path)
+        if self.manifest is not None:
+            name = f"{self.manifest['name']}-{self.manifest['version']}/{name}"
+        return f"{name}@{self.sha256[:12]}"
+
+    def info(self):
+        info = {'file': self.path, 'version': self.version, 'sha256': self.sha256}
+        if self.manifest is not None:
+            info['artifact'] = f"{self.manifest['name']}-{self.manifest['version']}"
+        return info
+
+
+class ModelSnapshot:
+    # 한 요청이 사용하는 (모델, 스케일러) 조합. 요청 도중 reload가 일어나도 바뀌지 않음
+
+    def __init__(self, model, scaler):
+        self._model = model
+        self._scaler = scaler
+
+    @property
+    def model(self):
+        return self._model.obj if self._model else None
+
+    @property
+    def model_file(self):
+        return self._model.path if self._model else None
+
+    @property
+    def model_version(self):
+        return self._model.version if self._model else None
+
+    @property
+    def plan(self):
+        return self._model.plan if self._model else None
+
+    @property
+    def scaler(self):
+        return self._scaler.obj if self._scaler else None
+
+    @property
+    def scaler_file(self):
+        return self._scaler.path if self._scaler else None
+
+    @property
+    def scaler_version(self):
+        return self._scaler.version if self._scaler else None
+
+    @property
+    def version(self):
+        return f"{self.model_version}+{self.scaler_version}"
+
+    def info(self):
+        return {
+            'model_file': self.model_file,
+            'model_version': self.model_version,
+            'scaler_file': self.scaler_file,
+            'scaler_version': self.scaler_version,
+        }
+
+
+class ModelRegistry:
+    # 모델/스케일러를 프로세스당 한 번만 찾고 로드해서 메모리에 유지한다.
+    # 요청마다 파일의 (mtime, size)만 확인하고, 바뀐 경우에만 sha256을 비교해 다시 로드한다.
+    # 새 파일 로드가 실패하면 이전 버전을 계속 사용한다.
+
+    def __init__(self, start_dir=None):
+        self.start_dir = start_dir
+        self._lock = threading.Lock()
+        self._model = None
+        self._scaler = None
+        self._loaded = False
+        self._failed = {}
+        self._mode = 'off'
+        self._roots_signature = None
+        self.load_events = []
+        self.load_counts = {}
+
+    def _record(self, kind, path, status, error=None, seconds=None):
+        self.load_events.append({'kind': kind, 'file': path, 'status': status, 'error': error,
+                                 'seconds': seconds, 'at': time.time()})
+        del self.load_events[:-50]
+        self.load_counts[(kind, status)] = self.load_counts.get((kind, status), 0) + 1
+
+    def _compile(self, kind, obj, path):
+        if kind != 'model':
+            return None
+        plan = compile_feature_plan(obj)
+        if plan is not None and plan.defaulted:
+            # 매핑되지 않아 항상 0으로 들어가는 입력은 요청마다가 아니라 로드 시 한 번 알린다
+            warnings.warn(f"{os.path.basename(path)}: {len(plan.defaulted)}개 입력이 feature에 매핑되지 않아 0으로 채워집니다: "
+                          f"{', '.join(plan.defaulted[:10])}{' ...' if len(plan.defaulted) > 10 else ''}")
+        return plan
+
+    def _load_first(self, kind, candidates):
+        load_errors = []
+        for cand in candidates:
+            start = time.perf_counter()
+            try:
+                sig = file_signature(cand)
+                obj = load_artifact(cand)
+                art = Artifact.from_file(obj, cand, sig, file_sha256(cand), self._compile(kind, obj, cand))
+                self._record(kind, cand, 'loaded', seconds=time.perf_counter() - start)
+                return art
+            except Exception as e:
+                load_errors.append((cand, str(e)))
+                self._record(kind, cand, 'failed', str(e), seconds=time.perf_counter() - start)
+        for f, e in load_errors:
+            warnings.warn(f"{kind} 로드 실패: {f} -> {e}")
+        return None
+
+    def _load_artifact(self, current=None):
+        # 검증을 통과한 첫 아티팩트 -> (model, scaler) Artifact. 없으면 None
+        # current: 이미 사용 중인 아티팩트 디렉토리. 그보다 앞에 검증되는 것이 없으면 None (다시 로드하지 않음)
+        compiled = os.environ.get('MODEL_COMPILED', '0') == '1'
+        for path in model_artifact.find_artifacts(self.start_dir):
+            if path == current:
+                return None
+            start = time.perf_counter()
+            try:
+                manifest, model, scaler = model_artifact.load(path, compiled=compiled)
+            except model_artifact.ArtifactError as e:
+                warnings.warn(f"아티팩트 검증 실패, 건너뜀: {path} -> {e}")
+                self._record('artifact', path, 'rejected', str(e), seconds=time.perf_counter() - start)
+                continue
+            entry = manifest['compiled'] if compiled and manifest.get('compiled') else manifest['model']
+            model_path = os.path.join(path, entry['file'])
+            model_art = Artifact(model, model_path, file_signature(model_path), entry['sha256'],
+                                 self._compile('model', model, model_path), manifest)
+            scaler_art = None
+            if scaler is not None:
+                scaler_path = os.path.join(path, manifest['scaler']['file'])
+                scaler_art = Artifact(scaler, scaler_path, file_signature(scaler_path), manifest['scaler']['sha256'],
+                                      manifest=manifest)
+            self._record('artifact', path, 'loaded', seconds=time.perf_counter() - start)
+            return model_art, scaler_art
+        return None
+
+    def load(self):
+        # 후보 탐색 + 로드 (FastAPI 시작 시 한 번)
+        mode = os.environ.get('MODEL_ARTIFACTS', 'auto')
+        if mode not in ARTIFACT_MODES:
+            raise ValueError(f"MODEL_ARTIFACTS는 {'/'.join(ARTIFACT_MODES)} 중 하나여야 합니다: {mode}")
+        with self._lock:
+            self._mode = mode
+            if mode != 'off':
+                self._roots_signature = model_artifact.roots_signature(self.start_dir)
+            loaded = self._load_artifact() if mode != 'off' else None
+            if loaded is not None:
+                self._model, self._scaler = loaded
+            elif mode == 'required':
+                warnings.warn("MODEL_ARTIFACTS=required: 검증된 아티팩트가 없어 모델 없이 시작합니다")
+                self._model = self._scaler = None
+            else:
+                self._model = self._load_first('model', find_model_candidates(self.start_dir))
+                self._scaler = self._load_first('scaler', find_scaler_candidates(self.start_dir))
+            self._loaded = True
+        return self.snapshot()
+
+    def _maybe_reload(self, kind, art):
+        if art is None or art.manifest is not None:
+            return art
+        if art.preferred is not None:
+            restored = self._maybe_restore(kind, art)
+            if restored is not None:
+                return restored
+        try:
+            sig, source_sig = state = art.state()
+        except OSError:
+            # 파일이 사라져도 메모리의 이전 버전은 유지
+            return art
+        if state == (art.signature, art.source_signature) or self._failed.get(art.path) == state:
+            return art
+        start = time.perf_counter()
+        try:
+            digest = file_sha256(art.path)
+            if digest == art.sha256:
+                if source_sig is not None and source_sig != art.source_signature:
+                    # .npz는 그대로이고 원본 .joblib이 바뀜 -> export 이후 다시 학습했는지 확인
+                    check_source(art.obj, art.path)
+                # 내용은 그대로(touch 등) -> 시그니처만 갱신
+                return Artifact(art.obj, art.path, sig, digest, art.plan, source=art.source,
+                                source_signature=source_sig, preferred=art.preferred)
+            obj = load_artifact(art.path)
+            plan = self._compile(kind, obj, art.path)
+            self._failed.pop(art.path, None)
+            self._record(kind, art.path, 'reloaded', seconds=time.perf_counter() - start)
+            return Artifact.from_file(obj, art.path, sig, digest, plan, preferred=art.preferred)
+        except Exception as e:
+            self._record(kind, art.path, 'failed', str(e), seconds=time.perf_counter() - start)
+            if art.source is not None:
+                # 원본과 달라진 컴파일 채점기는 계속 쓰지 않고 다음 후보(원본 .joblib 파이프라인)로 대체
+                fallback = self._load_first(kind, [c for c in find_model_candidates(self.start_dir)
+                                                   if c != art.path])
+                if fallback is not None:
+                    warnings.warn(f"{kind} 재로드 실패, {fallback.path}로 대체: {art.path} -> {e}")
+                    fallback.preferred = (art.path, art.source, state)
+                    return fallback
+            # 새 버전이 깨끗하게 로드될 때까지 이전 버전으로 서비스
+            warnings.warn(f"{kind} 재로드 실패, 이전 버전 유지: {art.path} -> {e}")
+            self._failed[art.path] = state
+            return art
+
+    def _maybe_restore(self, kind, art):
+        # 대체 중인 후보 -> .npz나 원본이 다시 바뀌었으면 (다시 export) .npz 로드를 시도
+        path, source, state = art.preferred
+        try:
+            current = file_signature(path), optional_signature(source)
+        except OSError:
+            return None
+        if current == state:
+            return None
+        start = time.perf_counter()
+        try:
+            obj = load_artifact(path)
+            restored = Artifact.from_file(obj, path, current[0], file_sha256(path), self._compile(kind, obj, path))
+        except Exception as e:
+            # 아직 원본과 다름 (export 전에 학습만 다시 함 등) -> 이 상태로는 다시 시도하지 않음
+            art.preferred = (path, source, current)
+            self._record(kind, path, 'failed', str(e), seconds=time.perf_counter() - start)
+            return None
+        self._record(kind, path, 'reloaded', seconds=time.perf_counter() - start)
+        return restored
+
+    def _maybe_rescan(self):
+        # 아티팩트 루트의 mtime이 바뀐 경우에만 (새 build) 다시 찾아서, 지금 것보다 앞서는 아티팩트면 바꾼다
+        sig = model_artifact.roots_signature(self.start_dir)
+        if sig == self._roots_signature:
+            return
+        self._roots_signature = sig
+        current = self._model.manifest is not None and os.path.dirname(self._model.path) if self._model else None
+        loaded = self._load_artifact(current or None)
+        if loaded is not None:
+            self._model, self._scaler = loaded
+
+    def get(self):
+        if not self._loaded:
+            return self.load()
+        with self._lock:
+            if self._mode != 'off':
+                self._maybe_rescan()
+            self._model = self._maybe_reload('model', self._model)
+            self._scaler = self._maybe_reload('scaler', self._scaler)
+            return ModelSnapshot(self._model, self._scaler)
+
+    def snapshot(self):
+        return ModelSnapshot(self._model, self._scaler)
+
+    def info(self, include_plan=False):
+        snap = self.snapshot()
+        info = {
+            'loaded': self._loaded,
+            'model': self._model.info() if self._model else None,
+            'scaler': self._scaler.info() if self._scaler else None,
+            'version': snap.version if self._loaded else None,
+            'load_events': list(self.load_events),
+        }
+        if include_plan:
+            plan = snap.plan
+            info['feature_plan'] = plan.describe() if plan is not None else None
+        return info
+
+
+default_registry = ModelRegistry()
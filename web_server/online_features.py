@@ -0,0 +1,292 @@
+import math
+
+import numpy as np
+
+from feature_engine import DERIVED_COLS, TIME_COL, X_COL, Y_COL, PRESSURE_COL, BUTTON_COL
+
+
+NAN = float('nan')
+ON, AIR, OTHER = 0, 1, 2
+
+
+def _state(b):
+    if b == 1:
+        return ON
+    if b == 0:
+        return AIR
+    return OTHER
+
+
+class _FillMean:
+    # SPEED/ACCELERATION/JERK: 상태별 유한값 합/개수와 비유한(NaN/inf) 개수.
+    # 배치 경로는 비유한 값을 전체 평균으로 채운 뒤 상태별 평균을 내므로
+    # 상태별 평균 = (유한값 합 + 비유한 개수 * 전체 평균) / 상태 샘플 수
+    __slots__ = ('sums', 'counts', 'missing')
+
+    def __init__(self):
+        self.sums = [0.0, 0.0, 0.0]
+        self.counts = [0, 0, 0]
+        self.missing = [0, 0, 0]
+
+    def add(self, state, v):
+        if math.isfinite(v):
+            self.sums[state] += v
+            self.counts[state] += 1
+        else:
+            self.missing[state] += 1
+
+    def fill_value(self):
+        n = sum(self.counts)
+        return sum(self.sums) / n if n else NAN
+
+    def add_block(self, masks, v):
+        # masks: 상태별 boolean 배열 (ON, AIR, OTHER)
+        finite = np.isfinite(v)
+        for state, mask in enumerate(masks):
+            ok = finite & mask
+            self.sums[state] += float(v[ok].sum())
+            self.counts[state] += int(np.count_nonzero(ok))
+            self.missing[state] += int(np.count_nonzero(mask)) - int(np.count_nonzero(ok))
+
+    def mean(self, state):
+        total = self.counts[state] + self.missing[state]
+        if total == 0:
+            return NAN
+        fill = self.fill_value()
+        if self.missing[state] and math.isnan(fill):
+            return NAN
+        s = self.sums[state] + (self.missing[state] * fill if self.missing[state] else 0.0)
+        return s / total
+
+
+class OnlineFeatures:
+    # preprocess_dataframe()의 feature를 샘플이 들어올 때마다 O(1)로 누적 계산한다.
+    # 합산 순서가 배치 경로(pairwise sum)와 달라 마지막 자리 반올림 오차 정도만 차이가 난다.
+    # keep_samples=True면 샘플도 모아 둔다: feature_bank(백분위수, 전체 평균으로 채운 신호)는 누적 계산이
+    # 안 되므로 columns()로 전체 배열을 만들어 계산한다 (bank가 필요할 때만)
+
+    def __init__(self, keep_samples=False):
+        self.n = 0
+        # (시간, X, Y, 압력, 버튼) 목록
+        self._samples = ([], [], [], [], []) if keep_samples else None
+        self._row0 = None
+        self._t0 = None
+        self._prev = None  # (time_diff, x, y, speed, acc, button)
+        self.total_time = NAN
+        self.max_x = NAN
+        self.max_y = NAN
+        self.speed = _FillMean()
+        self.acc = _FillMean()
+        self.jerk = _FillMean()
+        # 압력: Welford
+        self.p_n = 0
+        self.p_mean = 0.0
+        self.p_m2 = 0.0
+        # GMRT: 상태별 (샘플 수, 직전 반지름, |Δr| 합)
+        self.g_n = [0, 0, 0]
+        self.g_last = [NAN, NAN, NAN]
+        self.g_sum = [0.0, 0.0, 0.0]
+        self.time_counts = [0, 0, 0]
+        self.pendowns = 0
+        # 배치 경로처럼 버튼/압력 컬럼이 아예 없으면 해당 feature는 None (add_block에서만 해당)
+        self.has_button = True
+        self.has_pressure = True
+
+    def add(self, t, x, y, pressure=NAN, button=NAN):
+        # 값은 float (결측은 NaN). t는 int도 허용
+        if self._samples is not None:
+            for values, v in zip(self._samples, (t, x, y, pressure, button)):
+                values.append(v)
+        if self.n == 0:
+            self._t0 = t
+            self._row0 = {TIME_COL: t, X_COL: x, Y_COL: y, PRESSURE_COL: pressure, BUTTON_COL: button}
+        td = float(t - (self._t0 + 1))
+        state = _state(button)
+
+        prev = self._prev
+        if prev is None:
+            speed = acc = jerk = NAN
+        else:
+            ptd, px, py, pspeed, pacc, pb = prev
+            delta = td - ptd
+            if delta == 0:
+                delta = NAN
+            dx, dy = x - px, y - py
+            speed = math.sqrt(dx * dx + dy * dy) / delta
+            acc = (speed - pspeed) / delta
+            jerk = (acc - pacc) / delta
+            if button - pb == 1:
+                self.pendowns += 1
+        self.speed.add(state, speed)
+        self.acc.add(state, acc)
+        self.jerk.add(state, jerk)
+
+        if x > self.max_x or (math.isnan(self.max_x) and not math.isnan(x)):
+            self.max_x = x
+        if y > self.max_y or (math.isnan(self.max_y) and not math.isnan(y)):
+            self.max_y = y
+
+        if not math.isnan(pressure):
+            self.p_n += 1
+            d = pressure - self.p_mean
+            self.p_mean += d / self.p_n
+            self.p_m2 += d * (pressure - self.p_mean)
+
+        r = math.sqrt(x * x + y * y)
+        if self.g_n[state]:
+            diff = abs(r - self.g_last[state])
+            if not math.isnan(diff):
+                self.g_sum[state] += diff
+        self.g_n[state] += 1
+        self.g_last[state] = r
+
+        if not math.isnan(td):
+            self.time_counts[state] += 1
+        self.total_time = td
+        self._prev = (td, x, y, speed, acc, button)
+        self.n += 1
+
+    def add_block(self, t, x, y, pressure=None, button=None):
+        # 샘플 블록을 한 번에 누적 (add()를 샘플마다 부른 것과 같은 상태, 합산 순서만 다름).
+        # 블록 사이 경계 상태: 직전 샘플의 (TIME_DIFF, X, Y, SPEED, ACCELERATION, 버튼), 상태별 마지막 반지름
+        t = np.asarray(t)
+        n = len(t)
+        if n == 0:
+            return
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        if self._samples is not None:
+            for values, v in zip(self._samples, (t, x, y, pressure, button)):
+                values.extend([NAN] * n if v is None else np.asarray(v).tolist())
+        if self.n == 0:
+            self._t0 = t[0].item()
+            self._row0 = {TIME_COL: self._t0, X_COL: float(x[0]), Y_COL: float(y[0])}
+            if pressure is not None:
+                self._row0[PRESSURE_COL] = float(pressure[0])
+            if button is not None:
+                self._row0[BUTTON_COL] = float(button[0])
+        if pressure is None:
+            self.has_pressure = False
+            pressure = np.full(n, NAN)
+        if button is None:
+            self.has_button = False
+            button = np.full(n, NAN)
+        p = np.asarray(pressure, dtype=np.float64)
+        b = np.asarray(button, dtype=np.float64)
+        td = np.asarray(t - (self._t0 + 1), dtype=np.float64)
+        masks = (b == 1, b == 0, ~((b == 1) | (b == 0)))
+
+        # 미분: 직전 블록의 마지막 샘플을 앞에 붙여서 계산
+        prev = self._prev
+        if prev is None:
+            ptd, px, py, pspeed, pacc, pb = NAN, NAN, NAN, NAN, NAN, NAN
+        else:
+            ptd, px, py, pspeed, pacc, pb = prev
+        delta = np.diff(td, prepend=ptd)
+        delta[delta == 0] = NAN
+        dx = np.diff(x, prepend=px)
+        dy = np.diff(y, prepend=py)
+        speed = np.sqrt(dx * dx + dy * dy) / delta
+        acc = np.diff(speed, prepend=pspeed) / delta
+        jerk = np.diff(acc, prepend=pacc) / delta
+        self.speed.add_block(masks, speed)
+        self.acc.add_block(masks, acc)
+        self.jerk.add_block(masks, jerk)
+        self.pendowns += int(np.count_nonzero(np.diff(b, prepend=pb) == 1))
+
+        for v, attr in ((x, 'max_x'), (y, 'max_y')):
+            valid = v[~np.isnan(v)]
+            if valid.size:
+                m = float(valid.max())
+                cur = getattr(self, attr)
+                if math.isnan(cur) or m > cur:
+                    setattr(self, attr, m)
+
+        # 압력: 블록 평균/제곱편차합을 Welford 상태에 합침 (Chan et al.)
+        pv = p[~np.isnan(p)]
+        if pv.size:
+            nb = pv.size
+            mb = float(pv.mean())
+            m2b = float(((pv - mb) ** 2).sum())
+            na = self.p_n
+            d = mb - self.p_mean
+            self.p_n = na + nb
+            self.p_mean += d * nb / self.p_n
+            self.p_m2 += m2b + d * d * na * nb / self.p_n
+
+        r = np.sqrt(x * x + y * y)
+        td_valid = ~np.isnan(td)
+        for state, mask in enumerate(masks):
+            rs = r[mask]
+            if rs.size == 0:
+                continue
+            if self.g_n[state]:
+                diffs = np.abs(np.diff(rs, prepend=self.g_last[state]))
+            else:
+                diffs = np.abs(np.diff(rs))
+            self.g_sum[state] += float(diffs[~np.isnan(diffs)].sum())
+            self.g_n[state] += int(rs.size)
+            self.g_last[state] = float(rs[-1])
+            self.time_counts[state] += int(np.count_nonzero(td_valid & mask))
+
+        self.total_time = float(td[-1])
+        self._prev = (float(td[-1]), float(x[-1]), float(y[-1]), float(speed[-1]), float(acc[-1]), float(b[-1]))
+        self.n += n
+
+    def _gmrt(self, state):
+        n = self.g_n[state]
+        if n <= 1:
+            return 0
+        return (1 / (n - 1)) * self.g_sum[state]
+
+    def result(self):
+        if self.n == 0:
+            raise ValueError("분석할 샘플이 없습니다")
+        gmrt_on_paper = self._gmrt(ON)
+        gmrt_in_air = self._gmrt(AIR)
+        mean_speed_on_paper = float(self.speed.mean(ON))
+        mean_speed_in_air = float(self.speed.mean(AIR))
+        result = {
+            'air_time': self.time_counts[AIR],
+            'gmrt_in_air': float(gmrt_in_air),
+            'gmrt_on_paper': float(gmrt_on_paper),
+            'max_x_extension': float(self.max_x),
+            'max_y_extension': float(self.max_y),
+            'mean_acc_in_air': mean_speed_in_air,
+            'mean_acc_on_paper': mean_speed_on_paper,
+            'mean_gmrt': float(((gmrt_on_paper or 0) + (gmrt_in_air or 0)) / 2),
+            'mean_jerk_in_air': float(self.jerk.mean(AIR)),
+            'mean_jerk_on_paper': float(self.jerk.mean(ON)),
+            'mean_speed_in_air': mean_speed_in_air,
+            'mean_speed_on_paper': mean_speed_on_paper,
+            'num_of_pendown': self.pendowns,
+            'paper_time': self.time_counts[ON],
+            'pressure_mean': float(self.p_mean) if self.p_n else NAN,
+            'pressure_var': float(self.p_m2 / (self.p_n - 1)) if self.p_n > 1 else NAN,
+            'total_time': float(self.total_time),
+        }
+        if not self.has_button:
+            for k in ('air_time', 'gmrt_in_air', 'gmrt_on_paper', 'mean_acc_in_air', 'mean_acc_on_paper',
+                      'mean_jerk_in_air', 'mean_jerk_on_paper', 'mean_speed_in_air', 'mean_speed_on_paper',
+                      'num_of_pendown', 'paper_time'):
+                result[k] = None
+            result['mean_gmrt'] = 0.0
+        if not self.has_pressure:
+            result['pressure_mean'] = result['pressure_var'] = None
+        return result
+
+    def columns(self):
+        # 모아 둔 샘플 -> analyze_columns와 같은 컬럼 배열 (keep_samples=False면 None). 지금까지의 복사본
+        if self._samples is None:
+            return None
+        return {col: np.array(values) for col, values in zip((TIME_COL, X_COL, Y_COL, PRESSURE_COL, BUTTON_COL),
+                                                              self._samples)}
+
+    def row0(self):
+        # analyze()의 feature 매핑용 첫 행 (SPEED/ACC/JERK 첫 값은 항상 결측 -> 평균으로 채워짐)
+        row = dict(self._row0 or {})
+        td0 = float(self._t0 - (self._t0 + 1)) if self.n else NAN
+        first = (td0, NAN, NAN,
+                 self.speed.fill_value(), self.acc.fill_value(), self.jerk.fill_value())
+        row.update(zip(DERIVED_COLS, first))
+        return row
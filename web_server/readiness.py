@@ -0,0 +1,48 @@
+import multiprocessing
+import os
+
+
+class Readiness:
+    # 워커별 준비 상태 (0: 준비 중, 1: 첫 예측 성공, -1: 실패).
+    # serve.py 멀티 워커 모드에서는 fork 전에 만든 공유 메모리를 모든 워커가 보므로,
+    # 어느 워커가 /ready를 받더라도 모든 워커가 준비되어야 ready로 답한다.
+    # uvicorn main:app으로 단일 프로세스 실행 시에는 자기 상태만 본다
+
+    def __init__(self):
+        self._slots = None
+        self._index = 0
+        self._local = 0
+        self.error = None
+
+    def configure(self, workers):
+        # 부모 프로세스에서 fork 전에 호출
+        self._slots = multiprocessing.RawArray('b', workers)
+
+    def set_worker(self, index):
+        self._index = index
+
+    def clear(self, index):
+        # 워커가 죽어서 다시 띄울 때
+        if self._slots is not None:
+            self._slots[index] = 0
+
+    def mark(self, ok, error=None):
+        self._local = 1 if ok else -1
+        self.error = error
+        if self._slots is not None:
+            self._slots[self._index] = self._local
+
+    def status(self):
+        states = list(self._slots) if self._slots is not None else [self._local]
+        return {
+            'ready': all(s == 1 for s in states),
+            'workers': len(states),
+            'ready_workers': sum(s == 1 for s in states),
+            'failed_workers': sum(s == -1 for s in states),
+            'worker': self._index,
+            'pid': os.getpid(),
+            'error': self.error,
+        }
+
+
+readiness = Readiness()
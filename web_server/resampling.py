@@ -0,0 +1,151 @@
+import os
+
+import numpy as np
+
+from feature_engine import BUTTON_COL, TIME_COL
+
+
+# feature 추출 전 선택적 전처리: 중복 타임스탬프 제거 + 목표 샘플링 속도로 리샘플/데시메이션.
+# 태블릿마다 보고 속도가 다르고 같은 시간의 샘플이 자주 섞여 들어오는데, 기존 경로는 TIME_DIFF_DELTA=0을 NaN으로
+# 바꾼 뒤 속도/가속도/jerk를 평균으로 채워서 가린다. 여기서는 그 전에 입력 자체를 정리한다.
+#   RESAMPLE_HZ=0 (기본 끔)   목표 속도 (Hz, 시간 컬럼은 ms)
+#   RESAMPLE_MODE=interp      interp: 균일 시간 격자에 np.interp (버튼은 직전 샘플 값 유지)
+#                             decimate: 격자 칸마다 첫 원본 샘플만 남김 (보간 없음, 목표보다 느린 입력은 그대로)
+#   RESAMPLE_DEDUP=0          1이면 연속으로 같은 시간인 샘플 중 마지막 것만 남김 (HZ를 주면 항상 켜짐)
+# 모델은 원래 속도(~110Hz)의 데이터로 학습되었고 air_time/paper_time은 샘플 수라서, 목표 속도가 원래 속도와 다르면
+# feature와 예측이 달라진다. 속도별 변화는 python run_resample_report.py로 확인.
+MODES = ('interp', 'decimate')
+
+
+def _take(columns, index, n):
+    # 샘플 길이(n)인 컬럼만 고르고, 나머지(첫 행만 있는 Z 등)는 그대로
+    return {c: (np.asarray(v)[index] if len(v) == n else v) for c, v in columns.items()}
+
+
+def _sorted_by_time(columns):
+    # 시간이 NaN인 샘플은 빼고, 시간 순서가 아니면 정렬 (np.interp/격자 계산은 증가하는 시간이 필요)
+    t = np.asarray(columns[TIME_COL])
+    n = len(t)
+    if t.dtype.kind == 'f' and np.isnan(t).any():
+        columns = _take(columns, ~np.isnan(t), n)
+        t = columns[TIME_COL]
+        n = len(t)
+    if n > 1 and np.any(t[1:] < t[:-1]):
+        columns = _take(columns, np.argsort(t, kind='stable'), n)
+    return columns
+
+
+def dedup_timestamps(columns):
+    # -> (columns, 제거한 샘플 수). 연속으로 같은 시간인 샘플 중 마지막 것만 남긴다
+    t = np.asarray(columns[TIME_COL])
+    n = len(t)
+    if n < 2:
+        return columns, 0
+    keep = np.empty(n, dtype=bool)
+    keep[-1] = True
+    np.not_equal(t[1:], t[:-1], out=keep[:-1])
+    dropped = n - int(np.count_nonzero(keep))
+    if dropped == 0:
+        return columns, 0
+    return _take(columns, keep, n), dropped
+
+
+def resample_interp(columns, rate_hz):
+    # 첫 샘플 시간부터 1000/rate_hz ms 간격 격자. 연속값은 선형 보간(NaN은 건너뜀), 버튼은 직전 샘플 값
+    t = np.asarray(columns[TIME_COL], dtype=np.float64)
+    n = len(t)
+    if n < 2:
+        return columns
+    step = 1000.0 / rate_hz
+    grid = t[0] + np.arange(int((t[-1] - t[0]) // step) + 1) * step
+    out = {}
+    for c, v in columns.items():
+        if len(v) != n:
+            out[c] = v
+        elif c == TIME_COL:
+            out[c] = grid
+        elif c == BUTTON_COL:
+            out[c] = np.asarray(v)[np.searchsorted(t, grid, side='right') - 1]
+        else:
+            v = np.asarray(v, dtype=np.float64)
+            valid = ~np.isnan(v)
+            if valid.all():
+                out[c] = np.interp(grid, t, v)
+            elif valid.any():
+                out[c] = np.interp(grid, t[valid], v[valid])
+            else:
+                out[c] = np.full(len(grid), np.nan)
+    return out
+
+
+def decimate(columns, rate_hz):
+    # 1000/rate_hz ms 칸마다 첫 샘플만 (원본 값 그대로)
+    t = np.asarray(columns[TIME_COL], dtype=np.float64)
+    n = len(t)
+    if n < 2:
+        return columns
+    bins = np.floor((t - t[0]) * (rate_hz / 1000.0))
+    keep = np.empty(n, dtype=bool)
+    keep[0] = True
+    np.not_equal(bins[1:], bins[:-1], out=keep[1:])
+    return columns if keep.all() else _take(columns, keep, n)
+
+
+def input_rate(t):
+    # 시간 간격 중앙값으로 본 입력 속도 (Hz). 간격이 모두 0이면 None
+    d = np.diff(np.asarray(t, dtype=np.float64))
+    d = d[d > 0]
+    return float(1000.0 / np.median(d)) if d.size else None
+
+
+class Resampler:
+
+    def __init__(self, rate_hz=None, mode='interp', dedup=True):
+        if mode not in MODES:
+            raise ValueError(f"RESAMPLE_MODE는 {'/'.join(MODES)} 중 하나여야 합니다: {mode}")
+        if rate_hz is not None and rate_hz <= 0:
+            raise ValueError(f"rate_hz는 0보다 커야 합니다: {rate_hz}")
+        self.rate_hz = rate_hz
+        self.mode = mode
+        self.dedup = dedup or rate_hz is not None
+
+    @classmethod
+    def from_env(cls, prefix='RESAMPLE_'):
+        # 꺼져 있으면 None
+        env = os.environ
+        rate = float(env.get(prefix + 'HZ', '0'))
+        dedup = env.get(prefix + 'DEDUP', '0') in ('1', 'true', 'yes')
+        if rate <= 0 and not dedup:
+            return None
+        return cls(rate_hz=rate if rate > 0 else None, mode=env.get(prefix + 'MODE', 'interp'), dedup=dedup)
+
+    def describe(self):
+        # 결과 캐시 키 등에 쓰는 설정 문자열
+        return f"{self.mode}@{self.rate_hz:g}Hz" if self.rate_hz is not None else 'dedup'
+
+    def apply(self, columns):
+        # -> (columns, 정보 dict)
+        n_in = len(columns[TIME_COL])
+        rate_in = input_rate(columns[TIME_COL])
+        columns = _sorted_by_time(columns)
+        duplicates = 0
+        if self.dedup:
+            columns, duplicates = dedup_timestamps(columns)
+        if self.rate_hz is not None:
+            if self.mode == 'interp':
+                columns = resample_interp(columns, self.rate_hz)
+            else:
+                columns = decimate(columns, self.rate_hz)
+        info = {
+            'mode': self.mode if self.rate_hz is not None else 'dedup',
+            'rate_hz': self.rate_hz,
+            'input_rate_hz': round(rate_in, 3) if rate_in is not None else None,
+            'input_samples': n_in,
+            'duplicates': duplicates,
+            'output_samples': len(columns[TIME_COL]),
+        }
+        return columns, info
+
+
+# analysis_runner.analyze_columns가 기본으로 사용 (RESAMPLE_* 환경 변수, 기본 None = 끔)
+default_resampler = Resampler.from_env()
@@ -0,0 +1,233 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from serialization import dumps, loads
+
+
+def _canonical(arr):
+    # 같은 샘플이면 입력 형식(CSV/JSON/바이너리)과 무관하게 같은 bytes가 되도록 숫자는 모두 <f8로 맞춘다.
+    # 같은 값이 CSV에서는 int64, JSON(6905.0)이나 바이너리에서는 float64로 들어온다 (2**53 이하 정수는 float64로 정확)
+    arr = np.asarray(arr)
+    if arr.dtype.kind in 'iubf':
+        return np.ascontiguousarray(arr, dtype='<f8')
+    return np.asarray([str(v) for v in arr.tolist()]).astype('U')
+
+
+def samples_digest(columns):
+    # 컬럼 배열 dict의 내용 해시 (컬럼 순서 무관)
+    h = hashlib.sha256()
+    for name in sorted(columns):
+        arr = _canonical(columns[name])
+        h.update(name.encode('utf-8'))
+        h.update(arr.dtype.str.encode())
+        h.update(str(arr.shape).encode())
+        h.update(arr.tobytes())
+    return h.hexdigest()
+
+
+# 디스크 단이 한도를 넘으면 이 비율까지 줄인다
+DISK_EVICT_TARGET = 0.9
+
+
+class ResultCache:
+    # 분석 결과 캐시: 메모리 LRU(+TTL) 1단, 선택적으로 디스크(JSON 파일) 2단.
+    # 키에 모델/스케일러 버전이 들어가고, 새 버전이 보이면 이전 항목은 모두 버린다.
+
+    def __init__(self, max_entries=256, ttl=3600.0, disk_dir=None, disk_max_bytes=256 << 20):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self.version = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+        # 디스크 단: 이 프로세스가 아는 파일의 key -> 크기 (쓴 순서)와 합계. put마다 디렉토리를 훑지 않는다
+        self._disk = OrderedDict()
+        self._disk_bytes = 0
+        self._disk_lock = threading.Lock()
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._scan_disk()
+
+    @classmethod
+    def from_env(cls, prefix='RESULT_CACHE_'):
+        env = os.environ
+        ttl = float(env.get(prefix + 'TTL', '3600'))
+        return cls(
+            max_entries=int(env.get(prefix + 'SIZE', '256')),
+            ttl=ttl if ttl > 0 else None,
+            disk_dir=env.get(prefix + 'DIR') or None,
+            disk_max_bytes=int(float(env.get(prefix + 'DISK_MB', '256')) * (1 << 20)),
+        )
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0 or bool(self.disk_dir)
+
+    def key(self, version, columns, **options):
+        opts = ','.join(f'{k}={options[k]}' for k in sorted(options))
+        return hashlib.sha256(f'{version}|{opts}|{samples_digest(columns)}'.encode()).hexdigest()
+
+    def check_version(self, version):
+        # 모델/스케일러가 바뀌면 캐시 전체 무효화
+        with self._lock:
+            if self.version == version:
+                return
+            changed = self.version is not None
+            self.version = version
+            if not changed:
+                return
+            self._entries.clear()
+            self.stats['invalidations'] += 1
+        self._clear_disk()
+
+    def _expired(self, stored_at):
+        return self.ttl is not None and time.time() - stored_at > self.ttl
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                if not self._expired(stored_at):
+                    self._entries.move_to_end(key)
+                    self.stats['hits'] += 1
+                    return value
+                del self._entries[key]
+        value = self._disk_get(key)
+        with self._lock:
+            if value is None:
+                self.stats['misses'] += 1
+                return None
+            self.stats['disk_hits'] += 1
+            self._remember(key, value, time.time())
+        return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._remember(key, value, time.time())
+        self._disk_put(key, value)
+
+    def _remember(self, key, value, stored_at):
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = (stored_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        self._clear_disk()
+
+    # --- 디스크 단 ---
+
+    def _path(self, key):
+        return os.path.join(self.disk_dir, f'{key}.json')
+
+    def _disk_get(self, key):
+        if not self.disk_dir:
+            return None
+        path = self._path(key)
+        try:
+            if self._expired(os.path.getmtime(path)):
+                os.remove(path)
+                self._forget_disk(key)
+                return None
+            with open(path, 'rb') as f:
+                return loads(f.read())
+        except (OSError, ValueError):
+            return None
+
+    def _disk_put(self, key, value):
+        if not self.disk_dir:
+            return
+        tmp = self._path(key) + '.tmp'
+        try:
+            data = dumps(value)
+            with open(tmp, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, self._path(key))
+        except (OSError, TypeError, ValueError):
+            return
+        with self._disk_lock:
+            self._disk_bytes += len(data) - self._disk.pop(key, 0)
+            self._disk[key] = len(data)
+            if self._disk_bytes > self.disk_max_bytes:
+                self._evict_disk()
+
+    def _forget_disk(self, key):
+        with self._disk_lock:
+            self._disk_bytes -= self._disk.pop(key, 0)
+
+    def _scan_disk(self):
+        # 디렉토리의 실제 파일로 목록/합계를 다시 만든다 (시작 시, 한도를 넘었을 때).
+        # serve.py 워커들이 같은 디렉토리를 쓰면 다른 워커가 쓴 파일은 여기서만 보인다
+        files = sorted(self._disk_files())
+        self._disk = OrderedDict((os.path.basename(path)[:-len('.json')], size) for _, size, path in files)
+        self._disk_bytes = sum(size for _, size, _ in files)
+        return files
+
+    def _disk_files(self):
+        files = []
+        for name in os.listdir(self.disk_dir):
+            if name.endswith('.json'):
+                path = os.path.join(self.disk_dir, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                files.append((st.st_mtime, st.st_size, path))
+        return files
+
+    def _evict_disk(self):
+        # _disk_lock 안에서 호출. 만료된 파일과 오래된 파일부터 지워 한도의 DISK_EVICT_TARGET까지 줄인다
+        # (한도 근처에서 put마다 디렉토리를 다시 훑지 않도록 여유를 둔다)
+        target = self.disk_max_bytes * DISK_EVICT_TARGET
+        now = time.time()
+        for mtime, size, path in self._scan_disk():
+            if self._disk_bytes <= target and not (self.ttl is not None and now - mtime > self.ttl):
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self._disk_bytes -= self._disk.pop(os.path.basename(path)[:-len('.json')], 0)
+            self.stats['evictions'] += 1
+
+    def _clear_disk(self):
+        if not self.disk_dir:
+            return
+        with self._disk_lock:
+            for _, _, path in self._disk_files():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._disk.clear()
+            self._disk_bytes = 0
+
+    def status(self):
+        with self._lock:
+            stats = dict(self.stats)
+            entries = len(self._entries)
+        lookups = stats['hits'] + stats['disk_hits'] + stats['misses']
+        return {
+            'enabled': self.enabled,
+            'entries': entries,
+            'max_entries': self.max_entries,
+            'ttl': self.ttl,
+            'disk_dir': self.disk_dir,
+            'disk_bytes': self._disk_bytes,
+            'version': self.version,
+            'hit_rate': (stats['hits'] + stats['disk_hits']) / lookups if lookups else None,
+            **stats,
+        }
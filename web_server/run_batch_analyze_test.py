@@ -0,0 +1,82 @@
+import csv
+import glob
+import os
+import shutil
+import sys
+import tempfile
+import warnings
+from pathlib import Path
+
+from batch_analyze import collect_files, run_batch
+
+# batch_analyze.py 확인: uploads/의 CSV 몇 개 + 깨진 파일 1개를 임시 디렉토리에 복사해서
+# 1. 처음 실행: 정상 파일은 결과 행, 깨진 파일은 .errors.csv 한 행
+# 2. 중간에 끊긴 것처럼 결과를 앞의 몇 행(+ 잘린 줄)만 남기고 --resume: 남은 행만 처리하고
+#    건너뜀/처리/실패 수가 맞는지, 최종 결과가 처음 실행과 같은지
+# 3. 다 끝난 뒤 다시 --resume: 모두 건너뛰고 실패한 파일만 다시 시도
+#   python run_batch_analyze_test.py
+
+warnings.simplefilter('ignore')
+WORKDIR = Path(__file__).resolve().parent
+N_FILES = 4
+KEEP = 2
+
+
+def read_rows(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+def scored(rows):
+    # 파일별 예측 결과 (실행마다 다른 elapsed_ms는 제외)
+    return {r['file']: (r['n_samples'], r['prediction'], r['dementia_probability']) for r in rows}
+
+
+def main():
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, 'in')
+        os.makedirs(src)
+        for p in sorted(glob.glob(str(WORKDIR / 'uploads' / '*.csv')))[:N_FILES]:
+            shutil.copy(p, src)
+        with open(os.path.join(src, 'broken.csv'), 'wb') as f:
+            f.write(b'a,b\n1,2\n')
+        files = collect_files([src])
+        output = os.path.join(tmp, 'results.csv')
+
+        first = run_batch(files, output, workers=2, progress=False)
+        rows = read_rows(output)
+        errors = read_rows(output + '.errors.csv')
+        good = first['processed'] == N_FILES + 1 and first['errors'] == 1 and first['skipped'] == 0
+        good &= len(rows) == N_FILES and [e['file'] for e in errors] == [os.path.join(src, 'broken.csv')]
+        ok &= good
+        print(f"처음 실행: 처리 {first['processed']}, 실패 {first['errors']}, 결과 {len(rows)}행 "
+              f"{'OK' if good else 'MISMATCH'}")
+
+        # 중단된 실행: 결과 파일에 앞의 KEEP행과 잘린 줄만 남아 있음
+        with open(output, encoding='utf-8') as f:
+            lines = f.readlines()
+        with open(output, 'w', encoding='utf-8') as f:
+            f.writelines(lines[:1 + KEEP])
+            f.write(lines[1 + KEEP][:20])
+        resumed = run_batch(files, output, workers=2, resume=True, progress=False)
+        final = read_rows(output)
+        good = resumed['skipped'] == KEEP and resumed['processed'] == N_FILES + 1 - KEEP and resumed['errors'] == 1
+        good &= len(final) == N_FILES and scored(final) == scored(rows)
+        good &= len(read_rows(output + '.errors.csv')) == 1
+        ok &= good
+        print(f"--resume (결과 {KEEP}행 + 잘린 줄): 건너뜀 {resumed['skipped']}, 처리 {resumed['processed']}, "
+              f"실패 {resumed['errors']}, 결과 {len(final)}행 {'OK' if good else 'MISMATCH'}")
+
+        again = run_batch(files, output, workers=2, resume=True, progress=False)
+        good = again['skipped'] == N_FILES and again['processed'] == 1 and again['errors'] == 1
+        good &= scored(read_rows(output)) == scored(rows)
+        ok &= good
+        print(f"끝난 뒤 --resume: 건너뜀 {again['skipped']}, 처리 {again['processed']} (실패 파일 재시도), "
+              f"실패 {again['errors']} {'OK' if good else 'MISMATCH'}")
+    print('OK' if ok else 'FAILED')
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,195 @@
+import argparse
+import asyncio
+import glob
+import json
+import os
+import sys
+import time
+import warnings
+from pathlib import Path
+
+# main import 전에: 세션 저장 끄기, 결과 캐시 끄기 (같은 세션을 여러 경로로 보내서 비교함)
+os.environ.setdefault('SESSION_PERSIST', 'off')
+os.environ.setdefault('RESULT_CACHE_SIZE', '0')
+
+import httpx
+
+import synthetic_handwriting
+from analysis_runner import analyze_batch, session_features
+from model_registry import default_registry
+
+# /analyze_batch 확인:
+# 1. 같은 세션을 /analyze(CSV) / /analyze_strokes(JSON)로 하나씩 보낸 결과와 일괄 채점 결과가 같은지
+#    (실패한 세션은 에러 줄로 나오고 나머지는 계속 채점되는지, predict_proba 호출 수)
+# 2. 세션 N개: 하나씩 순서대로 / 동시에 보낼 때와 /analyze_batch 한 번의 시간 비교
+#   python run_batch_scoring_test.py --sessions 200 --samples 3000
+# ASGI로 실행하므로 응답은 끝까지 모은 뒤에 받는다 (줄 단위 스트리밍은 실제 서버에서만 보임)
+
+warnings.simplefilter('ignore')
+WORKDIR = Path(__file__).resolve().parent
+ROOT = WORKDIR.parent
+
+
+def columnar(columns):
+    return {'t': columns['시간'].tolist(), 'x': columns['X'].tolist(), 'y': columns['Y'].tolist(),
+            'pressure': columns['압력_NORMAL'].tolist(), 'button': columns['버튼'].tolist()}
+
+
+def records(columns):
+    return [{'timestamp_ms': int(t), 'x': float(x), 'y': float(y), 'pressure': float(p), 'button': int(b)}
+            for t, x, y, p, b in zip(columns['시간'], columns['X'], columns['Y'], columns['압력_NORMAL'], columns['버튼'])]
+
+
+def ndjson(response):
+    return [json.loads(line) for line in response.text.splitlines() if line]
+
+
+def same_result(expected, line):
+    # 예측 경로(predict vs 확률 argmax)만 다를 수 있으므로 feature/확률/예측 값을 비교
+    if 'error' in expected or 'error' in line:
+        return 'error' in expected and 'error' in line
+    if expected['preprocessing'] != line['preprocessing']:
+        return False
+    a, b = expected['ml'], line['ml']
+    return a.get('prediction') == b.get('prediction') and a.get('probability') == b.get('probability')
+
+
+async def check(client):
+    ok = True
+    files = [ROOT / 'dummy_normal.csv', ROOT / 'dummy_dementia.csv', ROOT / 'yyeepp.csv']
+    files += sorted(Path(p) for p in glob.glob(str(WORKDIR / 'uploads' / '*.csv')))
+    uploads = [(f.name, f.read_bytes()) for f in files]
+    uploads.append(('broken.csv', b'a,b\n1,2\n'))
+    expected = []
+    for name, content in uploads:
+        r = await client.post('/analyze', params={'strokes': 'false'}, files={'file': (name, content, 'text/csv')})
+        expected.append(r.json())
+    r = await client.post('/analyze_batch', files=[('files', (name, content, 'text/csv')) for name, content in uploads])
+    lines = ndjson(r)
+    summary = lines.pop()
+    by_index = {line['index']: line for line in lines}
+    matched = sum(same_result(expected[i], by_index.get(i, {'error': 'missing'})) for i in range(len(uploads)))
+    ok &= r.headers['content-type'].startswith('application/x-ndjson') and matched == len(uploads)
+    ok &= summary['predict_calls'] == 1 and summary['errors'] == 1 and summary['scored'] == len(uploads) - 1
+    print(f"CSV 파일 {len(uploads)}개 (실패 1개 포함): /analyze와 같은 결과 {matched}/{len(uploads)}, "
+          f"predict_proba {summary['predict_calls']}번, 에러 {summary['errors']}")
+
+    sessions = [synthetic_handwriting.generate(2000, seed=700 + i) for i in range(12)]
+    payload = [{'id': f'p{i}', 'records': records(c) if i % 2 else columnar(c)} for i, c in enumerate(sessions)]
+    payload.append({'id': 'empty', 'records': []})
+    expected = []
+    for s in payload:
+        r = await client.post('/analyze_strokes', json={'records': s['records']})
+        expected.append(r.json())
+    r = await client.post('/analyze_batch', json={'sessions': payload})
+    lines = ndjson(r)
+    summary = lines.pop()
+    by_id = {line['id']: line for line in lines}
+    matched = sum(same_result(e, by_id.get(s['id'], {'error': 'missing'})) for s, e in zip(payload, expected))
+    ok &= matched == len(payload) and summary['predict_calls'] == 1 and summary['errors'] == 1
+    ok &= all(by_id[s['id']]['index'] == i for i, s in enumerate(payload))
+    print(f"JSON 세션 {len(payload)}개 (행/컬럼 형식, 빈 세션 1개): /analyze_strokes와 같은 결과 {matched}/{len(payload)}, "
+          f"predict_proba {summary['predict_calls']}번")
+
+    for body, status in ((b'{bad', 400), (b'{"sessions": []}', 400)):
+        r = await client.post('/analyze_batch', content=body, headers={'content-type': 'application/json'})
+        ok &= r.status_code == status
+
+    # 예측이 실패한 세션은 scored가 아니라 errors로 센다
+    model = default_registry.get().model
+
+    def broken(X):
+        raise RuntimeError('forced predict error')
+
+    model.predict_proba = broken
+    try:
+        r = await client.post('/analyze_batch', json={'sessions': payload[:3]})
+    finally:
+        del model.predict_proba
+    lines = ndjson(r)
+    summary = lines.pop()
+    failed = sum('prediction' not in (line.get('ml') or {}) for line in lines)
+    ok &= failed == 3 and summary['errors'] == 3 and summary['scored'] == 0
+    print(f"predict_proba 실패 (세션 3개): 에러 {summary['errors']}, 채점 {summary['scored']}")
+
+    # 채점은 feature를 계산한 스냅샷으로 (registry를 다시 부르지 않음)
+    class NoRegistry:
+        def get(self):
+            raise AssertionError('registry.get() called while scoring')
+
+    features = [session_features(c) for c in sessions[:3]]
+    results = analyze_batch(features, registry=NoRegistry())
+    same_snapshot = all(r['artifacts'] == f['snapshot'].info() and 'prediction' in r['ml']
+                        for r, f in zip(results, features))
+    ok &= same_snapshot
+    print(f"feature 단계의 스냅샷으로 채점: {'예' if same_snapshot else '아니오'}")
+    return ok
+
+
+async def timing(client, n, samples, concurrency):
+    sessions = [{'id': f's{i}', 'records': columnar(synthetic_handwriting.generate(samples, seed=900 + i))}
+                for i in range(n)]
+
+    async def one(s):
+        r = await client.post('/analyze_strokes', json={'records': s['records']})
+        r.raise_for_status()
+
+    start = time.perf_counter()
+    for s in sessions:
+        await one(s)
+    sequential = time.perf_counter() - start
+
+    limit = asyncio.Semaphore(concurrency)
+
+    async def limited(s):
+        async with limit:
+            await one(s)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(limited(s) for s in sessions))
+    concurrent = time.perf_counter() - start
+
+    start = time.perf_counter()
+    summary = ndjson(await client.post('/analyze_batch', json={'sessions': sessions}))[-1]
+    batch = time.perf_counter() - start
+
+    print(f"\n세션 {n}개 x {samples:,} 샘플")
+    print(f"{'방식':<34} {'총 ms':>9} {'세션/s':>8}")
+    for label, t in (('/analyze_strokes 순서대로', sequential),
+                     (f'/analyze_strokes 동시 {concurrency}개', concurrent),
+                     (f"/analyze_batch (predict {summary['predict_calls']}번)", batch)):
+        print(f"{label:<34} {t * 1000:>9.1f} {n / t:>8.1f}")
+    return summary['scored'] == n
+
+
+async def run(args):
+    import main
+    from readiness import readiness
+
+    async with main.lifespan(main.app):
+        for _ in range(600):
+            if readiness.status()['ready']:
+                break
+            await asyncio.sleep(0.1)
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://batchtest', timeout=300) as client:
+            ok = await check(client)
+            concurrency = args.concurrency or main.analysis_pool.capacity
+            ok &= await timing(client, args.sessions, args.samples, concurrency)
+    return ok
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='/analyze_batch 결과 비교와 시간 측정')
+    parser.add_argument('--sessions', type=int, default=200)
+    parser.add_argument('--samples', type=int, default=3000)
+    parser.add_argument('--concurrency', type=int, default=None,
+                        help='동시 요청 수 (기본: 분석 pool이 받아 주는 수 = 워커 + 대기열, 넘으면 503)')
+    args = parser.parse_args(argv)
+    ok = asyncio.run(run(args))
+    print('OK' if ok else 'FAILED')
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,127 @@
+import argparse
+import asyncio
+import glob
+import sys
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+
+from analysis_pool import AnalysisPool, PoolSaturated
+from analysis_runner import analyze_features, resolve_prediction
+from csv_ingest import read_csv_columns
+from feature_engine import features_from_columns
+import inference_batcher
+from model_registry import default_registry
+
+# micro-batching(inference_batcher) 처리량 vs 추가 latency.
+# 서버와 같이 스레드 풀(AnalysisPool.from_env: ANALYSIS_WORKERS, 기본 CPU 수)에서 analyze_features(defer=True)를
+# 실행하고 이벤트 루프에서 배치 예측을 기다린다. 동시 클라이언트 수(closed loop)별로
+# 배치 끔 / 시간 창 0, 2, 5, 10ms를 비교한다 (feature는 미리 계산해 두고 예측 부분만 측정)
+# pool이 가득 차면(서버라면 503) 클라이언트는 잠깐 쉬고 다시 보낸다 -> '503' 열
+#   python run_batching_benchmark.py --concurrency 1,8,32 --requests 400
+#   ANALYSIS_WORKERS=4 python run_batching_benchmark.py
+
+warnings.simplefilter('ignore')
+WORKDIR = Path(__file__).resolve().parent
+ROOT = WORKDIR.parent
+
+
+def load_inputs():
+    files = [ROOT / 'dummy_normal.csv', ROOT / 'dummy_dementia.csv', ROOT / 'yyeepp.csv']
+    files += sorted(Path(p) for p in glob.glob(str(WORKDIR / 'uploads' / '*.csv')))
+    return [features_from_columns(read_csv_columns(f)) for f in files]
+
+
+async def analyze_deferred(pool, preproc, row0):
+    # 서버(main._run_timed)와 같은 경로: pool에서 벡터까지, 이벤트 루프에서 배치 예측 대기
+    return await resolve_prediction(await pool.run(analyze_features, preproc, row0, defer=True))
+
+
+def check_parity(inputs, batcher):
+    inference_batcher.configure(None)
+    expected = [analyze_features(p, r)['ml'] for p, r in inputs]
+    inference_batcher.configure(batcher)
+    blocking = [analyze_features(p, r)['ml'] for p, r in inputs]
+
+    async def deferred():
+        pool = AnalysisPool('thread', workers=1, queue_limit=len(inputs))
+        try:
+            return await asyncio.gather(*(analyze_deferred(pool, p, r) for p, r in inputs))
+        finally:
+            pool.shutdown()
+
+    deferred_ml = [result['ml'] for result in asyncio.run(deferred())]
+    inference_batcher.configure(None)
+    return all(e['prediction'] == a['prediction'] and e['probability'] == a['probability']
+               for actual in (blocking, deferred_ml) for e, a in zip(expected, actual))
+
+
+async def run_load(pool, inputs, concurrency, total):
+    latencies = []
+    rejected = 0
+    counter = iter(range(total))
+
+    async def client():
+        nonlocal rejected
+        for i in counter:
+            preproc, row0 = inputs[i % len(inputs)]
+            start = time.perf_counter()
+            while True:
+                try:
+                    await analyze_deferred(pool, preproc, row0)
+                    break
+                except PoolSaturated:
+                    rejected += 1
+                    await asyncio.sleep(0.001)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return time.perf_counter() - start, latencies, rejected
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='inference micro-batching 처리량/latency 측정')
+    parser.add_argument('--concurrency', type=lambda s: [int(v) for v in s.split(',')], default=[1, 8, 32])
+    parser.add_argument('--windows', type=lambda s: [float(v) for v in s.split(',')], default=[0, 2, 5, 10],
+                        help='시간 창 목록 (ms)')
+    parser.add_argument('--max-batch', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=400, help='설정마다 보낼 요청 수')
+    args = parser.parse_args(argv)
+
+    inputs = load_inputs()
+    default_registry.load()
+    sizing = AnalysisPool.from_env()
+    print(f"model: {default_registry.snapshot().model_version}, inputs: {len(inputs)}, "
+          f"pool: 스레드 {sizing.workers}개 + 대기열 {sizing.queue_limit}")
+    ok = check_parity(inputs, inference_batcher.InferenceBatcher(window=0.002, max_batch=args.max_batch))
+    print(f"batched == unbatched (prediction, probability): {ok}")
+
+    configs = [('off', None)] + [(f'{w:g}ms', w) for w in args.windows]
+    print(f"{'clients':>7} {'batching':>9} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'mean batch':>11} "
+          f"{'503':>6}")
+    for concurrency in args.concurrency:
+        for label, window in configs:
+            batcher = (inference_batcher.InferenceBatcher(window=window / 1000, max_batch=args.max_batch)
+                       if window is not None else None)
+            inference_batcher.configure(batcher)
+            pool = AnalysisPool.from_env()
+            try:
+                asyncio.run(run_load(pool, inputs, concurrency, min(args.requests, 20)))  # warm-up
+                if batcher is not None:
+                    batcher.stats = dict.fromkeys(batcher.stats, 0)
+                elapsed, latencies, rejected = asyncio.run(run_load(pool, inputs, concurrency, args.requests))
+            finally:
+                pool.shutdown()
+                inference_batcher.configure(None)
+            q = np.percentile(latencies, [50, 95, 99]) * 1000
+            mean_batch = batcher.status()['mean_batch'] if batcher is not None else 1
+            print(f"{concurrency:>7} {label:>9} {len(latencies) / elapsed:>8.1f} {q[0]:>8.2f} {q[1]:>8.2f} "
+                  f"{q[2]:>8.2f} {mean_batch:>11} {rejected:>6}")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
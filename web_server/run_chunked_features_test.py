@@ -0,0 +1,97 @@
+import glob
+import math
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+from pathlib import Path
+
+from analysis_runner import analyze, features_chunked
+from csv_ingest import read_csv_columns
+from feature_engine import features_from_columns
+import synthetic_handwriting
+
+# 블록 단위 분석(features_chunked)이 전체를 읽는 경로와 같은 feature/예측을 내는지,
+# 그리고 메모리 peak가 파일 크기가 아니라 블록 크기에 비례하는지 확인
+
+warnings.simplefilter('ignore')
+WORKDIR = Path(__file__).resolve().parent
+ROOT = WORKDIR.parent
+REL_TOL = 1e-9
+
+
+def close(a, b):
+    if a is None or b is None:
+        return a is b
+    if isinstance(a, float) and math.isnan(a):
+        return isinstance(b, float) and math.isnan(b)
+    return math.isclose(a, b, rel_tol=REL_TOL, abs_tol=1e-12)
+
+
+def diff_features(expected, actual):
+    if list(expected) != list(actual):
+        return ['<keys>']
+    return [k for k in expected if not close(expected[k], actual[k])]
+
+
+def probability(path, **kw):
+    ml = analyze(path, **kw)['ml']
+    return (ml.get('probability') or {}).get('dementia_probability'), ml.get('prediction')
+
+
+def peak_mb(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / (1 << 20)
+    finally:
+        tracemalloc.stop()
+
+
+files = [ROOT / 'dummy_normal.csv', ROOT / 'dummy_dementia.csv', ROOT / 'yyeepp.csv']
+files += sorted(Path(p) for p in glob.glob(str(WORKDIR / 'uploads' / '*.csv')))
+
+failed = total = 0
+worst = 0.0
+for f in files:
+    expected, row0_expected = features_from_columns(read_csv_columns(f))
+    for rows in (1, 7, 1000, 1 << 20):
+        total += 1
+        actual, row0_actual = features_chunked(f, rows)
+        bad = diff_features(expected, actual) + [f'row0.{k}' for k in row0_expected
+                                                 if not close(float(row0_expected[k]), float(row0_actual.get(k, 'nan')))]
+        for k, v in expected.items():
+            if isinstance(v, float) and v and math.isfinite(v):
+                worst = max(worst, abs(actual[k] - v) / abs(v))
+        if bad:
+            failed += 1
+            print('MISMATCH', f.name, rows, bad)
+    if probability(f) != probability(f, chunk_rows=1000):
+        failed += 1
+        print('PREDICTION MISMATCH', f.name)
+print(f'chunked parity: {total - failed}/{total} (files x block sizes), max relative diff {worst:.2e}')
+
+print(f"{'case':<30} {'full ms':>9} {'chunked ms':>11} {'full peak MB':>13} {'chunked peak MB':>16}")
+with tempfile.TemporaryDirectory() as tmp:
+    for n in (100_000, 1_000_000, 4_000_000):
+        path = os.path.join(tmp, f'synthetic_{n}.csv')
+        synthetic_handwriting.write_csv(path, synthetic_handwriting.generate(n))
+        expected = features_from_columns(read_csv_columns(path))[0]
+        for rows in (50_000, 256 * 1024):
+            start = time.perf_counter()
+            actual = features_chunked(path, rows)[0]
+            t_chunk = time.perf_counter() - start
+            if diff_features(expected, actual):
+                failed += 1
+                print('MISMATCH', n, rows, diff_features(expected, actual))
+            start = time.perf_counter()
+            features_from_columns(read_csv_columns(path))
+            t_full = time.perf_counter() - start
+            full = peak_mb(lambda: features_from_columns(read_csv_columns(path)))
+            chunked = peak_mb(lambda: features_chunked(path, rows))
+            print(f'{n:>9,} rows, block {rows:>7,}  {t_full * 1000:>9.1f} {t_chunk * 1000:>11.1f} '
+                  f'{full:>13.1f} {chunked:>16.1f}')
+
+sys.exit(1 if failed else 0)
@@ -0,0 +1,118 @@
+import glob
+import os
+import shutil
+import sys
+import tempfile
+import time
+import warnings
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+import compiled_model
+from csv_ingest import read_csv_columns
+from feature_engine import features_from_columns
+from feature_plan import compile_feature_plan
+from model_registry import ModelRegistry, load_artifact, load_joblib
+
+# compiled_model(.npz, NumPy 전용)의 predict/predict_proba가 sklearn 파이프라인과 같은지 확인하고 속도 비교
+# 원본 .joblib이 export 이후 바뀌면 레지스트리가 .npz를 로드하지 않는지 (서비스 중 바뀐 경우 포함)도 확인
+
+warnings.simplefilter('ignore')
+WORKDIR = Path(__file__).resolve().parent
+ROOT = WORKDIR.parent
+MODEL = ROOT / 'BernoulliNB_best.joblib'
+TOL = 1e-12
+
+
+def best_of(fn, n=20):
+    best = float('inf')
+    for _ in range(n):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+pipeline = load_joblib(str(MODEL))
+with tempfile.TemporaryDirectory() as tmp:
+    path = compiled_model.export(str(MODEL), os.path.join(tmp, 'model.npz'))
+    load_ms = best_of(lambda: compiled_model.load(path), 10)
+    compiled = compiled_model.load(path)
+    size = os.path.getsize(path)
+names = list(pipeline.feature_names_in_)
+
+# 0) 원본과 어긋난 .npz 거부: 옆에 복사한 .joblib에서 export -> 로드 OK, .joblib을 바꾸면 ValueError
+failed = 0
+with tempfile.TemporaryDirectory() as tmp:
+    source = os.path.join(tmp, MODEL.name)
+    shutil.copyfile(MODEL, source)
+    path = compiled_model.export(source, os.path.join(tmp, 'compiled.npz'))
+    fresh = isinstance(load_artifact(path), compiled_model.CompiledBernoulliNB)
+    with open(source, 'ab') as f:
+        f.write(b'retrained')
+    try:
+        load_artifact(path)
+        stale = False
+    except ValueError:
+        stale = True
+ok = fresh and stale
+failed += not ok
+print(f"source check: 같은 원본 로드={fresh}, 바뀐 원본 거부={stale} {'OK' if ok else 'MISMATCH'}")
+
+# 0b) 서비스 중 원본만 바뀐 경우: 레지스트리가 .npz 대신 .joblib으로 대체하고, 다시 export하면 .npz로 돌아오는지
+os.environ['MODEL_COMPILED'] = '1'
+os.environ['MODEL_ARTIFACTS'] = 'off'
+with tempfile.TemporaryDirectory() as tmp:
+    source = os.path.join(tmp, MODEL.name)
+    shutil.copyfile(MODEL, source)
+    compiled_path = compiled_model.export(source, os.path.join(tmp, MODEL.stem + '.npz'))
+    registry = ModelRegistry(tmp)
+    served = [os.path.splitext(registry.get().model_file)[1]]
+    joblib.dump(load_joblib(source), source, compress=3)  # 다시 학습한 것처럼 원본 내용만 바뀜 (.npz는 그대로)
+    served.append(os.path.splitext(registry.get().model_file)[1])
+    compiled_model.export(source, compiled_path)
+    served.append(os.path.splitext(registry.get().model_file)[1])
+    served.append(os.path.splitext(registry.get().model_file)[1])
+os.environ.pop('MODEL_COMPILED')
+os.environ.pop('MODEL_ARTIFACTS')
+ok = served == ['.npz', '.joblib', '.npz', '.npz']
+failed += not ok
+print(f"runtime source check: 로드 -> 원본 변경 -> 다시 export 순서로 사용한 파일 {served} {'OK' if ok else 'MISMATCH'}")
+
+# 1) 실제 기록에서 만든 모델 입력
+plan = compile_feature_plan(pipeline)
+files = [ROOT / 'dummy_normal.csv', ROOT / 'dummy_dementia.csv', ROOT / 'yyeepp.csv']
+files += sorted(Path(p) for p in glob.glob(str(WORKDIR / 'uploads' / '*.csv')))
+real = np.vstack([plan.vector(*features_from_columns(read_csv_columns(f))) for f in files])
+
+# 2) 학습 분포 주변의 무작위 입력 (일부 결측 포함)
+rng = np.random.default_rng(0)
+numeric = pipeline.steps[0][1].named_transformers_['numeric'].named_steps['scaler']
+synthetic = rng.normal(numeric.mean_, numeric.scale_ * 2, size=(10_000, len(names)))
+synthetic[rng.random(synthetic.shape) < 0.05] = np.nan
+
+for label, X in (('uploads', real), ('synthetic', synthetic)):
+    df = pd.DataFrame(X, columns=names)
+    expected = pipeline.predict_proba(df)
+    actual = compiled.predict_proba(X)
+    diff = float(np.abs(expected - actual).max())
+    same_pred = bool((pipeline.predict(df) == compiled.predict(X)).all())
+    ok = diff <= TOL and same_pred
+    failed += not ok
+    print(f"{label:<10} rows={len(X):>6,} max |proba diff|={diff:.2e} predict identical={same_pred} "
+          f"{'OK' if ok else 'MISMATCH'}")
+
+row = real[:1]
+row_df = pd.DataFrame(row, columns=names)
+batch_df = pd.DataFrame(synthetic, columns=names)
+print(f"npz {size:,} bytes, load {load_ms:.2f} ms")
+print(f"{'':<22} {'sklearn ms':>11} {'compiled ms':>12}")
+print(f"{'predict_proba 1 row':<22} {best_of(lambda: pipeline.predict_proba(row_df)):>11.3f} "
+      f"{best_of(lambda: compiled.predict_proba(row)):>12.3f}")
+print(f"{'predict_proba 10k rows':<22} {best_of(lambda: pipeline.predict_proba(batch_df), 5):>11.3f} "
+      f"{best_of(lambda: compiled.predict_proba(synthetic), 5):>12.3f}")
+print('parity:', 'OK' if not failed else 'FAILED')
+sys.exit(1 if failed else 0)
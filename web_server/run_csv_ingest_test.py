@@ -0,0 +1,106 @@
+import glob
+import importlib.util
+import os
+import sys
+import tempfile
+import time
+import warnings
+from pathlib import Path
+
+from analysis_runner import _read_csv_flexible, analyze_features
+from csv_ingest import csv_engine, read_csv_columns
+from feature_engine import dataframe_columns, features_from_columns, features_from_dataframe
+import synthetic_handwriting
+
+# csv_ingest.read_csv_columns()가 기존 경로(_read_csv_flexible + features_from_dataframe)와
+# 같은 feature/모델 입력을 만드는지, 그리고 얼마나 빠른지 확인
+
+warnings.simplefilter('ignore')
+WORKDIR = Path(__file__).resolve().parent
+ROOT = WORKDIR.parent
+
+
+def diff_features(expected, actual):
+    # NaN끼리는 같은 값으로 본다
+    if list(expected) != list(actual):
+        return ['<keys>']
+    return [k for k in expected
+            if not (expected[k] == actual[k] or (expected[k] != expected[k] and actual[k] != actual[k]))
+            or type(expected[k]) is not type(actual[k])]
+
+
+def best_of(fn, n=5):
+    best = float('inf')
+    for _ in range(n):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def legacy(source):
+    return features_from_dataframe(_read_csv_flexible(source))
+
+
+def fast(source):
+    return features_from_columns(read_csv_columns(source))
+
+
+def model_view(features, row0):
+    # 모델에 실제로 들어가는 값(입력 벡터 + 확률)
+    ml = analyze_features(features, row0, debug=True)['ml']
+    return ml['_debug']['input_vector'], ml.get('probability')
+
+
+files = [ROOT / 'dummy_normal.csv', ROOT / 'dummy_dementia.csv', ROOT / 'yyeepp.csv']
+files += sorted(Path(p) for p in glob.glob(str(WORKDIR / 'uploads' / '*.csv')))
+
+# pyarrow가 설치되어 있으면 auto가 pyarrow를 고르므로 두 엔진 모두 확인 (없으면 건너뜀)
+failed = 0
+default_engine = csv_engine()
+engine_env = os.environ.get('CSV_ENGINE')
+for engine in ('c', 'pyarrow'):
+    if engine == 'pyarrow' and importlib.util.find_spec('pyarrow') is None:
+        print('ingest parity: engine=pyarrow 건너뜀 (pyarrow 없음)')
+        continue
+    os.environ['CSV_ENGINE'] = engine
+    engine_failed = 0
+    for f in files:
+        for source in (f, f.read_bytes()):
+            expected, row0_expected = legacy(source)
+            actual, row0_actual = fast(source)
+            bad = diff_features(expected, actual)
+            if bad or model_view(expected, row0_expected) != model_view(actual, row0_actual):
+                engine_failed += 1
+                print('MISMATCH', engine, f.name, type(source).__name__, bad)
+    failed += engine_failed
+    print(f'ingest parity: {2 * len(files) - engine_failed}/{2 * len(files)} (files x path/bytes) identical, '
+          f'engine={engine}')
+if engine_env is None:
+    os.environ.pop('CSV_ENGINE')
+else:
+    os.environ['CSV_ENGINE'] = engine_env
+
+print(f'기본 엔진: {default_engine}')
+
+print(f"{'file':<34} {'legacy ms':>10} {'ingest ms':>10} {'speedup':>8}")
+largest = sorted(glob.glob(str(WORKDIR / 'uploads' / '*.csv')), key=os.path.getsize)[-3:]
+with tempfile.TemporaryDirectory() as tmp:
+    cases = [(Path(p).name, p) for p in largest]
+    for n in (100_000, 1_000_000):
+        cols = synthetic_handwriting.generate(n)
+        for enc in ('cp949', 'utf-8'):
+            path = os.path.join(tmp, f'synthetic_{n}_{enc}.csv')
+            synthetic_handwriting.write_csv(path, cols, encoding=enc)
+            cases.append((f'synthetic {n:,} ({enc})', path))
+    for name, path in cases:
+        repeat = 3 if os.path.getsize(path) > 10_000_000 else 10
+        # 이전 read_columns(): 전체 컬럼 파싱 + 컬럼 배열 변환
+        t_old = best_of(lambda: dataframe_columns(_read_csv_flexible(path)), repeat)
+        t_new = best_of(lambda: read_csv_columns(path), repeat)
+        if diff_features(legacy(path)[0], fast(path)[0]):
+            failed += 1
+            print('MISMATCH', name)
+        print(f'{name:<34} {t_old * 1000:>10.2f} {t_new * 1000:>10.2f} {t_old / t_new:>7.1f}x')
+
+sys.exit(1 if failed else 0)
@@ -0,0 +1,214 @@
+import glob
+import sys
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from analysis_runner import _read_csv_flexible, analyze, analyze_columns, analyze_streamed
+from feature_bank import FeatureBank, gmrt_lags
+from feature_engine import FEATURE_KEYS, features_from_columns
+from feature_plan import FeaturePlan, compile_feature_plan
+from metrics import StageTimer
+from model_registry import Artifact, ModelSnapshot, default_registry
+from online_features import OnlineFeatures
+import synthetic_handwriting
+
+# feature_bank 확인:
+# 1. 여러 lag GMRT / 펜 상태별 백분위수가 pandas 기준 구현(기존 gmrt()를 lag마다, Series.quantile)과 같은지
+# 2. 모델 입력 이름으로 bank feature를 요청하면 FeaturePlan이 찾아서 채우는지
+# 3. feature 수를 늘릴 때 계산 시간 (기존 방식으로 lag마다 다시 계산하는 것과 비교)
+# 4. 블록 단위 경로(analyze chunk_rows)와 /ws/strokes 경로(analyze_streamed)도 bank feature를 채우는지
+
+warnings.simplefilter('ignore')
+WORKDIR = Path(__file__).resolve().parent
+ROOT = WORKDIR.parent
+STATE_VALUES = {'on_paper': 1, 'in_air': 0}
+SIGNAL_COLS = {'speed': 'SPEED', 'acc': 'ACCELERATION', 'jerk': 'JERK'}
+
+
+def reference_frame(df):
+    # preprocess_dataframe()과 같은 미분 컬럼 (fill 포함)
+    data = df.copy()
+    data['TIME_DIFF'] = data['시간'] - (data['시간'].iloc[0] + 1)
+    data['TIME_DIFF_DELTA'] = data['TIME_DIFF'].diff().replace(0, np.nan)
+    data['DISTANCE'] = np.sqrt(data['X'].diff() ** 2 + data['Y'].diff() ** 2)
+    data['SPEED'] = data['DISTANCE'] / data['TIME_DIFF_DELTA']
+    data['ACCELERATION'] = data['SPEED'].diff() / data['TIME_DIFF_DELTA']
+    data['JERK'] = data['ACCELERATION'].diff() / data['TIME_DIFF_DELTA']
+    for col in ['SPEED', 'ACCELERATION', 'JERK']:
+        data[col] = data[col].replace([np.inf, -np.inf], np.nan)
+        data[col] = data[col].fillna(data[col].mean())
+    return data
+
+
+def reference_gmrt(subset, d):
+    # preprocess_dataframe()의 gmrt()에 lag만 바꾼 것
+    n = len(subset)
+    if n <= d:
+        return 0
+    radii = np.sqrt(subset['X'] ** 2 + subset['Y'] ** 2)
+    distances = np.abs(radii.diff(periods=d).dropna())
+    return (1 / (n - d)) * distances.sum()
+
+
+def reference(df, bank):
+    data = reference_frame(df)
+    out = {}
+    for state, lags in bank.gmrt_lags.items():
+        subset = data[data['버튼'] == STATE_VALUES[state]]
+        for d in lags:
+            out[f'gmrt_{state}_lag{d}'] = float(reference_gmrt(subset, d))
+    for (signal, state), qs in bank.percentiles.items():
+        series = data[data['버튼'] == STATE_VALUES[state]][SIGNAL_COLS[signal]]
+        for q in qs:
+            out[f'{signal}_p{q:g}_{state}'] = float(series.quantile(q / 100))
+    return out
+
+
+def close(a, b):
+    if a is None or b is None or np.isnan(a) or np.isnan(b):
+        return (a is None or np.isnan(a)) and (b is None or np.isnan(b))
+    return abs(a - b) <= 1e-9 * max(abs(a), abs(b)) + 1e-12
+
+
+def best_of(fn, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        t = time.perf_counter() - start
+        best = t if best is None else min(best, t)
+    return best * 1000
+
+
+class _PlanRegistry:
+    # 실제 모델 + bank가 있는 plan (모델 입력에 bank feature가 있는 경우와 같은 상태)
+    def __init__(self, bank):
+        default_registry.load()
+        model = default_registry.snapshot()._model
+        plan = compile_feature_plan(model.obj)
+        plan.bank = bank
+        self.snapshot = ModelSnapshot(Artifact(model.obj, model.path, model.signature, model.sha256, plan), None)
+
+    def get(self):
+        return self.snapshot
+
+
+def check_paths(bank):
+    # 전체 배열 경로의 bank 값과 비교
+    ok = True
+    registry = _PlanRegistry(bank)
+    path = ROOT / 'dummy_normal.csv'
+    full = analyze(str(path), registry=registry)['preprocessing']
+    timer = StageTimer()
+    chunked = analyze(str(path), registry=registry, chunk_rows=64, timer=timer)['preprocessing']
+    same = all(close(full[k], chunked.get(k)) for k in bank.names())
+    fallback = timer.events.get('chunked_bank_fallback') == 1
+    ok &= same and fallback
+    print(f"chunk_rows 경로: bank {len(bank.names())}개 {'OK' if same else 'FAILED'}, 전체 배열 경로로 대체 {fallback}")
+
+    columns = synthetic_handwriting.generate(3000, seed=21)
+    expected = analyze_columns(columns, registry=registry, resampler=False)['preprocessing']
+    online = OnlineFeatures(keep_samples=True)
+    for row in zip(columns['시간'].tolist(), columns['X'].tolist(), columns['Y'].tolist(),
+                   columns['압력_NORMAL'].tolist(), columns['버튼'].tolist()):
+        online.add(*row)
+    streamed = analyze_streamed(online.result(), online.row0(), online.columns(), registry=registry)['preprocessing']
+    same = all(close(expected[k], streamed.get(k)) for k in bank.names())
+    try:
+        analyze_streamed(online.result(), online.row0(), registry=registry)
+        rejected = False
+    except ValueError:
+        rejected = True
+    ok &= same and rejected
+    print(f"/ws/strokes 경로: bank {'OK' if same else 'FAILED'}, 샘플 없이 요청하면 거부 {rejected}")
+    return ok
+
+
+def main():
+    ok = True
+    bank = FeatureBank({'on_paper': range(1, 9), 'in_air': range(1, 9)},
+                       {(sig, state): (5, 25, 50, 75, 95) for sig in SIGNAL_COLS for state in STATE_VALUES})
+
+    # 1. pandas 기준 구현과 비교
+    files = [ROOT / 'dummy_normal.csv', ROOT / 'dummy_dementia.csv', ROOT / 'yyeepp.csv']
+    files += sorted(Path(p) for p in glob.glob(str(WORKDIR / 'uploads' / '*.csv')))
+    frames = [(f.name, _read_csv_flexible(f)) for f in files]
+    frames += [(f'synthetic_{i}', pd.DataFrame(synthetic_handwriting.generate(5000, seed=300 + i))) for i in range(4)]
+    matched = 0
+    for name, df in frames:
+        df.columns = df.columns.str.strip().str.replace('"', '')
+        columns = {c: df[c].to_numpy() for c in df.columns}
+        derived = {}
+        base, _ = features_from_columns(columns, derived=derived)
+        actual = bank.compute(columns, derived)
+        expected = reference(df, bank)
+        same = all(close(expected[k], actual[k]) for k in bank.names())
+        # 다시 계산하는 경로(derived 없이)도 같은 값
+        recomputed = bank.compute(columns)
+        same &= all(close(recomputed[k], actual[k]) for k in bank.names())
+        # lag 1은 기존 gmrt_on_paper / gmrt_in_air와 같은 정의
+        same &= close(base['gmrt_on_paper'], actual['gmrt_on_paper_lag1'])
+        same &= close(base['gmrt_in_air'], actual['gmrt_in_air_lag1'])
+        matched += same
+        if not same:
+            bad = [k for k in bank.names() if not close(expected[k], actual[k])]
+            print(f"불일치: {name} {bad[:5]}")
+    ok &= matched == len(frames)
+    print(f"pandas 기준 구현과 비교 ({len(bank.names())}개 feature): {matched}/{len(frames)}")
+
+    # 2. 모델 입력 이름 -> bank feature
+    names = ['air_time', 'gmrt_on_paper_lag3', 'jerk_p90_in_air', 'speed_p50_on_paper', 'Z']
+    plan = FeaturePlan(names)
+    columns = synthetic_handwriting.generate(3000, seed=5)
+    derived = {}
+    result, row0 = features_from_columns(columns, derived=derived)
+    result.update(plan.bank.compute(columns, derived))
+    vec = plan.vector(result, row0)
+    expected = [result['air_time'], result['gmrt_on_paper_lag3'], result['jerk_p90_in_air'],
+                result['speed_p50_on_paper'], row0['Z']]
+    # Z는 기존처럼 요청 시 첫 행에서 찾는 입력
+    plan_ok = plan.defaulted == ['Z'] and np.allclose(vec, expected) and set(plan.bank.names()) >= set(names[1:4])
+    ok &= plan_ok
+    print(f"FeaturePlan: bank {plan.bank.names()}, 0으로 채운 입력 {plan.defaulted}, 값 {'OK' if plan_ok else 'FAILED'}")
+    ok &= check_paths(bank)
+
+    # 3. feature 수에 따른 시간 (1M 샘플, 기본 feature 계산 제외)
+    n = 1_000_000
+    columns = synthetic_handwriting.generate(n, seed=11)
+    derived = {}
+    base_ms = best_of(lambda: features_from_columns(columns, derived=derived))
+    print(f"\n{n:,} 샘플, 기본 {len(FEATURE_KEYS)}개 feature {base_ms:.1f} ms")
+    print(f"{'bank 설정':<34} {'feature 수':>9} {'bank ms':>9} {'feature당 ms':>12} {'lag마다 ms':>10}")
+    on = columns['버튼'] == 1
+    air = columns['버튼'] == 0
+    for k, qs in ((1, ()), (4, ()), (16, ()), (64, ()), (8, (50,)), (8, (5, 25, 50, 75, 95)),
+                  (8, tuple(range(5, 100, 5)))):
+        config = FeatureBank({'on_paper': range(1, k + 1), 'in_air': range(1, k + 1)},
+                             {(sig, state): qs for sig in SIGNAL_COLS for state in STATE_VALUES})
+        ms = best_of(lambda: config.compute(columns, derived))
+        label = f"lag 1-{k}" + (f", 백분위 {len(qs)}개 x 6" if qs else '')
+        count = len(config.names())
+        # 기존 방식: 상태마다 반지름을 다시 만들고 lag마다 따로 차이를 계산
+        def per_lag():
+            for mask in (on, air):
+                for d in range(1, k + 1):
+                    radii = np.sqrt(columns['X'][mask] ** 2.0 + columns['Y'][mask] ** 2.0)
+                    np.abs(radii[d:] - radii[:-d]).sum()
+        naive = best_of(per_lag, repeat=1) if not qs else None
+        print(f"{label:<34} {count:>9} {ms:>9.1f} {ms / count:>12.2f} "
+              f"{(f'{naive:.1f}' if naive is not None else '-'):>10}")
+
+    # lag 1-8 합계가 lag마다 따로 계산한 값과 같은지
+    radii = np.sqrt(columns['X'][on] ** 2.0 + columns['Y'][on] ** 2.0)
+    loop = [np.abs(radii[d:] - radii[:-d]).sum() / (len(radii) - d) for d in range(1, 9)]
+    ok &= np.allclose(gmrt_lags(radii, range(1, 9)), loop, rtol=1e-12)
+    print('OK' if ok else 'FAILED')
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
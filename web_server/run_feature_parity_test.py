@@ -0,0 +1,75 @@
+import glob
+import math
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from analysis_runner import _read_csv_flexible, preprocess_dataframe
+from feature_engine import features_from_dataframe
+
+# feature_engine.features_from_dataframe()가 preprocess_dataframe()과 같은 dict를 내는지,
+# 그리고 10만 샘플에서 얼마나 빠른지 확인
+
+WORKDIR = Path(__file__).resolve().parent
+ROOT = WORKDIR.parent
+
+
+def same(a, b):
+    if type(a) is not type(b):
+        return False
+    if isinstance(a, float) and math.isnan(a):
+        return math.isnan(b)
+    return a == b
+
+
+def diff_features(expected, actual):
+    if list(expected) != list(actual):
+        return ['<keys>']
+    return [k for k in expected if not same(expected[k], actual[k])]
+
+
+files = [ROOT / 'dummy_normal.csv', ROOT / 'dummy_dementia.csv']
+files += sorted(Path(p) for p in glob.glob(str(WORKDIR / 'uploads' / '*.csv')))
+
+failed = 0
+for f in files:
+    expected, _ = preprocess_dataframe(_read_csv_flexible(f))
+    actual, _ = features_from_dataframe(_read_csv_flexible(f))
+    bad = diff_features(expected, actual)
+    if bad:
+        failed += 1
+        print('MISMATCH', f.name, [(k, expected.get(k), actual.get(k)) for k in bad])
+print(f'parity: {len(files) - failed}/{len(files)} files identical')
+
+# 10만 샘플: dummy_normal.csv를 시간축으로 이어 붙여 생성
+base = _read_csv_flexible(ROOT / 'dummy_normal.csv')
+base.columns = base.columns.str.strip().str.replace('"', '')
+reps = int(math.ceil(100_000 / len(base)))
+span = int(base['시간'].iloc[-1] - base['시간'].iloc[0]) + 10
+big = pd.concat([base] * reps, ignore_index=True).iloc[:100_000]
+big['시간'] = big['시간'].to_numpy() + np.repeat(np.arange(reps) * span, len(base))[:100_000]
+
+
+def best_of(fn, n=5):
+    best = float('inf')
+    for _ in range(n):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+# 두 함수 모두 입력 df는 컬럼명 정리 외에는 수정하지 않음
+t_old = best_of(lambda: preprocess_dataframe(big))
+t_new = best_of(lambda: features_from_dataframe(big))
+expected, _ = preprocess_dataframe(big)
+actual, _ = features_from_dataframe(big)
+bad = diff_features(expected, actual)
+failed += bool(bad)
+print('100k parity:', 'OK' if not bad else bad)
+print(f'100k samples: preprocess_dataframe {t_old * 1000:.1f} ms, feature_engine {t_new * 1000:.1f} ms '
+      f'({t_old / t_new:.1f}x)')
+sys.exit(1 if failed else 0)
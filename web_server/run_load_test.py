@@ -0,0 +1,382 @@
+import argparse
+import asyncio
+import glob
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import warnings
+from pathlib import Path
+
+import httpx
+import numpy as np
+import pandas as pd
+
+from csv_ingest import read_csv_columns
+from feature_engine import BUTTON_COL, PRESSURE_COL, TIME_COL, X_COL, Y_COL
+from stroke_codec import BINARY_CONTENT_TYPE, STROKE_COLUMNS, encode_binary
+
+# /analyze, /analyze_strokes 부하 테스트.
+# uploads/ 코퍼스(또는 세션 저장소)의 세션을 조금씩 바꿔(시간 이동 + 좌표 ±1 잡음) 결과 캐시에 걸리지 않는 payload를 만들고,
+# 동시 요청 수(closed loop) 또는 도착률(open loop, Poisson)로 보낸다. 보고: 처리량, p50/p95/p99, 에러율, 서버 메모리 추이.
+#   python run_load_test.py --concurrency 16 --duration 20                       # main:app을 프로세스 안에서 (ASGI)
+#   python run_load_test.py --rate 50 --concurrency 64 --endpoint analyze_strokes --format binary
+#   python run_load_test.py --launch --workers 2 --env INFERENCE_BATCH=0 --json load.json   # serve.py를 띄워서
+#   python run_load_test.py --url http://127.0.0.1:8000 --pid <서버 PID>                    # 이미 떠 있는 서버
+# open loop의 latency는 예정 도착 시각부터 잰다 (동시 요청 한도에 막혀 기다린 시간 포함).
+# 메모리: 서버 프로세스(+ 워커)의 RSS 합과 PSS 합(fork 공유 페이지를 나눠 센 값). ASGI 모드는 이 프로세스 자체 값이다.
+
+warnings.simplefilter('ignore')
+WORKDIR = Path(__file__).resolve().parent
+ROOT = WORKDIR.parent
+FORMATS = ('columnar', 'rows', 'binary')
+ENDPOINTS = ('analyze_strokes', 'analyze')
+
+
+# --- payload ---
+
+def load_corpus(inputs, min_samples):
+    # [(이름, 컬럼)] : CSV 파일/디렉토리와 세션 저장소 디렉토리
+    from batch_analyze import collect_files, is_session_store
+    from session_store import SessionStore
+
+    sessions = []
+    for p in inputs:
+        if is_session_store(p):
+            sessions += [(e['name'] or e['id'], c) for e, c in SessionStore(p).iter_sessions()]
+        else:
+            for f in collect_files([p]):
+                try:
+                    sessions.append((os.path.basename(f), read_csv_columns(f)))
+                except Exception:
+                    continue
+    return [(name, c) for name, c in sessions
+            if all(col in c for col in STROKE_COLUMNS) and len(c[TIME_COL]) >= min_samples]
+
+
+def variant(columns, rng):
+    # 같은 필기처럼 보이지만 내용 해시가 다른 세션 (결과 캐시 적중 방지)
+    n = len(columns[TIME_COL])
+    out = {c: np.asarray(columns[c]) for c in STROKE_COLUMNS}
+    out[TIME_COL] = out[TIME_COL] + int(rng.integers(1, 10 ** 6))
+    for c in (X_COL, Y_COL):
+        out[c] = out[c] + rng.integers(-1, 2, n) * (rng.random(n) < 0.05)
+    return out
+
+
+def encode(columns, endpoint, fmt, name):
+    # -> httpx.post 인자 dict
+    if endpoint == 'analyze':
+        body = pd.DataFrame({c: columns[c] for c in STROKE_COLUMNS}).to_csv(index=False).encode('utf-8')
+        return {'files': {'file': (name, body, 'text/csv')}}
+    t = columns[TIME_COL].tolist()
+    x, y = columns[X_COL].tolist(), columns[Y_COL].tolist()
+    p = np.nan_to_num(columns[PRESSURE_COL].astype(np.float64)).tolist()
+    b = np.nan_to_num(columns[BUTTON_COL].astype(np.float64)).astype(int).tolist()
+    if fmt == 'binary':
+        return {'content': encode_binary(columns), 'headers': {'Content-Type': BINARY_CONTENT_TYPE}}
+    if fmt == 'columnar':
+        return {'json': {'records': {'t': t, 'x': x, 'y': y, 'pressure': p, 'button': b}}}
+    return {'json': {'records': [{'timestamp_ms': t[i], 'x': x[i], 'y': y[i], 'pressure': p[i], 'button': b[i]}
+                                 for i in range(len(t))]}}
+
+
+def build_payloads(corpus, endpoints, fmt, count, seed=0, cache_hits=False):
+    # [(endpoint, post 인자)] count개. cache_hits면 원본을 그대로 반복 (캐시 적중 경로 측정)
+    rng = np.random.default_rng(seed)
+    payloads = []
+    for i in range(count):
+        name, columns = corpus[i % len(corpus)]
+        endpoint = endpoints[i % len(endpoints)]
+        if not cache_hits:
+            columns = variant(columns, rng)
+        payloads.append((endpoint, encode(columns, endpoint, fmt, name)))
+    return payloads
+
+
+# --- 서버 메모리 ---
+
+def process_tree(pid):
+    # pid + 자식 프로세스들 (serve.py 워커)
+    pids, stack = [], [pid]
+    while stack:
+        p = stack.pop()
+        pids.append(p)
+        for path in glob.glob(f'/proc/{p}/task/*/children'):
+            try:
+                with open(path) as f:
+                    stack += [int(c) for c in f.read().split()]
+            except OSError:
+                pass
+    return pids
+
+
+def memory(pid):
+    # (RSS 합, PSS 합) bytes
+    rss = pss = 0
+    for p in process_tree(pid):
+        try:
+            with open(f'/proc/{p}/smaps_rollup') as f:
+                for line in f:
+                    if line.startswith('Rss:'):
+                        rss += int(line.split()[1]) * 1024
+                    elif line.startswith('Pss:'):
+                        pss += int(line.split()[1]) * 1024
+        except OSError:
+            pass
+    return rss, pss
+
+
+# --- 부하 ---
+
+async def run_load(client, payloads, concurrency, rate, duration, pid, interval=1.0, seed=0):
+    loop = asyncio.get_running_loop()
+    results = []
+    samples = []
+    in_flight = 0
+    start = loop.time()
+    deadline = start + duration
+    counter = iter(range(10 ** 12))
+
+    async def send(index, scheduled):
+        nonlocal in_flight
+        endpoint, kwargs = payloads[index % len(payloads)]
+        in_flight += 1
+        try:
+            r = await client.post(f'/{endpoint}', **kwargs)
+            status = r.status_code
+        except Exception as e:
+            status = type(e).__name__
+        finally:
+            in_flight -= 1
+        end = loop.time()
+        results.append({'endpoint': endpoint, 'start': scheduled - start, 'end': end - start,
+                        'latency': end - scheduled, 'status': status})
+
+    async def closed_client():
+        while loop.time() < deadline:
+            await send(next(counter), loop.time())
+
+    async def open_arrivals():
+        rng = np.random.default_rng(seed)
+        sem = asyncio.Semaphore(concurrency)
+        tasks = []
+        next_at = start
+
+        async def limited(index, scheduled):
+            async with sem:
+                await send(index, scheduled)
+
+        while True:
+            next_at += rng.exponential(1.0 / rate)
+            if next_at >= deadline:
+                break
+            await asyncio.sleep(max(0.0, next_at - loop.time()))
+            tasks.append(asyncio.create_task(limited(next(counter), next_at)))
+        await asyncio.gather(*tasks)
+
+    async def sampler():
+        while True:
+            rss, pss = memory(pid) if pid else (None, None)
+            samples.append({'t': loop.time() - start, 'rss': rss, 'pss': pss, 'in_flight': in_flight})
+            await asyncio.sleep(interval)
+
+    sampling = asyncio.create_task(sampler())
+    try:
+        if rate:
+            await open_arrivals()
+        else:
+            await asyncio.gather(*(closed_client() for _ in range(concurrency)))
+    finally:
+        sampling.cancel()
+    rss, pss = memory(pid) if pid else (None, None)
+    samples.append({'t': loop.time() - start, 'rss': rss, 'pss': pss, 'in_flight': in_flight})
+    return results, samples, loop.time() - start
+
+
+def summarize(results, samples, elapsed, interval=1.0):
+    ok = [r for r in results if r['status'] == 200]
+    lat = np.array([r['latency'] for r in ok]) * 1000
+    statuses = {}
+    for r in results:
+        statuses[str(r['status'])] = statuses.get(str(r['status']), 0) + 1
+    q = np.percentile(lat, [50, 95, 99]) if lat.size else [None] * 3
+    rss = [s['rss'] for s in samples if s['rss'] is not None]
+    pss = [s['pss'] for s in samples if s['pss'] is not None]
+    summary = {
+        'requests': len(results),
+        'elapsed_s': round(elapsed, 3),
+        'throughput_rps': round(len(ok) / elapsed, 2) if elapsed else None,
+        'error_rate': round(1 - len(ok) / len(results), 4) if results else None,
+        'statuses': statuses,
+        'p50_ms': q[0], 'p95_ms': q[1], 'p99_ms': q[2],
+        'max_ms': float(lat.max()) if lat.size else None,
+        'rss_mb': {'start': rss[0] / 2 ** 20, 'max': max(rss) / 2 ** 20, 'end': rss[-1] / 2 ** 20} if rss else None,
+        'pss_mb': {'start': pss[0] / 2 ** 20, 'max': max(pss) / 2 ** 20, 'end': pss[-1] / 2 ** 20} if pss else None,
+    }
+    # 완료 시각 기준 구간별 추이
+    timeline = []
+    for k in range(int(np.ceil(elapsed / interval)) or 1):
+        lo, hi = k * interval, (k + 1) * interval
+        done = [r for r in results if lo <= r['end'] < hi]
+        done_lat = np.array([r['latency'] for r in done if r['status'] == 200]) * 1000
+        mem = [s for s in samples if lo <= s['t'] < hi]
+        timeline.append({
+            't': hi,
+            'rps': len(done) / interval,
+            'p50_ms': float(np.percentile(done_lat, 50)) if done_lat.size else None,
+            'p99_ms': float(np.percentile(done_lat, 99)) if done_lat.size else None,
+            'errors': sum(r['status'] != 200 for r in done),
+            'rss_mb': mem[-1]['rss'] / 2 ** 20 if mem and mem[-1]['rss'] is not None else None,
+            'pss_mb': mem[-1]['pss'] / 2 ** 20 if mem and mem[-1]['pss'] is not None else None,
+            'in_flight': mem[-1]['in_flight'] if mem else None,
+        })
+    return summary, timeline
+
+
+def print_report(summary, timeline):
+    fmt = lambda v, spec='8.1f': format(v, spec) if v is not None else format('-', '>' + spec.split('.')[0])
+    print(f"{'t(s)':>6} {'req/s':>7} {'p50 ms':>8} {'p99 ms':>8} {'errors':>6} {'in-flight':>9} {'RSS MB':>8} {'PSS MB':>8}")
+    for row in timeline:
+        print(f"{row['t']:>6.0f} {row['rps']:>7.1f} {fmt(row['p50_ms'])} {fmt(row['p99_ms'])} {row['errors']:>6} "
+              f"{fmt(row['in_flight'], '9d')} {fmt(row['rss_mb'])} {fmt(row['pss_mb'])}")
+    print(f"\n요청 {summary['requests']}개 / {summary['elapsed_s']:.1f}s, 처리량 {summary['throughput_rps']} req/s, "
+          f"에러율 {summary['error_rate']:.2%} {summary['statuses']}")
+    if summary['p50_ms'] is not None:
+        print(f"latency p50 {summary['p50_ms']:.1f} ms, p95 {summary['p95_ms']:.1f} ms, p99 {summary['p99_ms']:.1f} ms, "
+              f"max {summary['max_ms']:.1f} ms")
+    for key, label in (('rss_mb', 'RSS'), ('pss_mb', 'PSS')):
+        if summary[key]:
+            m = summary[key]
+            print(f"{label} {m['start']:.0f} -> {m['end']:.0f} MB (최대 {m['max']:.0f} MB)")
+
+
+# --- 대상 ---
+
+def launch_server(port, workers, env):
+    # serve.py를 띄우고 /ready가 200이 될 때까지 기다린다 -> Popen
+    proc = subprocess.Popen([sys.executable, str(WORKDIR / 'serve.py'), '--host', '127.0.0.1', '--port', str(port),
+                             '--workers', str(workers), '--log-level', 'warning'],
+                            cwd=WORKDIR, env={**os.environ, **env})
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"서버가 종료되었습니다 (exit {proc.returncode})")
+        try:
+            if httpx.get(f'http://127.0.0.1:{port}/ready', timeout=1.0).status_code == 200:
+                return proc
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    stop_server(proc)
+    raise RuntimeError("서버가 120초 안에 준비되지 않았습니다")
+
+
+def stop_server(proc):
+    proc.send_signal(signal.SIGTERM)
+    try:
+        proc.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+
+async def run_asgi(args, payloads):
+    # main:app을 이 프로세스에서 실행 (lifespan 포함). main import 전에 --env 설정이 적용되어 있어야 함
+    import main
+
+    async with main.lifespan(main.app):
+        # warm-up(모델 로드/첫 예측)이 끝날 때까지 대기
+        from readiness import readiness
+        for _ in range(600):
+            if readiness.status()['ready']:
+                break
+            await asyncio.sleep(0.1)
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://loadtest', timeout=args.timeout) as client:
+            return await run_load(client, payloads, args.concurrency, args.rate, args.duration, os.getpid(),
+                                  seed=args.seed)
+
+
+async def run_http(args, payloads, base_url, pid):
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        return await run_load(client, payloads, args.concurrency, args.rate, args.duration, pid, seed=args.seed)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='/analyze, /analyze_strokes 부하 테스트')
+    parser.add_argument('--corpus', nargs='+', default=[str(WORKDIR / 'uploads'), str(ROOT / 'dummy_normal.csv'),
+                                                        str(ROOT / 'dummy_dementia.csv')],
+                        help='CSV 파일/디렉토리 또는 세션 저장소 (기본 uploads/ + dummy_*.csv)')
+    parser.add_argument('--min-samples', type=int, default=20, help='이보다 짧은 세션은 쓰지 않음')
+    parser.add_argument('--endpoint', type=lambda s: s.split(','), default=['analyze_strokes'],
+                        help=f"쉼표로 여러 개 (번갈아 보냄): {', '.join(ENDPOINTS)}")
+    parser.add_argument('--format', choices=FORMATS, default='columnar', help='/analyze_strokes payload 형식')
+    parser.add_argument('--concurrency', type=int, default=16, help='동시 요청 수 (open loop에서는 최대 in-flight)')
+    parser.add_argument('--rate', type=float, default=None, help='도착률 req/s (Poisson, 주면 open loop)')
+    parser.add_argument('--duration', type=float, default=20.0, help='초')
+    parser.add_argument('--payloads', type=int, default=500, help='미리 만들어 둘 payload 수')
+    parser.add_argument('--cache-hits', action='store_true', help='원본 세션을 그대로 반복 (결과 캐시 적중)')
+    parser.add_argument('--timeout', type=float, default=60.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--url', default=None, help='이미 떠 있는 서버 (기본: ASGI로 프로세스 안에서)')
+    parser.add_argument('--pid', type=int, default=None, help='--url 서버의 PID (메모리 측정용)')
+    parser.add_argument('--launch', action='store_true', help='serve.py를 띄워서 테스트')
+    parser.add_argument('--workers', default='1', help='--launch 워커 수 (auto 가능)')
+    parser.add_argument('--port', type=int, default=8765, help='--launch 포트')
+    parser.add_argument('--env', action='append', default=[], metavar='KEY=VALUE',
+                        help='서버 설정 (예: ANALYSIS_WORKERS=4, INFERENCE_BATCH=0). 여러 번 지정 가능')
+    parser.add_argument('--persist', action='store_true', help='세션 저장소에 요청을 저장 (기본: SESSION_PERSIST=off)')
+    parser.add_argument('--json', default=None, help='요약과 구간별 추이를 JSON으로 저장')
+    args = parser.parse_args(argv)
+
+    bad = [e for e in args.endpoint if e not in ENDPOINTS]
+    if bad:
+        parser.error(f"알 수 없는 endpoint: {', '.join(bad)}")
+    env = dict(kv.split('=', 1) for kv in args.env)
+    if not args.persist:
+        env.setdefault('SESSION_PERSIST', 'off')
+    if not (args.launch or args.url):
+        # load_corpus가 분석 모듈(batch_analyze -> analysis_runner 등)을 import하면서 RESAMPLE_*, ANALYZE_*,
+        # FEATURE_BANK_* 같은 설정을 읽으므로 그 전에 적용한다
+        os.environ.update(env)
+
+    corpus = load_corpus(args.corpus, args.min_samples)
+    if not corpus:
+        print("사용할 세션이 없습니다 (--corpus, --min-samples 확인)", file=sys.stderr)
+        return 1
+    payloads = build_payloads(corpus, args.endpoint, args.format, args.payloads, args.seed, args.cache_hits)
+    mode = f"open loop {args.rate:g} req/s (최대 {args.concurrency} in-flight)" if args.rate else \
+        f"closed loop {args.concurrency} clients"
+    target = args.url or (f'serve.py --workers {args.workers}' if args.launch else 'ASGI (in-process)')
+    print(f"대상: {target}, {mode}, {args.duration:g}s, endpoint {'/'.join(args.endpoint)}"
+          f"{' (' + args.format + ')' if 'analyze_strokes' in args.endpoint else ''}, "
+          f"코퍼스 세션 {len(corpus)}개 -> payload {len(payloads)}개, 설정 {env}")
+
+    if args.launch:
+        proc = launch_server(args.port, args.workers, env)
+        try:
+            results, samples, elapsed = asyncio.run(
+                run_http(args, payloads, f'http://127.0.0.1:{args.port}', proc.pid))
+        finally:
+            stop_server(proc)
+    elif args.url:
+        results, samples, elapsed = asyncio.run(run_http(args, payloads, args.url, args.pid))
+    else:
+        results, samples, elapsed = asyncio.run(run_asgi(args, payloads))
+
+    summary, timeline = summarize(results, samples, elapsed)
+    print_report(summary, timeline)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'config': {k: v for k, v in vars(args).items() if k != 'json'}, 'summary': summary,
+                       'timeline': timeline}, f, indent=2, ensure_ascii=False, default=float)
+        print(f"저장: {args.json}")
+    return 0 if results and summary['error_rate'] < 1 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
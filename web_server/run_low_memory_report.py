@@ -0,0 +1,131 @@
+import argparse
+import glob
+import json
+import sys
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from analysis_runner import analyze, analyze_columns
+from csv_ingest import read_csv_columns
+from feature_engine import FEATURE_KEYS, TIME_COL
+from metrics import StageTimer
+from model_registry import default_registry
+import synthetic_handwriting
+
+# 저메모리 모드(ANALYZE_LOW_MEMORY=1)와 기본(float64) 경로 비교:
+# 요청당 최대 할당량(tracemalloc)과 시간, 세션별 feature 상대 변화와 예측 변화
+#   python run_low_memory_report.py --sizes 10000,100000,1000000 --json benchmarks/low_memory_report.json
+# feature 변화: |저메모리 - 기본| / max(|기본|, 1e-12), 세션 전체의 최대값/중앙값
+
+warnings.simplefilter('ignore')
+WORKDIR = Path(__file__).resolve().parent
+ROOT = WORKDIR.parent
+
+
+def load_inputs(synthetic):
+    files = [ROOT / 'dummy_normal.csv', ROOT / 'dummy_dementia.csv', ROOT / 'yyeepp.csv']
+    files += sorted(Path(p) for p in glob.glob(str(WORKDIR / 'uploads' / '*.csv')))
+    inputs = [(f.name, read_csv_columns(f)) for f in files]
+    inputs += [(f'synthetic_{i}', synthetic_handwriting.generate(5000, seed=200 + i)) for i in range(synthetic)]
+    return [(name, c) for name, c in inputs if len(c[TIME_COL]) >= 2]
+
+
+def as_read(columns):
+    # csv_ingest가 돌려주는 형태 (시간 int64, 나머지 float64)
+    return {c: (v if c == TIME_COL else np.asarray(v, dtype=np.float64)) for c, v in columns.items()}
+
+
+def run(columns, low_memory):
+    result = analyze_columns(columns, low_memory=low_memory, resampler=False, trace_memory=False)
+    ml = result.get('ml') or {}
+    proba = (ml.get('probability') or {}).get('dementia_probability')
+    return result['preprocessing'], ml.get('prediction'), proba
+
+
+def relative_delta(a, b):
+    if a is None and b is None:
+        return 0.0
+    if a is None or b is None:
+        return np.inf
+    return abs(b - a) / max(abs(a), 1e-12)
+
+
+def measure(fn, repeat):
+    # (최대 할당량 bytes, 가장 빠른 시간 ms). 시간은 tracemalloc 없이 따로 잰다
+    timer = StageTimer()
+    fn(timer, True)
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(StageTimer(), False)
+        ms = (time.perf_counter() - start) * 1000
+        best = ms if best is None else min(best, ms)
+    return timer.memory_peak, best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='저메모리 모드의 메모리/시간과 feature 변화 보고')
+    parser.add_argument('--sizes', type=lambda s: [int(v) for v in s.split(',')], default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--synthetic', type=int, default=8, help='추가할 합성 세션 수')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', default=None, help='결과를 JSON으로 저장')
+    args = parser.parse_args(argv)
+
+    default_registry.load()
+    report = {'memory': [], 'features': {}}
+
+    print(f"{'입력':<22} {'기본 MB':>9} {'저메모리 MB':>11} {'비율':>6} {'기본 ms':>9} {'저메모리 ms':>11}")
+    for n in args.sizes:
+        columns = as_read(synthetic_handwriting.generate(n, seed=n))
+        body = pd.DataFrame(columns).to_csv(index=False).encode('utf-8')
+        cases = [
+            (f'columns {n:,}', lambda timer, trace, lm: analyze_columns(
+                columns, timer=timer, low_memory=lm, resampler=False, trace_memory=trace)),
+            (f'CSV {n:,}', lambda timer, trace, lm: analyze(body, timer=timer, low_memory=lm, trace_memory=trace)),
+        ]
+        for label, fn in cases:
+            base_peak, base_ms = measure(lambda timer, trace: fn(timer, trace, False), args.repeat)
+            lean_peak, lean_ms = measure(lambda timer, trace: fn(timer, trace, True), args.repeat)
+            report['memory'].append({'input': label, 'samples': n, 'peak_bytes': base_peak, 'low_memory_peak_bytes': lean_peak,
+                                     'ms': base_ms, 'low_memory_ms': lean_ms})
+            print(f"{label:<22} {base_peak / 2 ** 20:>9.1f} {lean_peak / 2 ** 20:>11.1f} {lean_peak / base_peak:>6.2f} "
+                  f"{base_ms:>9.1f} {lean_ms:>11.1f}")
+
+    inputs = load_inputs(args.synthetic)
+    deltas = {k: [] for k in FEATURE_KEYS}
+    flips, dprob = 0, []
+    for name, columns in inputs:
+        base, base_pred, base_proba = run(columns, False)
+        lean, pred, proba = run(columns, True)
+        for k in FEATURE_KEYS:
+            deltas[k].append(relative_delta(base[k], lean[k]))
+        flips += pred != base_pred
+        if proba is not None and base_proba is not None:
+            dprob.append(abs(proba - base_proba))
+    report['features'] = {
+        'sessions': len(inputs),
+        'prediction_flips': int(flips),
+        'max_abs_dprob': float(max(dprob)) if dprob else None,
+        'delta_max': {k: float(np.max(v)) for k, v in deltas.items()},
+        'delta_median': {k: float(np.median(v)) for k, v in deltas.items()},
+    }
+    f = report['features']
+    print(f"\nfeature 변화 (세션 {len(inputs)}개): 예측 변경 {flips}, 최대 |Δp| "
+          f"{f['max_abs_dprob'] if f['max_abs_dprob'] is not None else '-'} %p")
+    print(f"{'feature':<20} {'최대':>10} {'중앙값':>10}")
+    for k in FEATURE_KEYS:
+        print(f"{k:<20} {f['delta_max'][k]:>10.3g} {f['delta_median'][k]:>10.3g}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as fp:
+            json.dump(report, fp, indent=2, ensure_ascii=False)
+        print(f"\n저장: {args.json}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
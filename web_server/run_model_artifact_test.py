@@ -0,0 +1,118 @@
+import glob
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+
+from analysis_runner import analyze_features
+from csv_ingest import read_csv_columns
+from feature_engine import features_from_columns
+import model_artifact
+from model_registry import ModelRegistry
+
+# model_artifact 빌드 -> 서버(ModelRegistry) 로드 확인
+# - 기존 파일 검색 로드와 예측이 같은지 (joblib / MODEL_COMPILED=1)
+# - checksum/sklearn 버전이 맞지 않는 아티팩트는 거부되고 파일 검색으로 넘어가는지
+# - 서비스 중 build한 아티팩트를 재시작 없이 쓰는지
+# - 시작 시 로드 시간
+
+warnings.simplefilter('ignore')
+WORKDIR = Path(__file__).resolve().parent
+ROOT = WORKDIR.parent
+
+files = [ROOT / 'dummy_normal.csv', ROOT / 'dummy_dementia.csv', ROOT / 'yyeepp.csv']
+files += sorted(Path(p) for p in glob.glob(str(WORKDIR / 'uploads' / '*.csv')))
+features = [features_from_columns(read_csv_columns(f)) for f in files]
+
+
+def registry(artifact_dir, mode='auto', compiled=False):
+    os.environ['MODEL_ARTIFACT_DIR'] = artifact_dir
+    os.environ['MODEL_ARTIFACTS'] = mode
+    os.environ['MODEL_COMPILED'] = '1' if compiled else '0'
+    reg = ModelRegistry(start_dir=str(WORKDIR))
+    start = time.perf_counter()
+    reg.load()
+    return reg, (time.perf_counter() - start) * 1000
+
+
+def predictions(reg):
+    out = []
+    for preproc, row0 in features:
+        ml = analyze_features(preproc, row0, registry=reg)['ml']
+        out.append((ml['prediction'], ml['probability']))
+    return out
+
+
+failed = 0
+
+
+def check(label, ok):
+    global failed
+    failed += not ok
+    print(f"{'OK' if ok else 'FAIL':<5} {label}")
+
+
+with tempfile.TemporaryDirectory() as tmp:
+    path = model_artifact.build(str(ROOT / 'BernoulliNB_best.joblib'), str(ROOT / 'displacement_scaler.joblib5'), tmp)
+    manifest = model_artifact.read_manifest(path)
+    check(f"build {os.path.basename(path)}: 입력 {manifest['n_features_in']}개, 패치 {len(manifest['patches'])}개",
+          manifest['n_features_in'] == 90)
+    check("같은 입력으로 다시 build하면 같은 버전",
+          model_artifact.build(str(ROOT / 'BernoulliNB_best.joblib'), str(ROOT / 'displacement_scaler.joblib5'),
+                               tmp) == path)
+
+    legacy, legacy_ms = registry(tmp, mode='off')
+    artifact, artifact_ms = registry(tmp)
+    compiled, compiled_ms = registry(tmp, compiled=True)
+    check(f"아티팩트 로드: {artifact.snapshot().model_version}", artifact.snapshot().model_file.startswith(path))
+    model = artifact.snapshot().model
+    stats = model.named_steps['preprocessor'].named_transformers_['numeric'].named_steps['imputer'].statistics_
+    check(f"배열 메모리 매핑 ({type(stats).__name__})", isinstance(stats, np.memmap))
+    expected = predictions(legacy)
+    check(f"예측 일치 (joblib 아티팩트, {len(files)}개 파일)", predictions(artifact) == expected)
+    check(f"예측 일치 (compiled 아티팩트, {len(files)}개 파일)", predictions(compiled) == expected)
+    print(f"      시작 로드 시간: 파일 검색 {legacy_ms:.1f} ms, 아티팩트 {artifact_ms:.1f} ms, "
+          f"compiled 아티팩트 {compiled_ms:.1f} ms")
+
+    # 변조된 아티팩트 -> 거부, 파일 검색으로 fallback (required면 모델 없음)
+    bad = os.path.join(tmp, 'tampered')
+    shutil.copytree(path, bad)
+    with open(os.path.join(bad, 'model.joblib'), 'ab') as f:
+        f.write(b'\0')
+    shutil.rmtree(path)
+    reg, _ = registry(tmp)
+    rejected = [e for e in reg.load_events if e['status'] == 'rejected']
+    check(f"checksum 불일치 거부 -> 파일 검색 ({reg.snapshot().model_version})",
+          bool(rejected) and reg.snapshot().model_file == str(ROOT / 'BernoulliNB_best.joblib'))
+    reg, _ = registry(tmp, mode='required')
+    check("MODEL_ARTIFACTS=required -> 모델 없음", reg.snapshot().model is None)
+
+    shutil.rmtree(bad)
+    path = model_artifact.build(str(ROOT / 'BernoulliNB_best.joblib'), None, tmp)
+    with open(os.path.join(path, 'manifest.json'), encoding='utf-8') as f:
+        manifest = json.load(f)
+    manifest['sklearn_version'] = '0.0.0'
+    with open(os.path.join(path, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+    reg, _ = registry(tmp)
+    check("sklearn 버전 불일치 거부", any('sklearn' in (e['error'] or '') for e in reg.load_events))
+
+    # 서비스 중 새 아티팩트 build -> 재시작 없이 다음 get()에서 사용 (루트 mtime이 바뀔 때만 다시 찾음)
+    later = os.path.join(tmp, 'later')
+    reg, _ = registry(later)
+    before = reg.get().model_file
+    path = model_artifact.build(str(ROOT / 'BernoulliNB_best.joblib'), str(ROOT / 'displacement_scaler.joblib5'), later)
+    after = reg.get().model_file
+    loads = len(reg.load_events)
+    reg.get()
+    check(f"서비스 중 build한 아티팩트 사용 ({os.path.basename(before)} -> {os.path.relpath(after, later)})",
+          before == str(ROOT / 'BernoulliNB_best.joblib') and after.startswith(path) and len(reg.load_events) == loads)
+
+print('artifact checks:', 'OK' if not failed else f'{failed} FAILED')
+sys.exit(1 if failed else 0)
@@ -0,0 +1,59 @@
+import json
+import time
+
+import numpy as np
+
+from feature_engine import TIME_COL, X_COL, Y_COL, PRESSURE_COL, BUTTON_COL
+from stroke_codec import decode_binary, encode_binary, json_columns_to_columns, records_to_columns
+
+# /analyze_strokes 입력 형식별 payload 크기와 파싱 시간 비교
+# (행 JSON vs 컬럼형 JSON vs 바이너리, json.loads 포함 / feature 계산 제외)
+
+
+def synthetic_columns(n, seed=0):
+    rng = np.random.default_rng(seed)
+    t = 1765925578303 + np.cumsum(rng.integers(5, 20, n))
+    x = np.cumsum(rng.normal(0, 2, n)) + 500
+    y = np.cumsum(rng.normal(0, 2, n)) + 500
+    pressure = np.clip(rng.normal(0.5, 0.1, n), 0, 1)
+    button = (np.arange(n) // 200 % 5 != 4).astype(np.float64)
+    return {TIME_COL: t, X_COL: x, Y_COL: y, PRESSURE_COL: pressure, BUTTON_COL: button}
+
+
+def best_of(fn, n=5):
+    best = float('inf')
+    for _ in range(n):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    print(f"{'samples':>8} {'format':<14} {'bytes':>12} {'parse ms':>10}")
+    for n in (1_000, 10_000, 100_000):
+        cols = synthetic_columns(n)
+        # 프론트엔드가 보내는 것과 같은 float32 정밀도 좌표로 맞춤
+        t = cols[TIME_COL].tolist()
+        x = cols[X_COL].astype(np.float32).tolist()
+        y = cols[Y_COL].astype(np.float32).tolist()
+        p = cols[PRESSURE_COL].astype(np.float32).tolist()
+        b = cols[BUTTON_COL].astype(int).tolist()
+
+        rows = json.dumps({'records': [
+            {'timestamp_ms': t[i], 'x': x[i], 'y': y[i], 'pressure': p[i], 'button': b[i]} for i in range(n)
+        ]}).encode()
+        columnar = json.dumps({'records': {'t': t, 'x': x, 'y': y, 'pressure': p, 'button': b}}).encode()
+        binary = encode_binary(cols)
+
+        cases = [
+            ('rows json', rows, lambda: records_to_columns(json.loads(rows)['records'])),
+            ('columnar json', columnar, lambda: json_columns_to_columns(json.loads(columnar)['records'])),
+            ('binary', binary, lambda: decode_binary(binary)),
+        ]
+        for name, body, fn in cases:
+            print(f"{n:>8} {name:<14} {len(body):>12,} {best_of(fn) * 1000:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,192 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+from analysis_runner import (_read_csv_flexible, analyze, analyze_features, model_input,
+                             preprocess_dataframe, read_columns)
+from feature_engine import dataframe_columns, features_from_columns
+from model_registry import ModelRegistry, find_model_candidates, find_scaler_candidates
+from serialization import sanitize
+import synthetic_handwriting
+
+# analyze() 단계별 시간 측정 (합성 필기 데이터 1k ~ 1M 샘플)
+#   python run_pipeline_benchmark.py                         # 측정 후 benchmarks/latest.json 저장
+#   python run_pipeline_benchmark.py --baseline benchmarks/baseline.json   # 기준과 비교, 느려진 단계가 있으면 exit 1
+#   python run_pipeline_benchmark.py --save-baseline         # 현재 결과를 기준으로 저장
+# 결과 JSON: {"meta": {...}, "results": [{"size", "stage", "best_ms", "median_ms", "repeat"}, ...]}
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SIZES = (1_000, 10_000, 100_000, 1_000_000)
+DEFAULT_OUTPUT = os.path.join(HERE, 'benchmarks', 'latest.json')
+DEFAULT_BASELINE = os.path.join(HERE, 'benchmarks', 'baseline.json')
+
+STAGES = (
+    'csv_read',            # _read_csv_flexible (cp949 -> utf-8 fallback, 전체 컬럼, 참고용)
+    'to_columns',          # DataFrame -> 컬럼 배열 (참고용)
+    'csv_ingest',          # read_columns (csv_ingest: 인코딩 추정 + 필요한 컬럼만 타입 지정, analyze()가 쓰는 경로)
+    'preprocess_dataframe',  # 기존 pandas 전처리 (참고용)
+    'features',            # feature_engine.features_from_columns (analyze()가 쓰는 경로)
+    'model_discovery',     # 모델/스케일러 후보 파일 검색
+    'model_load',          # joblib 로드 + feature 매핑 컴파일 (새 registry)
+    'mapping',             # FeaturePlan.vector
+    'model_input',         # DataFrame 구성 + 스케일러
+    'predict',
+    'predict_proba',
+    'sanitize',            # serialization.sanitize (debug 결과 전체)
+    'analyze_total',       # analyze(csv_path) 전체
+)
+
+
+def _auto_repeat(n):
+    return int(min(20, max(3, 200_000 // max(n, 1))))
+
+
+def time_stage(fn, repeat):
+    # (best_ms, median_ms, 마지막 반환값)
+    times = []
+    out = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return min(times), statistics.median(times), out
+
+
+def bench_size(n, repeat=None, seed=0, workdir=None):
+    repeat = repeat or _auto_repeat(n)
+    path = os.path.join(workdir or tempfile.gettempdir(), f'bench_{n}.csv')
+    synthetic_handwriting.write_csv(path, synthetic_handwriting.generate(n, seed=seed))
+
+    results = {}
+
+    def run(stage, fn, r=repeat):
+        best, median, out = time_stage(fn, r)
+        results[stage] = (best, median, r)
+        return out
+
+    try:
+        df = run('csv_read', lambda: _read_csv_flexible(path))
+        run('to_columns', lambda: dataframe_columns(df))
+        columns = run('csv_ingest', lambda: read_columns(path))
+        run('preprocess_dataframe', lambda: preprocess_dataframe(df))
+        preproc_result, row0 = run('features', lambda: features_from_columns(columns))
+        run('model_discovery', lambda: (find_model_candidates(), find_scaler_candidates()))
+        registry = ModelRegistry()
+        run('model_load', lambda: registry.load(), r=min(repeat, 3))
+        snapshot = registry.get()
+        if snapshot.model is not None and snapshot.plan is not None:
+            model = snapshot.model
+            Xvec = run('mapping', lambda: snapshot.plan.vector(preproc_result, row0))
+            _, X_for_pred = run('model_input', lambda: model_input(snapshot, Xvec))
+            run('predict', lambda: model.predict(X_for_pred))
+            if hasattr(model, 'predict_proba'):
+                run('predict_proba', lambda: model.predict_proba(X_for_pred))
+        result = analyze_features(preproc_result, row0, debug=True, registry=registry)
+        run('sanitize', lambda: sanitize(result))
+        run('analyze_total', lambda: analyze(path, registry=registry))
+    finally:
+        os.remove(path)
+
+    return [{'size': n, 'stage': stage, 'best_ms': round(best, 4), 'median_ms': round(median, 4), 'repeat': r}
+            for stage in STAGES if stage in results
+            for best, median, r in [results[stage]]]
+
+
+def environment():
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'sklearn': sklearn.__version__,
+    }
+
+
+def compare(current, baseline, threshold=0.25, min_ms=2.0):
+    # best_ms 기준으로 threshold(비율) 이상, 그리고 min_ms 이상 느려진 항목을 회귀로 본다 (작은 단계의 잡음 방지)
+    base = {(r['size'], r['stage']): r for r in baseline['results']}
+    rows = []
+    for r in current['results']:
+        b = base.get((r['size'], r['stage']))
+        if b is None:
+            continue
+        ratio = r['best_ms'] / b['best_ms'] if b['best_ms'] > 0 else float('inf')
+        regressed = ratio > 1 + threshold and r['best_ms'] - b['best_ms'] > min_ms
+        rows.append({'size': r['size'], 'stage': r['stage'], 'baseline_ms': b['best_ms'],
+                     'current_ms': r['best_ms'], 'ratio': round(ratio, 3), 'regressed': regressed})
+    return rows
+
+
+def print_results(results):
+    sizes = sorted({r['size'] for r in results})
+    table = {(r['size'], r['stage']): r['best_ms'] for r in results}
+    print(f"{'stage (best ms)':<22}" + ''.join(f"{n:>12,}" for n in sizes))
+    for stage in STAGES:
+        cells = [table.get((n, stage)) for n in sizes]
+        if any(c is not None for c in cells):
+            print(f"{stage:<22}" + ''.join(f"{c:>12.3f}" if c is not None else f"{'-':>12}" for c in cells))
+
+
+def write_json(path, data):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+        f.write('\n')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='analyze() 단계별 벤치마크')
+    parser.add_argument('--sizes', type=lambda s: [int(float(v)) for v in s.split(',')], default=list(DEFAULT_SIZES),
+                        help='샘플 수 목록 (예: 1000,10000,1e6)')
+    parser.add_argument('--repeat', type=int, default=None, help='단계별 반복 횟수 (기본: 크기에 따라 3~20)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='결과 JSON 경로')
+    parser.add_argument('--baseline', default=None, help='비교할 기준 JSON (없으면 비교 안 함)')
+    parser.add_argument('--threshold', type=float, default=0.25, help='회귀로 볼 느려짐 비율 (기본 0.25 = 25%%)')
+    parser.add_argument('--min-ms', type=float, default=2.0, help='이보다 적게 느려진 항목은 무시 (ms, 기본 2)')
+    parser.add_argument('--save-baseline', action='store_true', help=f'결과를 기준 파일로도 저장 ({DEFAULT_BASELINE})')
+    args = parser.parse_args(argv)
+
+    warnings.simplefilter('ignore')
+    results = []
+    for n in args.sizes:
+        print(f"{n:,} samples...", file=sys.stderr, flush=True)
+        results.extend(bench_size(n, repeat=args.repeat, seed=args.seed))
+    current = {'meta': environment(), 'results': results}
+    print_results(results)
+    write_json(args.output, current)
+    print(f"저장: {args.output}")
+    if args.save_baseline:
+        write_json(DEFAULT_BASELINE, current)
+        print(f"기준 저장: {DEFAULT_BASELINE}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        rows = compare(current, baseline, threshold=args.threshold, min_ms=args.min_ms)
+        regressions = [r for r in rows if r['regressed']]
+        current['comparison'] = {'baseline': args.baseline, 'threshold': args.threshold, 'rows': rows}
+        write_json(args.output, current)
+        for r in regressions:
+            print(f"회귀: {r['stage']} @ {r['size']:,}: {r['baseline_ms']:.3f} -> {r['current_ms']:.3f} ms "
+                  f"(x{r['ratio']:.2f})")
+        print(f"기준 대비 {len(rows)}개 항목 비교, 회귀 {len(regressions)}개")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,133 @@
+import argparse
+import glob
+import json
+import sys
+import warnings
+from pathlib import Path
+
+import numpy as np
+
+from analysis_runner import analyze_columns
+from csv_ingest import read_csv_columns
+from feature_engine import FEATURE_KEYS
+from metrics import StageTimer
+from model_registry import default_registry
+from resampling import Resampler
+import synthetic_handwriting
+
+# 리샘플/데시메이션(resampling.py) 설정별로 feature와 예측이 원래 속도 경로에서 얼마나 달라지는지,
+# 큰 입력에서 feature 계산 시간이 얼마나 줄어드는지 보고한다.
+#   python run_resample_report.py --rates 200,100,50,25 --json benchmarks/resample_report.json
+# feature 변화: 파일별 |리샘플 - 원본| / max(|원본|, 1e-12)의 중앙값(JSON에는 최대값도)
+# |Δp|: 치매 확률 변화 (%p)
+
+warnings.simplefilter('ignore')
+WORKDIR = Path(__file__).resolve().parent
+ROOT = WORKDIR.parent
+
+
+def load_inputs(synthetic):
+    files = [ROOT / 'dummy_normal.csv', ROOT / 'dummy_dementia.csv', ROOT / 'yyeepp.csv']
+    files += sorted(Path(p) for p in glob.glob(str(WORKDIR / 'uploads' / '*.csv')))
+    inputs = [(f.name, read_csv_columns(f)) for f in files]
+    inputs += [(f'synthetic_{i}', synthetic_handwriting.generate(5000, seed=100 + i)) for i in range(synthetic)]
+    # 비교할 수 없는 짧은 세션 제외
+    return [(name, c) for name, c in inputs if len(c['시간']) >= 10]
+
+
+def run(columns, resampler):
+    result = analyze_columns(columns, resampler=resampler)
+    ml = result.get('ml') or {}
+    proba = (ml.get('probability') or {}).get('dementia_probability')
+    return result['preprocessing'], ml.get('prediction'), proba, result.get('resample')
+
+
+def relative_delta(a, b):
+    if a is None or b is None:
+        return np.nan
+    if np.isnan(a) and np.isnan(b):
+        return 0.0
+    return abs(b - a) / max(abs(a), 1e-12)
+
+
+def timing(resampler, n, repeat=3):
+    # feature 계산(+리샘플) 시간, ms. 예측은 샘플 수와 무관하므로 제외한 단계 합
+    columns = synthetic_handwriting.generate(n, seed=7)
+    best = None
+    for _ in range(repeat):
+        timer = StageTimer()
+        analyze_columns(columns, timer=timer, resampler=resampler)
+        ms = timer.ms()
+        total = ms.get('resample', 0) + ms.get('features', 0)
+        best = total if best is None else min(best, total)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='리샘플 속도별 feature/예측 변화와 속도 보고')
+    parser.add_argument('--rates', type=lambda s: [float(v) for v in s.split(',')], default=[200, 100, 60, 50, 30, 20])
+    parser.add_argument('--modes', type=lambda s: s.split(','), default=['interp', 'decimate'])
+    parser.add_argument('--synthetic', type=int, default=8, help='추가할 합성 세션 수')
+    parser.add_argument('--timing-samples', type=int, default=1_000_000)
+    parser.add_argument('--json', default=None, help='결과를 JSON으로 저장')
+    args = parser.parse_args(argv)
+
+    default_registry.load()
+    inputs = load_inputs(args.synthetic)
+    baseline = {name: run(columns, False) for name, columns in inputs}
+    configs = [('dedup', Resampler(dedup=True))]
+    configs += [(f'{mode}@{rate:g}Hz', Resampler(rate, mode)) for mode in args.modes for rate in args.rates]
+    raw_ms = timing(False, args.timing_samples)
+    print(f"model: {default_registry.snapshot().model_version}, 세션 {len(inputs)}개, "
+          f"원래 속도 feature 계산 {raw_ms:.0f} ms ({args.timing_samples:,} 샘플)")
+
+    report = {'inputs': len(inputs), 'timing_samples': args.timing_samples, 'raw_ms': raw_ms, 'configs': {}}
+    for label, resampler in configs:
+        deltas = {k: [] for k in FEATURE_KEYS}
+        flips, dprob, ratio = 0, [], []
+        for name, columns in inputs:
+            features, pred, proba, info = run(columns, resampler)
+            base_features, base_pred, base_proba, _ = baseline[name]
+            for k in FEATURE_KEYS:
+                deltas[k].append(relative_delta(base_features[k], features[k]))
+            flips += pred != base_pred
+            if proba is not None and base_proba is not None:
+                dprob.append(abs(proba - base_proba))
+            ratio.append(info['output_samples'] / info['input_samples'])
+        report['configs'][label] = {
+            'samples_ratio': float(np.mean(ratio)),
+            'features_ms': timing(resampler, args.timing_samples),
+            'prediction_flips': int(flips),
+            'mean_abs_dprob': float(np.mean(dprob)) if dprob else None,
+            'max_abs_dprob': float(np.max(dprob)) if dprob else None,
+            'feature_delta_median': {k: float(np.nanmedian(v)) if not np.isnan(v).all() else None
+                                     for k, v in deltas.items()},
+            'feature_delta_max': {k: float(np.nanmax(v)) if not np.isnan(v).all() else None for k, v in deltas.items()},
+        }
+
+    labels = [label for label, _ in configs]
+    print(f"\n{'설정':<16} {'샘플 비율':>9} {'feature ms':>10} {'예측 변경':>9} {'평균|Δp|':>9} {'최대|Δp|':>9}")
+    for label in labels:
+        r = report['configs'][label]
+        fmt = lambda v: f"{v:9.2f}" if v is not None else f"{'-':>9}"
+        print(f"{label:<16} {r['samples_ratio']:>9.3f} {r['features_ms']:>10.0f} "
+              f"{r['prediction_flips']:>5}/{len(inputs):<3} {fmt(r['mean_abs_dprob'])} {fmt(r['max_abs_dprob'])}")
+
+    print("\nfeature별 상대 변화 중앙값 (원래 속도 대비)")
+    print(f"{'feature':<20}" + ''.join(f"{label:>15}" for label in labels))
+    for k in FEATURE_KEYS:
+        cells = []
+        for label in labels:
+            v = report['configs'][label]['feature_delta_median'][k]
+            cells.append(f"{v:>15.3g}" if v is not None else f"{'-':>15}")
+        print(f"{k:<20}" + ''.join(cells))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\n저장: {args.json}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
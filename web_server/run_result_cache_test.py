@@ -0,0 +1,90 @@
+import asyncio
+import os
+import sys
+import tempfile
+import warnings
+
+# main import 전에: 세션 저장 끄기, 결과 캐시는 메모리 + 임시 디렉터리 디스크 캐시로 켠다
+os.environ.setdefault('SESSION_PERSIST', 'off')
+os.environ['RESULT_CACHE_SIZE'] = '64'
+os.environ['RESULT_CACHE_DIR'] = tempfile.mkdtemp(prefix='result_cache_test_')
+
+import httpx
+
+import synthetic_handwriting
+from stroke_codec import BINARY_CONTENT_TYPE, encode_binary
+
+# 결과 캐시 확인:
+# 1. 예측이 실패한 결과(모델 예외, 배치 시간 초과 등)는 캐시하지 않으므로 같은 샘플 재시도가 다시 miss인지
+# 2. 모델이 돌아오면 첫 요청은 miss(예측 성공), 두 번째는 hit인지
+# 3. 같은 세션을 JSON(float)으로 보낸 뒤 바이너리(정수 버튼, float32 압력)로 보내도 hit인지 (형식과 무관한 키)
+#   python run_result_cache_test.py
+
+warnings.simplefilter('ignore')
+
+
+def columnar(columns):
+    return {'t': columns['시간'].tolist(), 'x': columns['X'].tolist(), 'y': columns['Y'].tolist(),
+            'pressure': columns['압력_NORMAL'].tolist(), 'button': columns['버튼'].tolist()}
+
+
+async def check(client, model):
+    ok = True
+    body = {'records': columnar(synthetic_handwriting.generate(2000, seed=4242))}
+
+    def broken(X):
+        raise RuntimeError('forced predict error')
+
+    model.predict_proba = broken
+    try:
+        for attempt in (1, 2):
+            r = await client.post('/analyze_strokes', json=body)
+            ml = r.json().get('ml') or {}
+            cached = r.headers.get('x-cache')
+            ok &= r.status_code == 200 and 'prediction' not in ml and cached == 'miss'
+            print(f"예측 실패 {attempt}번째: X-Cache={cached}, ml={sorted(ml)}")
+    finally:
+        del model.predict_proba
+
+    for attempt, want in ((1, 'miss'), (2, 'hit')):
+        r = await client.post('/analyze_strokes', json=body)
+        ml = r.json().get('ml') or {}
+        cached = r.headers.get('x-cache')
+        ok &= r.status_code == 200 and 'prediction' in ml and cached == want
+        print(f"모델 복구 후 {attempt}번째: X-Cache={cached} (기대 {want}), prediction={ml.get('prediction')}")
+
+    columns = synthetic_handwriting.generate(2000, seed=4343)
+    seen = []
+    for kwargs in ({'json': {'records': columnar(columns)}},
+                   {'content': encode_binary(columns), 'headers': {'Content-Type': BINARY_CONTENT_TYPE}}):
+        r = await client.post('/analyze_strokes', **kwargs)
+        seen.append(r.headers.get('x-cache'))
+    ok &= seen == ['miss', 'hit']
+    print(f"같은 세션 JSON -> 바이너리: X-Cache {seen} (기대 ['miss', 'hit'])")
+    return ok
+
+
+async def run():
+    import main
+    from model_registry import default_registry
+    from readiness import readiness
+
+    async with main.lifespan(main.app):
+        for _ in range(600):
+            if readiness.status()['ready']:
+                break
+            await asyncio.sleep(0.1)
+        model = default_registry.get().model
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://cachetest', timeout=300) as client:
+            return await check(client, model)
+
+
+def main():
+    ok = asyncio.run(run())
+    print('OK' if ok else 'FAILED')
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
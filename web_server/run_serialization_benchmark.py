@@ -0,0 +1,95 @@
+import json
+import sys
+import time
+import warnings
+
+import numpy as np
+
+from analysis_runner import _sanitize_value, analyze_columns
+from feature_bank import FeatureBank
+from feature_engine import features_from_columns
+from model_registry import default_registry
+import serialization
+from stroke_features import strokes_from_columns
+import synthetic_handwriting
+
+# 결과 직렬화 비교: 기존 경로(_sanitize_value + JSONResponse의 json.dumps)와 serialization(sanitize + orjson/json).
+# 같은 JSON이 나오는지 확인하고, 큰 결과(debug, 획별 통계, 여러 세션 묶음)에서 시간을 잰다.
+#   python run_serialization_benchmark.py
+# 'raw': sanitize 없이 NumPy 배열/NaN이 든 원래 결과를 바로 dumps (orjson일 때만)
+# float32 배열/스칼라(저메모리 모드의 미분 값 등)도 세 경로가 같은 값(float64 표기)으로 쓰는지 확인
+
+warnings.simplefilter('ignore')
+
+
+def legacy_render(content):
+    # starlette JSONResponse.render
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(',', ':')).encode('utf-8')
+
+
+def best_of(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        t = time.perf_counter() - start
+        best = t if best is None else min(best, t)
+    return best * 1000
+
+
+def payloads():
+    # (이름, 원래 결과(NumPy/NaN 포함), 반복 횟수)
+    debug = analyze_columns(synthetic_handwriting.generate(2000, seed=1), debug=True, resampler=False)
+    columns = synthetic_handwriting.generate(1_000_000, seed=2)
+    derived = {}
+    features, _ = features_from_columns(columns, derived=derived)
+    strokes = strokes_from_columns(columns, derived)
+    bank = FeatureBank({'on_paper': range(1, 33), 'in_air': range(1, 33)},
+                       {(sig, state): range(5, 100, 5) for sig in ('speed', 'acc', 'jerk')
+                        for state in ('on_paper', 'in_air')})
+    wide = dict(features, **bank.compute(columns, derived))
+    batch = [analyze_columns(synthetic_handwriting.generate(500, seed=10 + i), debug=True, resampler=False)
+             for i in range(200)]
+    speed32 = derived['speed'][:100_000].astype(np.float32)
+    speed32[::97] = np.nan
+    float32 = {'speed': speed32, 'mean': np.float32(0.1), 'stats': [np.float32(v) for v in speed32[:1000:10]]}
+    return [
+        ('debug 결과 1개', debug, 200),
+        (f"획별 통계 ({strokes['count']:,}획)", {'preprocessing': features, 'strokes': strokes}, 5),
+        (f'feature {len(wide)}개', {'preprocessing': wide}, 200),
+        (f'debug 결과 {len(batch)}개 묶음', {'results': batch}, 5),
+        (f'float32 {len(speed32):,}개', float32, 20),
+    ]
+
+
+def main():
+    default_registry.load()
+    ok = True
+    has_orjson = serialization.dumps_orjson is not None
+    print(f"encoder: {serialization.ENCODER} (orjson {'있음' if has_orjson else '없음'})")
+    print(f"{'payload':<26} {'KB':>7} {'기존 ms':>9} {'json ms':>9} {'orjson ms':>10} {'raw ms':>8} {'속도 향상':>9}")
+    for name, raw, repeat in payloads():
+        legacy = legacy_render(_sanitize_value(raw))
+        expected = json.loads(legacy)
+        same = json.loads(serialization.dumps_json(raw)) == expected
+        if has_orjson:
+            same &= json.loads(serialization.dumps_orjson(serialization.sanitize(raw))) == expected
+            same &= json.loads(serialization.dumps_orjson(raw)) == expected
+        ok &= same
+        old_ms = best_of(lambda: legacy_render(_sanitize_value(raw)), repeat)
+        json_ms = best_of(lambda: serialization.dumps_json(raw), repeat)
+        if has_orjson:
+            orjson_ms = best_of(lambda: serialization.dumps_orjson(serialization.sanitize(raw)), repeat)
+            raw_ms = best_of(lambda: serialization.dumps_orjson(raw), repeat)
+        else:
+            orjson_ms = raw_ms = None
+        fmt = lambda v, w: f"{v:>{w}.2f}" if v is not None else f"{'-':>{w}}"
+        new_ms = orjson_ms if orjson_ms is not None else json_ms
+        print(f"{name:<26} {len(legacy) / 1024:>7.0f} {old_ms:>9.2f} {json_ms:>9.2f} {fmt(orjson_ms, 10)} "
+              f"{fmt(raw_ms, 8)} {old_ms / new_ms:>8.1f}x{'' if same else '  불일치'}")
+    print('OK' if ok else 'FAILED')
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
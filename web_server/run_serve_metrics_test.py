@@ -0,0 +1,100 @@
+import argparse
+import os
+import re
+import signal
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+# serve.py 멀티 워커에서 /metrics가 모든 워커의 값을 합치는지 확인:
+# 1. 요청 N개를 보낸 뒤 어느 워커가 답하든 http_requests_total 합계가 N이고 scrape마다 같은지
+# 2. 워커 하나를 SIGKILL로 죽여서 다시 뜬 뒤에도 합계가 줄지 않는지 (counter 이어받기)
+#   python run_serve_metrics_test.py --workers 3
+
+WORKDIR = Path(__file__).resolve().parent
+REQUESTS = 60
+FLUSH = 0.5
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_ready(base, timeout=120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f'{base}/ready', timeout=1.0).status_code == 200:
+                return True
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    return False
+
+
+def status_requests(base):
+    # /metrics에 나온 /status 요청 수 (모든 워커 합계)
+    r = httpx.get(f'{base}/metrics', timeout=5.0)
+    total = sum(float(v) for v in re.findall(r'^http_requests_total\{endpoint="/status"[^}]*\} (\S+)$', r.text, re.M))
+    return total
+
+
+def children(pid):
+    with open(f'/proc/{pid}/task/{pid}/children') as f:
+        return [int(p) for p in f.read().split()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='serve.py 멀티 워커의 /metrics 합산 확인')
+    parser.add_argument('--workers', type=int, default=3)
+    args = parser.parse_args(argv)
+    port = free_port()
+    base = f'http://127.0.0.1:{port}'
+    env = dict(os.environ, SESSION_PERSIST='off', METRICS_FLUSH_SECONDS=str(FLUSH))
+    proc = subprocess.Popen([sys.executable, 'serve.py', '--workers', str(args.workers), '--port', str(port),
+                             '--log-level', 'warning'], cwd=WORKDIR, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    ok = True
+    try:
+        if not wait_ready(base):
+            print('서버가 준비되지 않았습니다')
+            return 1
+        with httpx.Client(base_url=base) as client:
+            for _ in range(REQUESTS):
+                client.get('/status')
+        time.sleep(FLUSH * 3)
+        scrapes = [status_requests(base) for _ in range(10)]
+        same = all(v == REQUESTS for v in scrapes)
+        ok &= same
+        print(f"워커 {args.workers}개, /status {REQUESTS}번: scrape 10번의 합계 {sorted(set(scrapes))} {'OK' if same else 'FAILED'}")
+
+        victim = children(proc.pid)[0]
+        os.kill(victim, signal.SIGKILL)
+        time.sleep(1.5)
+        if not wait_ready(base):
+            print('워커가 다시 뜨지 않았습니다')
+            return 1
+        time.sleep(FLUSH * 3)
+        scrapes = [status_requests(base) for _ in range(10)]
+        kept = all(v >= REQUESTS for v in scrapes)
+        ok &= kept
+        print(f"워커 하나 재시작 후 합계 {sorted(set(scrapes))} (줄지 않아야 함) {'OK' if kept else 'FAILED'}")
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+    print('OK' if ok else 'FAILED')
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,154 @@
+import glob
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+
+from csv_ingest import read_csv_columns
+from feature_engine import features_from_columns
+from session_store import COLUMNS, SessionStore, import_csvs
+import synthetic_handwriting
+
+# 세션 저장소(session_store.py) 확인:
+# CSV -> 저장소 -> NumPy 왕복이 값/dtype/feature를 바꾸지 않는지, 크기와 읽기 속도,
+# COLUMNS 밖 컬럼(Z 등)의 첫 행 값, segment rotate, 보존 정책, compaction, 여러 프로세스의 동시 append,
+# index 재생성, main import만으로 저장 디렉토리가 생기지 않는지
+
+warnings.simplefilter('ignore')
+WORKDIR = Path(__file__).resolve().parent
+ROOT = WORKDIR.parent
+
+
+def same_columns(expected, actual):
+    for col in COLUMNS:
+        if col not in expected:
+            if col in actual:
+                return False
+            continue
+        a, b = np.asarray(expected[col]), actual.get(col)
+        if b is None or a.dtype != b.dtype or not np.array_equal(a, b, equal_nan=a.dtype.kind == 'f'):
+            return False
+    return True
+
+
+def _append_many(root, seed, count):
+    store = SessionStore(root, segment_bytes=64 << 10)
+    for i in range(count):
+        store.append(synthetic_handwriting.generate(200, seed=seed * 1000 + i), source='test')
+
+
+def main():
+    ok = True
+    files = [ROOT / 'dummy_normal.csv', ROOT / 'dummy_dementia.csv', ROOT / 'yyeepp.csv']
+    files += sorted(Path(p) for p in glob.glob(str(WORKDIR / 'uploads' / '*.csv')))
+    tmp = tempfile.mkdtemp(prefix='session_store_')
+    try:
+        # 1. 왕복 + feature 동일
+        store = SessionStore(os.path.join(tmp, 'corpus'))
+        imported, failed = import_csvs(store, [str(f) for f in files])
+        entries = {e['name']: e for e in store.entries()}
+        roundtrip = 0
+        for f in files:
+            expected = read_csv_columns(f)
+            actual = store.read(entries[f.name]['id'])
+            same = same_columns(expected, actual) and features_from_columns(expected)[0] == features_from_columns(actual)[0]
+            roundtrip += same
+            if not same:
+                print(f"불일치: {f.name}")
+        ok &= roundtrip == len(files) and not failed
+        print(f"왕복 (값/dtype/feature 동일): {roundtrip}/{len(files)}")
+
+        csv_bytes = sum(os.path.getsize(f) for f in set(files))
+        status = store.status()
+        print(f"크기: CSV {csv_bytes / 1024:.0f} KB ({len(set(files))}개 파일) -> 저장소 {status['bytes'] / 1024:.0f} KB "
+              f"(index {os.path.getsize(store.index_path) / 1024:.1f} KB)")
+
+        start = time.perf_counter()
+        for f in files:
+            read_csv_columns(f)
+        csv_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        n = sum(1 for _ in store.iter_sessions())
+        store_ms = (time.perf_counter() - start) * 1000
+        print(f"전체 읽기: CSV 파싱 {csv_ms:.1f} ms, 저장소 {store_ms:.1f} ms ({n}개 세션)")
+
+        # 1-1. COLUMNS 밖 컬럼: 첫 행 값이 index에 남아 다시 읽어도 row0(모델의 원본 컬럼 입력)가 같다
+        extra = synthetic_handwriting.generate(300, seed=3)
+        extra['Z'] = np.linspace(12.5, 40.0, 300)
+        extra['기울기'] = np.arange(7, 307, dtype=np.int64)
+        restored = store.read(store.append(extra, source='test'))
+        expected_row0 = features_from_columns(extra)[1]
+        actual_row0 = features_from_columns(restored)[1]
+        same = all(actual_row0.get(c) == expected_row0[c] for c in ('Z', '기울기'))
+        same &= features_from_columns(extra)[0] == features_from_columns(restored)[0]
+        ok &= same
+        print(f"COLUMNS 밖 컬럼의 첫 행: Z={actual_row0.get('Z')}, 기울기={actual_row0.get('기울기')} "
+              f"{'OK' if same else 'FAILED'}")
+
+        # 2. rotate / 보존 정책 / compaction
+        small = SessionStore(os.path.join(tmp, 'rotate'), segment_bytes=32 << 10, compact_ratio=0.5)
+        now = time.time()
+        # 짝수 번째 세션만 오래된 것으로: 모든 segment에 삭제된 레코드가 절반씩 생긴다
+        ids = [small.append(synthetic_handwriting.generate(500, seed=i), source='test',
+                            ts=now - (40 if i % 2 == 0 else 1) * 3600)
+               for i in range(40)]
+        before = small.status()
+        small.retention = 20 * 3600
+        expired = small.apply_retention(now=now)
+        compacted = small.compact()
+        after = small.status()
+        live = {e['id'] for e in small.entries()}
+        readable = all(same_columns(synthetic_handwriting.generate(500, seed=i), small.read(sid))
+                       for i, sid in enumerate(ids) if sid in live)
+        print(f"rotate/보존/compaction: segment {before['segments']} -> {after['segments']}, "
+              f"{before['bytes'] // 1024} KB -> {after['bytes'] // 1024} KB, 만료 {expired}, "
+              f"compaction {compacted}, 남은 세션 읽기 {'OK' if readable else 'FAILED'}")
+        ok &= before['segments'] > 1 and expired == 20 and len(live) == 20 and readable
+        ok &= compacted > 0 and after['bytes'] < before['bytes'] * 0.6
+
+        small.max_bytes = after['live_bytes'] // 2
+        small.retention = None
+        small.apply_retention()
+        ok &= small.status()['live_bytes'] <= small.max_bytes
+
+        # 3. 여러 프로세스가 동시에 append (serve.py 워커와 같은 상황)
+        shared = os.path.join(tmp, 'shared')
+        procs = [multiprocessing.Process(target=_append_many, args=(shared, seed, 50)) for seed in range(4)]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
+        shared_store = SessionStore(shared)
+        entries = shared_store.entries()
+        sessions = list(shared_store.iter_sessions())
+        ok &= len(entries) == 200 and len(sessions) == 200
+        print(f"동시 append (4 프로세스 x 50): index {len(entries)}, 읽기 {len(sessions)}, "
+              f"segment {shared_store.status()['segments']}")
+
+        # 4. index 재생성
+        os.remove(shared_store.index_path)
+        rebuilt = SessionStore(shared).rebuild_index()
+        ok &= rebuilt == 200
+        print(f"index 재생성: {rebuilt}개 세션")
+
+        # 5. main import만으로는 저장 디렉토리를 만들지 않는다 (lifespan에서 생성)
+        lazy = os.path.join(tmp, 'lazy')
+        subprocess.run([sys.executable, '-c', 'import main'], cwd=WORKDIR, check=True,
+                       env=dict(os.environ, SESSION_STORE_DIR=lazy, SESSION_PERSIST='store'))
+        ok &= not os.path.exists(lazy)
+        print(f"main import 후 저장 디렉토리: {'없음 OK' if not os.path.exists(lazy) else '생김 FAILED'}")
+    finally:
+        shutil.rmtree(tmp)
+    print('OK' if ok else 'FAILED')
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,99 @@
+import glob
+import sys
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from csv_ingest import read_csv_columns
+from feature_engine import BUTTON_COL, PRESSURE_COL, features_from_columns
+from stroke_features import STROKE_FIELDS, strokes_from_columns
+import synthetic_handwriting
+
+# 획 세그먼트/획별 통계(stroke_features)를 pandas groupby-apply로 만든 기준값과 비교하고,
+# 획별 합이 세션 feature(num_of_pendown, mean_speed_on_paper 등)와 맞는지, 획 수가 많을 때 속도를 확인
+
+warnings.simplefilter('ignore')
+WORKDIR = Path(__file__).resolve().parent
+ROOT = WORKDIR.parent
+
+
+def reference(columns):
+    # 기준 구현: 획 id를 붙인 DataFrame에서 groupby-apply (느리지만 단순)
+    result, _ = features_from_columns(columns)
+    derived = {}
+    features_from_columns(columns, derived=derived)
+    df = pd.DataFrame({'t': derived['time_diff'], 'button': columns[BUTTON_COL], 'dist': derived['distance'],
+                       'speed': derived['speed'], 'jerk': derived['jerk']})
+    if PRESSURE_COL in columns:
+        df['p'] = np.asarray(columns[PRESSURE_COL], dtype=np.float64)
+    down = df['button'] == 1
+    df['stroke'] = (down & ~down.shift(fill_value=False)).cumsum().where(down)
+    rows = []
+    prev_end_t = df['t'].iloc[0]
+    for _, g in df[down].groupby('stroke'):
+        row = {
+            'start': g.index[0], 'end': g.index[-1] + 1, 'n_samples': len(g),
+            'duration': g['t'].iloc[-1] - g['t'].iloc[0],
+            'length': g['dist'].iloc[1:].fillna(0).sum(),
+            'mean_speed': g['speed'].mean(), 'mean_jerk': g['jerk'].mean(),
+            'gap_before': g['t'].iloc[0] - prev_end_t,
+        }
+        if 'p' in g:
+            row.update(pressure_mean=g['p'].mean(), pressure_max=g['p'].max(), pressure_std=g['p'].std(ddof=0))
+        prev_end_t = g['t'].iloc[-1]
+        rows.append(row)
+    return result, rows
+
+
+def compare(name, columns):
+    session, rows = reference(columns)
+    table = strokes_from_columns(columns)
+    ok = table['count'] == len(rows)
+    for f in STROKE_FIELDS:
+        if table[f] is None:
+            continue
+        expected = np.array([r[f] for r in rows], dtype=np.float64)
+        ok &= np.allclose(np.asarray(table[f], dtype=np.float64), expected, rtol=1e-9, atol=1e-9, equal_nan=True)
+    # 세션 feature와의 관계 (num_of_pendown은 0->1 전이만 세므로 버튼 값이 0/1뿐일 때만 획 수와 비교)
+    button = np.asarray(columns[BUTTON_COL])
+    if np.isin(button, (0, 1)).all():
+        ok &= table['count'] == session['num_of_pendown'] + int(button[0] == 1)
+    ok &= int(table['n_samples'].sum()) == session['paper_time']
+    if table['count']:
+        speed = float((table['mean_speed'] * table['n_samples']).sum() / table['n_samples'].sum())
+        ok &= bool(np.isclose(speed, session['mean_speed_on_paper'], rtol=1e-9))
+    print(f"{name:<32} strokes={table['count']:>5} {'OK' if ok else 'MISMATCH'}")
+    return ok
+
+
+def main():
+    files = [ROOT / 'dummy_normal.csv', ROOT / 'dummy_dementia.csv', ROOT / 'yyeepp.csv']
+    files += sorted(Path(p) for p in glob.glob(str(WORKDIR / 'uploads' / '*.csv')))
+    ok = True
+    for f in files:
+        columns = read_csv_columns(f)
+        if BUTTON_COL in columns:
+            ok &= compare(f.name, columns)
+    ok &= compare('synthetic 100k', synthetic_handwriting.generate(100_000, seed=3))
+
+    # 획 수가 많은 세션 속도: reduceat vs groupby-apply
+    columns = synthetic_handwriting.generate(1_000_000, seed=5)
+    derived = {}
+    features_from_columns(columns, derived=derived)
+    start = time.perf_counter()
+    table = strokes_from_columns(columns, derived)
+    fast = time.perf_counter() - start
+    start = time.perf_counter()
+    reference(columns)
+    slow = time.perf_counter() - start
+    print(f"1M samples, {table['count']} strokes: stroke_features {fast * 1000:.1f} ms, "
+          f"groupby-apply {slow * 1000:.0f} ms (features 재계산 포함)")
+    print('OK' if ok else 'FAILED')
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
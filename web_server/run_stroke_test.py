@@ -21,3 +21,19 @@ try:
     print('json_response:', resp.json())
 except Exception as e:
     print('failed to decode json:', e, 'text:', resp.text)
+
+# /ws/strokes: records가 리스트가 아니면 연결을 끊지 않고 에러 메시지를 보낸 뒤 계속 받는다
+ws_ok = True
+with client.websocket_connect('/ws/strokes') as ws:
+    for bad in (5, 'x', {'t': [now]}, None):
+        ws.send_json({'type': 'samples', 'records': bad})
+        reply = ws.receive_json()
+        ws_ok &= reply == {'type': 'error', 'error': 'No records provided'}
+        print('ws records', repr(bad), '->', reply)
+    ws.send_json({'type': 'samples', 'records': records, 'ack': True})
+    reply = ws.receive_json()
+    ws_ok &= reply.get('type') == 'ack' and reply.get('n') == len(records)
+    print('ws after bad records:', reply)
+print('ws records check:', 'OK' if ws_ok else 'FAILED')
+if not ws_ok:
+    raise SystemExit(1)
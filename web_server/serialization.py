@@ -0,0 +1,108 @@
+import json
+import math
+import os
+
+import numpy as np
+import pandas as pd
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# 분석 결과 <-> JSON (응답, 웹소켓 메시지, 결과 캐시 디스크 파일이 함께 사용)
+#   sanitize(v)  NaN/Inf -> None, NumPy 스칼라/배열 -> Python 기본 타입. 배열은 tolist() 한 번에 바꾸고
+#                유한하지 않은 값이 있을 때만 그 위치를 None으로 (원소마다 isnan을 부르지 않음)
+#   dumps(v)     -> bytes. orjson이 있으면 orjson (NumPy 값만 default에서 sanitize), 없으면 sanitize + json.
+#                두 경우 모두 float32는 float64 값으로 쓴다 (0.1f -> 0.10000000149011612, 기존 json 경로와 같음)
+#   loads(b)     bytes/str -> 객체
+# JSON_ENCODER=auto(기본)/orjson/json
+_ENCODERS = ('auto', 'orjson', 'json')
+ENCODER = os.environ.get('JSON_ENCODER', 'auto')
+if ENCODER not in _ENCODERS:
+    raise ValueError(f"JSON_ENCODER는 {'/'.join(_ENCODERS)} 중 하나여야 합니다: {ENCODER}")
+if ENCODER == 'auto':
+    ENCODER = 'orjson' if orjson is not None else 'json'
+elif ENCODER == 'orjson' and orjson is None:
+    raise ValueError("JSON_ENCODER=orjson이지만 orjson이 설치되어 있지 않습니다")
+
+
+def _array(a):
+    kind = a.dtype.kind
+    if kind == 'f':
+        finite = np.isfinite(a)
+        if finite.all():
+            return a.tolist()
+        out = a.astype(object)
+        out[~finite] = None
+        return out.tolist()
+    if kind in 'iub':
+        return a.tolist()
+    # object/복소수/날짜 등: 원소별로
+    return sanitize(a.tolist())
+
+
+def sanitize(v):
+    # analysis_runner._sanitize_value와 같은 결과 (bool은 0/1 대신 그대로)
+    t = type(v)
+    if v is None or t is str or t is int or t is bool:
+        return v
+    if t is float:
+        return v if math.isfinite(v) else None
+    if t is dict:
+        return {k if type(k) is str else str(k): sanitize(x) for k, x in v.items()}
+    if t is list or t is tuple:
+        return [sanitize(x) for x in v]
+    if isinstance(v, np.ndarray):
+        return _array(v)
+    if isinstance(v, (np.floating, float)):
+        return float(v) if math.isfinite(v) else None
+    if isinstance(v, (np.integer, int)):
+        return int(v)
+    if isinstance(v, np.bool_):
+        return bool(v)
+    if isinstance(v, dict):
+        return {str(k): sanitize(x) for k, x in v.items()}
+    if isinstance(v, (list, tuple)):
+        return [sanitize(x) for x in v]
+    # pandas NA/NaT 등
+    try:
+        if pd.isna(v):
+            return None
+    except (TypeError, ValueError):
+        pass
+    return v
+
+
+def dumps_json(v):
+    return json.dumps(sanitize(v), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+if orjson is not None:
+    # OPT_SERIALIZE_NUMPY는 쓰지 않는다: float32를 float32의 가장 짧은 표기(0.1)로 써서 json 경로와 값이 달라진다
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def _orjson_default(v):
+        # orjson이 직접 못 쓰는 값 (NumPy 배열/스칼라, pandas 값 등)
+        out = sanitize(v)
+        if out is v:
+            raise TypeError(f"JSON으로 바꿀 수 없는 값: {type(v).__name__}")
+        return out
+
+    def dumps_orjson(v):
+        return orjson.dumps(v, default=_orjson_default, option=_ORJSON_OPTIONS)
+else:
+    dumps_orjson = None
+
+
+dumps = dumps_orjson if ENCODER == 'orjson' else dumps_json
+loads = orjson.loads if ENCODER == 'orjson' else json.loads
+
+
+class FastJSONResponse(JSONResponse):
+    # JSONResponse와 같지만 dumps()로 직렬화 (NumPy 값과 NaN/Inf도 그대로 넘겨도 됨)
+
+    def render(self, content):
+        return dumps(content)
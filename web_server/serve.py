@@ -0,0 +1,145 @@
+import argparse
+import gc
+import glob
+import os
+import shutil
+import signal
+import sys
+import tempfile
+import time
+import traceback
+
+import uvicorn
+
+
+# 운영 실행: 모델/스케일러/feature 매핑을 부모 프로세스에서 한 번 로드한 뒤 워커를 fork한다.
+# 워커들은 로드된 객체를 copy-on-write로 공유하고(아티팩트는 mmap), 같은 listen 소켓에서 요청을 받는다.
+#   python serve.py                       # WEB_WORKERS (기본 auto = CPU 수)
+#   python serve.py --workers 4 --port 8000
+#   python serve.py --reload              # 개발용: 단일 프로세스 + 코드 변경 시 재시작
+# 워커마다 시작 후 합성 데이터로 한 번 예측해 보고(warm-up), 모든 워커가 성공해야 GET /ready가 200.
+# 워커가 죽으면 다시 띄운다. SIGTERM/SIGINT는 모든 워커에 전달하고 종료를 기다린다.
+# /metrics는 모든 워커의 값을 합친다: 워커마다 METRICS_FLUSH_SECONDS(기본 1)마다 METRICS_DIR(기본 임시 디렉토리)에
+# 자기 값을 남기고, 요청을 받은 워커가 합쳐서 답한다 (metrics.MetricsRegistry).
+
+
+def worker_count(value):
+    if value in (None, '', 'auto'):
+        return os.cpu_count() or 1
+    n = int(value)
+    if n < 1:
+        raise ValueError(f"워커 수는 1 이상이어야 합니다: {value}")
+    return n
+
+
+def _run_worker(config, sock, index, metrics_dir):
+    from metrics import metrics
+    from readiness import readiness
+
+    # 부모의 시그널 핸들러 대신 uvicorn 자체 처리 (graceful shutdown)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    readiness.set_worker(index)
+    metrics.enable_multiprocess(metrics_dir, index, float(os.environ.get('METRICS_FLUSH_SECONDS', '1')))
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def serve(host, port, workers, log_level='info'):
+    # 워커 한 개당 분석 스레드 수: 지정이 없으면 CPU를 워커끼리 나눠 쓴다 (main import 전에 정해야 함)
+    os.environ.setdefault('ANALYSIS_WORKERS', str(max(1, (os.cpu_count() or 1) // workers)))
+    import main
+    from model_registry import default_registry
+    from readiness import readiness
+
+    snapshot = default_registry.load()
+    print(f"[serve] 모델 로드: {snapshot.model_version} (scaler {snapshot.scaler_version}), 워커 {workers}개",
+          file=sys.stderr, flush=True)
+    readiness.configure(workers)
+    # 이전 실행이 남긴 워커 파일은 지운다 (새 실행의 counter는 0부터)
+    metrics_dir = os.environ.get('METRICS_DIR')
+    created_dir = not metrics_dir
+    if created_dir:
+        metrics_dir = tempfile.mkdtemp(prefix='serve-metrics-')
+    os.makedirs(metrics_dir, exist_ok=True)
+    for path in glob.glob(os.path.join(metrics_dir, 'worker-*.json')):
+        os.remove(path)
+    config = uvicorn.Config(main.app, host=host, port=port, log_level=log_level, lifespan='on')
+    sock = config.bind_socket()
+    # fork 전에 지금까지 만든 객체를 GC 추적에서 빼서, 워커의 GC가 공유 페이지를 건드려 복사되지 않게 한다
+    gc.collect()
+    gc.freeze()
+
+    children = {}
+    started = {}
+    stopping = False
+
+    def spawn(index):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                _run_worker(config, sock, index, metrics_dir)
+            except SystemExit as e:
+                code = e.code if isinstance(e.code, int) else 1
+            except BaseException:
+                traceback.print_exc()
+                code = 1
+            os._exit(code)
+        children[pid] = index
+        started[index] = time.monotonic()
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for i in range(workers):
+        spawn(i)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        index = children.pop(pid, None)
+        if index is None:
+            continue
+        readiness.clear(index)
+        if not stopping:
+            print(f"[serve] 워커 {index} (pid {pid}) 종료 (status {status}), 다시 시작",
+                  file=sys.stderr, flush=True)
+            # 시작하자마자 죽는 경우 재시작을 너무 빠르게 반복하지 않도록
+            if time.monotonic() - started[index] < 1.0:
+                time.sleep(1.0)
+            spawn(index)
+    sock.close()
+    if created_dir:
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='분석 서버 실행 (멀티 워커)')
+    parser.add_argument('--host', default=os.environ.get('WEB_HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('WEB_PORT', '8000')))
+    parser.add_argument('--workers', default=os.environ.get('WEB_WORKERS', 'auto'),
+                        help='워커 프로세스 수 또는 auto (CPU 수)')
+    parser.add_argument('--reload', action='store_true', default=os.environ.get('WEB_RELOAD', '0') == '1',
+                        help='개발용: 단일 프로세스 + 코드 변경 시 자동 재시작 (WEB_RELOAD=1)')
+    parser.add_argument('--log-level', default=os.environ.get('WEB_LOG_LEVEL', 'info'))
+    args = parser.parse_args(argv)
+
+    if args.reload:
+        uvicorn.run('main:app', host=args.host, port=args.port, reload=True, log_level=args.log_level)
+        return 0
+    serve(args.host, args.port, worker_count(args.workers), args.log_level)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,495 @@
+import argparse
+import fcntl
+import glob
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+from feature_engine import BUTTON_COL, PRESSURE_COL, TIME_COL, X_COL, Y_COL
+
+
+# 요청마다 uploads/에 CSV를 하나씩 쓰는 대신, 세션 샘플을 바이너리 컬럼 형식으로 segment 파일에 이어 붙인다.
+#   <root>/seg-000001.bin ...  세션 레코드를 append만 하는 파일. SEGMENT_MB를 넘으면 다음 번호로 rotate
+#   <root>/index.jsonl         세션 id -> segment/offset/length, 시각, 출처, 모델 결과 요약 (한 줄에 한 세션)
+#                              + 'row0': COLUMNS 밖 컬럼(Z 등)의 첫 행 값 (있을 때만)
+#   <root>/.lock               여러 워커 프로세스(serve.py)가 같은 저장소에 쓸 때의 flock
+# 읽을 때는 레코드 bytes를 한 번 읽어 np.frombuffer로 컬럼을 만든다 (텍스트 파싱 없음).
+# COLUMNS 밖의 컬럼은 분석이 첫 행(row0)만 쓰므로 첫 행 값만 index에 남기고, 읽을 때 그 값을 반복한
+# 읽기 전용 배열로 되돌린다 (모델이 원본 컬럼을 입력으로 쓰는 경우 다시 채점해도 같은 결과)
+# 보존 기간/전체 크기를 넘은 세션은 index에서 빠지고, 살아 있는 데이터 비율이 낮은 segment는 compaction으로 다시 쓴다.
+#   SESSION_STORE_DIR            저장 위치 (기본 web_server/sessions)
+#   SESSION_STORE_SEGMENT_MB=64  segment 크기
+#   SESSION_STORE_RETENTION_DAYS=0  이보다 오래된 세션 삭제 (0이면 무기한)
+#   SESSION_STORE_MAX_MB=0       전체 크기 상한, 넘으면 오래된 세션부터 삭제 (0이면 무제한)
+#   SESSION_STORE_COMPACT_RATIO=0.5  삭제된 데이터가 이 비율 이상인 segment를 compaction
+COLUMNS = (TIME_COL, X_COL, Y_COL, PRESSURE_COL, BUTTON_COL)
+
+# 레코드 = header 40 bytes + 컬럼 5개 (각각 8 bytes 경계로 padding, 없는 컬럼은 0 bytes)
+RECORD_MAGIC = b'SES1'
+_HEADER = np.dtype([('magic', 'S4'), ('n', '<u4'), ('ts', '<f8'), ('id', 'V16'), ('codes', 'u1', (5,)), ('pad', 'V3')])
+# 컬럼 dtype 코드: 하위 4비트 = 저장 dtype, _AS_FLOAT 비트 = 읽을 때 float64로 (원래 float 컬럼)
+_STORAGE = {1: np.dtype('u1'), 2: np.dtype('<i4'), 3: np.dtype('<i8'), 4: np.dtype('<f4'), 5: np.dtype('<f8')}
+_AS_FLOAT = 0x10
+_SEGMENT_RE = re.compile(r'seg-(\d+)\.bin$')
+
+
+def _storage_code(a):
+    # 값이 바뀌지 않는 가장 작은 dtype (태블릿 좌표/시간은 보통 정수, 버튼은 0/1, 압력은 float32로 충분)
+    if a.size and a.dtype.kind == 'f':
+        finite = np.isfinite(a)
+        if finite.all() and np.array_equal(a, np.trunc(a)):
+            return _int_code(a.min(), a.max()) | _AS_FLOAT
+        if np.array_equal(a.astype('<f4').astype(np.float64), a, equal_nan=True):
+            return 4 | _AS_FLOAT
+        return 5 | _AS_FLOAT
+    if a.dtype.kind in 'iub':
+        return _int_code(a.min(), a.max()) if a.size else 2
+    raise TypeError(f"저장할 수 없는 컬럼 dtype: {a.dtype}")
+
+
+def _int_code(lo, hi):
+    if 0 <= lo and hi <= 255:
+        return 1
+    if -2 ** 31 <= lo and hi < 2 ** 31:
+        return 2
+    return 3
+
+
+def _padded(nbytes):
+    return (nbytes + 7) & ~7
+
+
+def encode_record(session_id, ts, columns):
+    # session_id: 16 bytes (uuid), columns: {컬럼명: 배열}. COLUMNS 밖의 컬럼(Z 등)은 저장하지 않는다
+    n = len(columns[TIME_COL])
+    header = np.zeros(1, dtype=_HEADER)
+    header['magic'] = RECORD_MAGIC
+    header['n'] = n
+    header['ts'] = ts
+    header['id'] = np.void(session_id)
+    parts = [None]
+    for i, col in enumerate(COLUMNS):
+        v = columns.get(col)
+        if v is None:
+            continue
+        a = np.asarray(v)
+        if a.dtype.kind not in 'iubf':
+            a = a.astype(np.float64)
+        if len(a) != n:
+            raise ValueError(f"컬럼 길이가 다릅니다: {col}")
+        code = _storage_code(a)
+        header['codes'][0, i] = code
+        raw = np.ascontiguousarray(a, dtype=_STORAGE[code & 0x0F]).tobytes()
+        parts.append(raw + b'\0' * (_padded(len(raw)) - len(raw)))
+    parts[0] = header.tobytes()
+    return b''.join(parts)
+
+
+def record_length(header):
+    n = int(header['n'])
+    return _HEADER.itemsize + sum(_padded(n * _STORAGE[c & 0x0F].itemsize) for c in header['codes'] if c)
+
+
+def decode_header(buf, offset=0):
+    if len(buf) - offset < _HEADER.itemsize:
+        raise ValueError("세션 레코드가 잘렸습니다")
+    header = np.frombuffer(buf, dtype=_HEADER, count=1, offset=offset)[0]
+    if header['magic'] != RECORD_MAGIC:
+        raise ValueError("세션 레코드의 magic이 올바르지 않습니다")
+    return header
+
+
+def decode_record(buf):
+    # -> (header, {컬럼명: ndarray}). 원래 정수 컬럼은 int64, float 컬럼은 float64 (CSV 경로와 같은 dtype)
+    header = decode_header(buf)
+    n = int(header['n'])
+    if len(buf) < record_length(header):
+        raise ValueError("세션 레코드가 잘렸습니다")
+    columns = {}
+    offset = _HEADER.itemsize
+    for col, code in zip(COLUMNS, header['codes']):
+        if not code:
+            continue
+        dt = _STORAGE[code & 0x0F]
+        a = np.frombuffer(buf, dtype=dt, count=n, offset=offset)
+        offset += _padded(n * dt.itemsize)
+        columns[col] = a.astype(np.float64 if code & _AS_FLOAT else np.int64)
+    return header, columns
+
+
+def _first_values(columns):
+    # COLUMNS 밖 컬럼 -> {컬럼명: 첫 행 값} (JSON으로 index에 저장)
+    row0 = {}
+    for col, v in columns.items():
+        if col in COLUMNS or not len(v):
+            continue
+        first = np.asarray(v)[0]
+        row0[col] = first.item() if isinstance(first, np.generic) else first
+    return row0
+
+
+def result_summary(result):
+    # 분석 응답 -> index에 남길 모델 결과 요약
+    ml = (result or {}).get('ml') or {}
+    proba = ml.get('probability') or {}
+    return {
+        'prediction': ml.get('prediction'),
+        'dementia_probability': proba.get('dementia_probability'),
+        'diagnosis': proba.get('diagnosis'),
+        'model_version': ml.get('model_version'),
+    }
+
+
+class SessionStore:
+
+    def __init__(self, root, segment_bytes=64 << 20, retention=None, max_bytes=None, compact_ratio=0.5):
+        self.root = str(root)
+        self.segment_bytes = segment_bytes
+        self.retention = retention
+        self.max_bytes = max_bytes
+        self.compact_ratio = compact_ratio
+        os.makedirs(self.root, exist_ok=True)
+        self.index_path = os.path.join(self.root, 'index.jsonl')
+        self._lock = threading.Lock()
+        self._index = {}
+        self._index_inode = None
+        self._index_pos = 0
+        self.stats = {'appended': 0, 'expired': 0, 'compacted_segments': 0, 'removed_segments': 0}
+
+    @classmethod
+    def from_env(cls, prefix='SESSION_STORE_', root=None):
+        # root를 주면 SESSION_STORE_DIR 대신 사용
+        env = os.environ
+        retention_days = float(env.get(prefix + 'RETENTION_DAYS', '0'))
+        max_mb = float(env.get(prefix + 'MAX_MB', '0'))
+        return cls(
+            root or env.get(prefix + 'DIR') or Path(__file__).resolve().parent / 'sessions',
+            segment_bytes=int(float(env.get(prefix + 'SEGMENT_MB', '64')) * (1 << 20)),
+            retention=retention_days * 86400 if retention_days > 0 else None,
+            max_bytes=int(max_mb * (1 << 20)) if max_mb > 0 else None,
+            compact_ratio=float(env.get(prefix + 'COMPACT_RATIO', '0.5')),
+        )
+
+    @contextmanager
+    def _locked(self):
+        # 스레드 lock + 프로세스 간 flock (fork된 워커들이 같은 segment/index에 append)
+        with self._lock, open(os.path.join(self.root, '.lock'), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    # --- index ---
+
+    def _refresh(self):
+        # 다른 프로세스가 추가한 줄만 이어서 읽는다. compaction으로 index가 교체되면(inode 변경) 처음부터
+        try:
+            st = os.stat(self.index_path)
+        except FileNotFoundError:
+            self._index, self._index_inode, self._index_pos = {}, None, 0
+            return
+        if st.st_ino != self._index_inode or st.st_size < self._index_pos:
+            self._index, self._index_inode, self._index_pos = {}, st.st_ino, 0
+        if st.st_size == self._index_pos:
+            return
+        with open(self.index_path, 'rb') as f:
+            f.seek(self._index_pos)
+            data = f.read(st.st_size - self._index_pos)
+        # 쓰는 중인 마지막 줄(개행 전)은 다음에 읽는다
+        end = data.rfind(b'\n') + 1
+        for line in data[:end].splitlines():
+            if line.strip():
+                entry = json.loads(line)
+                self._index[entry['id']] = entry
+        self._index_pos += end
+
+    def _append_index(self, entry):
+        line = (json.dumps(entry, ensure_ascii=False) + '\n').encode('utf-8')
+        fd = os.open(self.index_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+
+    def _rewrite_index(self, entries):
+        tmp = self.index_path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        os.replace(tmp, self.index_path)
+        self._index = {e['id']: e for e in entries}
+        st = os.stat(self.index_path)
+        self._index_inode, self._index_pos = st.st_ino, st.st_size
+
+    # --- segments ---
+
+    def _segment_path(self, num):
+        return os.path.join(self.root, f'seg-{num:06d}.bin')
+
+    def _segments(self):
+        # [(번호, 경로)] 번호 순. 가장 큰 번호가 지금 쓰는 segment
+        found = []
+        for path in glob.glob(os.path.join(self.root, 'seg-*.bin')):
+            m = _SEGMENT_RE.search(path)
+            if m:
+                found.append((int(m.group(1)), path))
+        return sorted(found)
+
+    def _active_segment(self):
+        # -> (번호, rotate 여부)
+        segments = self._segments()
+        if not segments:
+            return 1, False
+        num, path = segments[-1]
+        if os.path.getsize(path) >= self.segment_bytes:
+            return num + 1, True
+        return num, False
+
+    def append(self, columns, result=None, source=None, name=None, ts=None):
+        # 세션 하나 저장 -> 세션 id (32자 hex). segment가 가득 차서 rotate되면 보존 정책/compaction도 실행
+        session_id = uuid.uuid4()
+        ts = time.time() if ts is None else ts
+        record = encode_record(session_id.bytes, ts, columns)
+        with self._locked():
+            num, rotated = self._active_segment()
+            with open(self._segment_path(num), 'ab') as f:
+                offset = f.tell()
+                f.write(record)
+            entry = {'id': session_id.hex, 'seg': num, 'off': offset, 'len': len(record),
+                     'n': len(columns[TIME_COL]), 'ts': ts, 'source': source, 'name': name,
+                     'result': result_summary(result) if result is not None else None}
+            row0 = _first_values(columns)
+            if row0:
+                entry['row0'] = row0
+            self._append_index(entry)
+            self.stats['appended'] += 1
+        if rotated:
+            self.maintain()
+        return session_id.hex
+
+    def entries(self):
+        with self._lock:
+            self._refresh()
+            return list(self._index.values())
+
+    def entry(self, session_id):
+        with self._lock:
+            entry = self._index.get(session_id)
+            if entry is None:
+                self._refresh()
+                entry = self._index.get(session_id)
+        if entry is None:
+            raise KeyError(session_id)
+        return entry
+
+    def _read(self, entry):
+        fd = os.open(self._segment_path(entry['seg']), os.O_RDONLY)
+        try:
+            buf = os.pread(fd, entry['len'], entry['off'])
+        finally:
+            os.close(fd)
+        header, columns = decode_record(buf)
+        if header['id'].tobytes().hex() != entry['id']:
+            raise ValueError(f"index와 segment의 세션 id가 다릅니다: {entry['id']}")
+        for col, value in (entry.get('row0') or {}).items():
+            columns[col] = np.broadcast_to(np.asarray(value), int(header['n']))
+        return columns
+
+    def read(self, session_id):
+        # -> {컬럼명: ndarray}. compaction으로 위치가 바뀐 경우 index를 다시 읽고 한 번 더 시도
+        entry = self.entry(session_id)
+        try:
+            return self._read(entry)
+        except (FileNotFoundError, ValueError):
+            with self._lock:
+                self._refresh()
+                entry = self._index.get(session_id)
+            if entry is None:
+                raise KeyError(session_id)
+            return self._read(entry)
+
+    def iter_sessions(self):
+        # (index 항목, 컬럼) 순회. segment 순서대로 읽는다
+        for entry in sorted(self.entries(), key=lambda e: (e['seg'], e['off'])):
+            yield entry, self._read(entry)
+
+    # --- 보존 정책 / compaction ---
+
+    def apply_retention(self, now=None):
+        # 보존 기간을 넘었거나 전체 크기 상한을 넘는 오래된 세션을 index에서 뺀다 -> 뺀 세션 수
+        with self._locked():
+            self._refresh()
+            entries = sorted(self._index.values(), key=lambda e: e['ts'])
+            keep = entries
+            if self.retention is not None:
+                cutoff = (time.time() if now is None else now) - self.retention
+                keep = [e for e in keep if e['ts'] >= cutoff]
+            if self.max_bytes is not None:
+                total = sum(e['len'] for e in keep)
+                drop = 0
+                while drop < len(keep) and total > self.max_bytes:
+                    total -= keep[drop]['len']
+                    drop += 1
+                keep = keep[drop:]
+            expired = len(entries) - len(keep)
+            if expired:
+                self._rewrite_index(sorted(keep, key=lambda e: (e['seg'], e['off'])))
+                self.stats['expired'] += expired
+            self._remove_dead_segments()
+        return expired
+
+    def _remove_dead_segments(self):
+        # 살아 있는 세션이 없는 segment 삭제 (지금 쓰는 마지막 segment는 남긴다)
+        live = {e['seg'] for e in self._index.values()}
+        for num, path in self._segments()[:-1]:
+            if num not in live:
+                os.remove(path)
+                self.stats['removed_segments'] += 1
+
+    def compact(self, force=False):
+        # 삭제된 데이터 비율이 compact_ratio 이상인 segment의 살아 있는 레코드를 새 segment로 옮긴다
+        # 새 segment와 index를 먼저 쓰고 나서 이전 segment를 지우므로, 중간에 죽어도 index가 가리키는 데이터는 남아 있다
+        with self._locked():
+            self._refresh()
+            segments = self._segments()
+            if not segments:
+                return 0
+            by_segment = {}
+            for e in self._index.values():
+                by_segment.setdefault(e['seg'], []).append(e)
+            targets = []
+            # 지금 쓰는 segment는 제외 (force면 포함)
+            for num, path in (segments if force else segments[:-1]):
+                size = os.path.getsize(path)
+                live = sum(e['len'] for e in by_segment.get(num, ()))
+                if size and live < size and (force or (size - live) / size >= self.compact_ratio):
+                    targets.append((num, path))
+            if not targets:
+                return 0
+            new_num = segments[-1][0] + 1
+            moved = []
+            with open(self._segment_path(new_num), 'wb') as out:
+                for num, path in targets:
+                    fd = os.open(path, os.O_RDONLY)
+                    try:
+                        for e in sorted(by_segment.get(num, ()), key=lambda e: e['off']):
+                            buf = os.pread(fd, e['len'], e['off'])
+                            moved.append(dict(e, seg=new_num, off=out.tell()))
+                            out.write(buf)
+                    finally:
+                        os.close(fd)
+                out.flush()
+                os.fsync(out.fileno())
+            target_nums = {num for num, _ in targets}
+            entries = [e for e in self._index.values() if e['seg'] not in target_nums] + moved
+            self._rewrite_index(sorted(entries, key=lambda e: (e['seg'], e['off'])))
+            for _, path in targets:
+                os.remove(path)
+            self.stats['compacted_segments'] += len(targets)
+            return len(targets)
+
+    def maintain(self):
+        expired = self.apply_retention()
+        return {'expired': expired, 'compacted_segments': self.compact()}
+
+    def rebuild_index(self):
+        # index.jsonl이 없어졌을 때 segment를 처음부터 읽어 다시 만든다 (모델 결과 요약, row0는 복구되지 않음)
+        with self._locked():
+            entries = []
+            for num, path in self._segments():
+                with open(path, 'rb') as f:
+                    data = f.read()
+                offset = 0
+                while offset < len(data):
+                    try:
+                        header = decode_header(data, offset)
+                    except ValueError:
+                        # 쓰다가 끊긴 마지막 레코드
+                        break
+                    length = record_length(header)
+                    if offset + length > len(data):
+                        break
+                    entries.append({'id': header['id'].tobytes().hex(), 'seg': num, 'off': offset, 'len': length,
+                                    'n': int(header['n']), 'ts': float(header['ts']), 'source': None, 'name': None,
+                                    'result': None})
+                    offset += length
+            self._rewrite_index(entries)
+            return len(entries)
+
+    def status(self):
+        entries = self.entries()
+        segments = self._segments()
+        return {
+            'dir': self.root,
+            'sessions': len(entries),
+            'samples': sum(e['n'] for e in entries),
+            'segments': len(segments),
+            'bytes': sum(os.path.getsize(p) for _, p in segments),
+            'live_bytes': sum(e['len'] for e in entries),
+            **self.stats,
+        }
+
+
+def import_csvs(store, inputs):
+    # 기존 uploads/*.csv를 저장소로 옮긴다 (파일 이름은 name, 수정 시각은 ts로)
+    from batch_analyze import collect_files
+    from csv_ingest import read_csv_columns
+
+    imported, failed = 0, []
+    for path in collect_files(inputs):
+        try:
+            columns = read_csv_columns(path)
+            store.append(columns, source='import', name=os.path.basename(path), ts=os.path.getmtime(path))
+            imported += 1
+        except Exception as e:
+            failed.append((path, f'{type(e).__name__}: {e}'))
+    return imported, failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='세션 저장소 관리 (SESSION_STORE_DIR, 기본 web_server/sessions)')
+    parser.add_argument('--dir', default=None, help='저장소 경로 (기본 SESSION_STORE_DIR)')
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('status', help='세션/segment 수와 크기')
+    p_list = sub.add_parser('list', help='세션 목록 (최근 것부터)')
+    p_list.add_argument('-n', type=int, default=20)
+    p_import = sub.add_parser('import', help='CSV 파일/디렉토리를 저장소로 가져오기')
+    p_import.add_argument('inputs', nargs='+')
+    p_compact = sub.add_parser('compact', help='보존 정책 적용 후 compaction')
+    p_compact.add_argument('--force', action='store_true', help='비율과 관계없이 모든 segment를 다시 씀')
+    sub.add_parser('rebuild-index', help='segment를 읽어 index.jsonl을 다시 만듦')
+    args = parser.parse_args(argv)
+
+    store = SessionStore.from_env(root=args.dir)
+    if args.command == 'status':
+        print(json.dumps(store.status(), indent=2, ensure_ascii=False))
+    elif args.command == 'list':
+        for e in sorted(store.entries(), key=lambda e: e['ts'], reverse=True)[:args.n]:
+            result = e.get('result') or {}
+            print(f"{e['id']}  {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(e['ts']))}  n={e['n']:<7} "
+                  f"{e.get('source') or '-':<15} {e.get('name') or '-':<32} {result.get('diagnosis') or '-'}")
+    elif args.command == 'import':
+        imported, failed = import_csvs(store, args.inputs)
+        for path, error in failed:
+            print(f"실패: {path} -> {error}", file=sys.stderr)
+        print(f"{imported}개 세션을 가져왔습니다 -> {store.root}")
+    elif args.command == 'compact':
+        expired = store.apply_retention()
+        compacted = store.compact(force=args.force)
+        print(f"만료 {expired}개, compaction {compacted}개 segment")
+    elif args.command == 'rebuild-index':
+        print(f"{store.rebuild_index()}개 세션")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,191 @@
+import numpy as np
+import pandas as pd
+
+from feature_engine import TIME_COL, X_COL, Y_COL, PRESSURE_COL, BUTTON_COL
+
+
+# uploads/strokes_*.csv 와 같은 컬럼 순서
+STROKE_COLUMNS = [TIME_COL, X_COL, Y_COL, PRESSURE_COL, BUTTON_COL]
+
+
+def _row_values(r):
+    if isinstance(r, (list, tuple)):
+        t, x, y, pressure, button = r
+    elif isinstance(r, dict):
+        # 기존 CSV 경로와 같은 alias 순서/규칙 (falsy 값은 다음 alias로 넘어감)
+        t = r.get('timestamp_ms') or r.get('t') or r.get('시간')
+        x = r.get('x')
+        y = r.get('y')
+        pressure = r.get('pressure') or r.get('압력') or r.get('압력_NORMAL')
+        button = r.get('button') or r.get('버튼')
+    else:
+        return None
+    return t, x, y, pressure, button
+
+
+def _to_float(v):
+    # CSV에 쓴 뒤 다시 읽었을 때와 같은 값: None/'' -> NaN
+    if v is None or v == '':
+        return np.nan
+    return float(v)
+
+
+def parse_record(r):
+    # 레코드 하나 -> (t, x, y, pressure, button). t는 원래 타입 유지, 나머지는 float(결측 NaN)
+    # 형식이 잘못된 레코드는 None
+    try:
+        vals = _row_values(r)
+        if vals is None:
+            return None
+        t, x, y, pressure, button = vals
+        _to_float(t)
+        return (t if t != '' else None,
+                _to_float(x), _to_float(y), _to_float(pressure), _to_float(button))
+    except Exception:
+        return None
+
+
+def parse_sample(r):
+    # parse_record()와 같지만 t도 숫자(int 또는 float, 결측 NaN)로 돌려준다 (스트리밍용)
+    row = parse_record(r)
+    if row is None:
+        return None
+    t = row[0]
+    if not isinstance(t, (int, float)) or isinstance(t, bool):
+        t = _to_float(t)
+    return (t,) + row[1:]
+
+
+def _time_array(ts):
+    arr = np.array(ts)
+    if arr.dtype.kind in 'iu':
+        return arr.astype(np.int64, copy=False)
+    return np.array([_to_float(v) for v in ts], dtype=np.float64)
+
+
+def records_to_columns(records):
+    # [{timestamp_ms, x, y, pressure, button}, ...] 또는 [[t, x, y, p, b], ...]
+    # -> {'시간': int64/float64, 'X': float64, ...} 컬럼 배열. 잘못된 행은 건너뛴다
+    ts, xs, ys, ps, bs = [], [], [], [], []
+    for r in records:
+        row = parse_record(r)
+        if row is None:
+            # skip malformed rows
+            continue
+        ts.append(row[0])
+        xs.append(row[1])
+        ys.append(row[2])
+        ps.append(row[3])
+        bs.append(row[4])
+
+    return {
+        TIME_COL: _time_array(ts),
+        X_COL: np.array(xs, dtype=np.float64),
+        Y_COL: np.array(ys, dtype=np.float64),
+        PRESSURE_COL: np.array(ps, dtype=np.float64),
+        BUTTON_COL: np.array(bs, dtype=np.float64),
+    }
+
+
+def write_strokes_csv(path, columns):
+    # 원본 세션 보관용 (uploads/strokes_*.csv와 같은 형식)
+    n = len(columns[TIME_COL])
+    pd.DataFrame({c: columns[c] if c in columns else np.full(n, np.nan) for c in STROKE_COLUMNS}).to_csv(
+        path, index=False, encoding='utf-8')
+
+
+# --- 컬럼형 JSON: {"t": [...], "x": [...], "y": [...], "pressure": [...], "button": [...]} ---
+# 행 형식과 달리 값은 그대로 사용한다 (button 0은 0, pressure 0.0은 0.0)
+
+COLUMN_ALIASES = {
+    TIME_COL: ('t', 'timestamp_ms', '시간'),
+    X_COL: ('x', 'X'),
+    Y_COL: ('y', 'Y'),
+    PRESSURE_COL: ('pressure', '압력', '압력_NORMAL'),
+    BUTTON_COL: ('button', '버튼'),
+}
+
+
+def is_columnar(obj):
+    return isinstance(obj, dict) and any(a in obj for a in COLUMN_ALIASES[TIME_COL])
+
+
+def _pick(obj, aliases):
+    for a in aliases:
+        if a in obj and obj[a] is not None:
+            return obj[a]
+    return None
+
+
+def json_columns_to_columns(obj):
+    # 컬럼형 JSON -> analyze_columns()용 배열. pressure/button은 없으면 생략
+    t = _pick(obj, COLUMN_ALIASES[TIME_COL])
+    x = _pick(obj, COLUMN_ALIASES[X_COL])
+    y = _pick(obj, COLUMN_ALIASES[Y_COL])
+    if t is None or x is None or y is None:
+        raise ValueError("컬럼형 입력에는 t, x, y가 모두 필요합니다")
+    columns = {TIME_COL: _time_array(t), X_COL: np.asarray(x, dtype=np.float64), Y_COL: np.asarray(y, dtype=np.float64)}
+    for col in (PRESSURE_COL, BUTTON_COL):
+        v = _pick(obj, COLUMN_ALIASES[col])
+        if v is not None:
+            columns[col] = np.asarray(v, dtype=np.float64)
+    n = len(columns[TIME_COL])
+    bad = [c for c, a in columns.items() if len(a) != n]
+    if bad:
+        raise ValueError(f"컬럼 길이가 다릅니다: {', '.join(bad)}")
+    return columns
+
+
+# --- 바이너리: little-endian 컬럼형 ---
+# header 16 bytes: magic b'STK1' | uint32 n | uint8 coord dtype (0=float32, 1=int32) | 7 bytes padding
+# body: int64 t[n] | coord x[n] | coord y[n] | float32 pressure[n] | uint8 button[n]
+
+BINARY_CONTENT_TYPE = 'application/x-strokes'
+BINARY_MAGIC = b'STK1'
+_HEADER = np.dtype([('magic', 'S4'), ('n', '<u4'), ('coord', 'u1'), ('pad', 'V7')])
+_COORD_DTYPES = {0: np.dtype('<f4'), 1: np.dtype('<i4')}
+
+
+def decode_binary(buf):
+    # numpy.frombuffer로 복사 없이 각 컬럼의 view를 만든다
+    if len(buf) < _HEADER.itemsize:
+        raise ValueError("바이너리 입력이 너무 짧습니다")
+    header = np.frombuffer(buf, dtype=_HEADER, count=1)[0]
+    if header['magic'] != BINARY_MAGIC:
+        raise ValueError("바이너리 입력의 magic이 올바르지 않습니다")
+    n = int(header['n'])
+    coord = _COORD_DTYPES.get(int(header['coord']))
+    if coord is None:
+        raise ValueError(f"알 수 없는 좌표 dtype 코드: {int(header['coord'])}")
+    layout = [(TIME_COL, np.dtype('<i8')), (X_COL, coord), (Y_COL, coord),
+              (PRESSURE_COL, np.dtype('<f4')), (BUTTON_COL, np.dtype('u1'))]
+    expected = _HEADER.itemsize + n * sum(dt.itemsize for _, dt in layout)
+    if len(buf) != expected:
+        raise ValueError(f"바이너리 입력 길이가 맞지 않습니다 (기대 {expected}, 실제 {len(buf)})")
+    columns = {}
+    offset = _HEADER.itemsize
+    for col, dt in layout:
+        columns[col] = np.frombuffer(buf, dtype=dt, count=n, offset=offset)
+        offset += n * dt.itemsize
+    return columns
+
+
+def encode_binary(columns, int_coords=False):
+    # 클라이언트/벤치마크용 인코더 (decode_binary의 역)
+    t = np.asarray(columns[TIME_COL], dtype='<i8')
+    n = len(t)
+    coord = np.dtype('<i4') if int_coords else np.dtype('<f4')
+    header = np.zeros(1, dtype=_HEADER)
+    header['magic'] = BINARY_MAGIC
+    header['n'] = n
+    header['coord'] = 1 if int_coords else 0
+    pressure = columns.get(PRESSURE_COL)
+    button = columns.get(BUTTON_COL)
+    parts = [
+        header.tobytes(), t.tobytes(),
+        np.asarray(columns[X_COL], dtype=coord).tobytes(),
+        np.asarray(columns[Y_COL], dtype=coord).tobytes(),
+        (np.full(n, np.nan, dtype='<f4') if pressure is None else np.asarray(pressure, dtype='<f4')).tobytes(),
+        (np.zeros(n, dtype='u1') if button is None else np.nan_to_num(np.asarray(button, dtype=np.float64)).astype('u1')).tobytes(),
+    ]
+    return b''.join(parts)
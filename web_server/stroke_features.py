@@ -0,0 +1,92 @@
+import numpy as np
+
+from feature_engine import BUTTON_COL, PRESSURE_COL, TIME_COL, X_COL, Y_COL, _fill_with_mean, compute_derivatives
+
+
+# 세션을 획(stroke) 단위로 나눈 인덱스와 획별 통계.
+# 획 = 버튼이 1(펜 다운)인 연속 구간. 경계는 버튼 전이(0->1, 1->0)에서 한 번만 찾고,
+# 획별 값은 펜 다운 샘플만 모은 배열에 np.add.reduceat 등 구간 reduce로 한 번에 계산한다
+# (획 수만큼 Python 루프나 groupby-apply를 돌지 않음).
+# 속도/jerk는 세션 feature와 같은 값(inf/NaN을 세션 평균으로 채운 배열)을 쓰므로
+# 획별 합을 모두 더해 전체 펜 다운 샘플 수로 나누면 mean_speed_on_paper / mean_jerk_on_paper와 같다.
+STROKE_FIELDS = ('start', 'end', 'n_samples', 'duration', 'length', 'mean_speed', 'mean_jerk',
+                 'pressure_mean', 'pressure_max', 'pressure_std', 'gap_before')
+
+
+def _segments(button):
+    down = np.asarray(button) == 1
+    edges = np.diff(down.view(np.int8), prepend=np.int8(0), append=np.int8(0))
+    return down, np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def segment_strokes(button):
+    # -> (starts, ends): 획마다 시작 샘플 인덱스와 끝(미포함) 인덱스
+    # 버튼이 1로 시작하는 세션의 첫 획은 num_of_pendown(0->1 전이 수)에는 세지 않는다
+    _, starts, ends = _segments(button)
+    return starts, ends
+
+
+def stroke_table(time_diff, button, distance, speed, jerk, pressure=None):
+    # 세그먼트 인덱스 + 획별 통계 (각 필드는 획 수 길이의 배열)
+    #   duration     첫 샘플 ~ 마지막 샘플 시간 (TIME_DIFF 단위)
+    #   length       획 안의 이동 거리 (첫 샘플로 들어오는 공중 이동은 제외)
+    #   mean_speed / mean_jerk   획 샘플들의 SPEED / JERK 평균
+    #   pressure_*   압력 평균/최대/표준편차(ddof=0, 한 샘플짜리 획도 0)
+    #   gap_before   직전 획의 마지막 샘플부터 이 획 시작까지의 공중 시간 (첫 획은 세션 시작부터)
+    down, starts, ends = _segments(button)
+    count = len(starts)
+    table = {'count': count}
+    if count == 0:
+        table.update((f, np.empty(0)) for f in STROKE_FIELDS)
+        return table
+    n = ends - starts
+    # 펜 다운 샘플만 모으면 획들이 연속 구간이 되므로 reduceat 오프셋은 n의 누적합
+    offsets = np.zeros(count, dtype=np.intp)
+    np.cumsum(n[:-1], out=offsets[1:])
+
+    inner = distance.copy()
+    inner[starts] = 0.0
+    inner = inner[down]
+    inner[np.isnan(inner)] = 0.0
+
+    table.update(
+        start=starts,
+        end=ends,
+        n_samples=n,
+        duration=time_diff[ends - 1] - time_diff[starts],
+        length=np.add.reduceat(inner, offsets),
+        mean_speed=np.add.reduceat(speed[down], offsets) / n,
+        mean_jerk=np.add.reduceat(jerk[down], offsets) / n,
+    )
+    if pressure is not None:
+        # 압력 결측(NaN)은 건너뛴다 (세션 pressure_mean과 동일). 전부 결측인 획은 NaN
+        p = np.asarray(pressure, dtype=np.float64)[down]
+        valid = ~np.isnan(p)
+        p_count = np.add.reduceat(valid.astype(np.intp), offsets)
+        p0 = np.where(valid, p, 0.0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.add.reduceat(p0, offsets) / p_count
+            dev = np.where(valid, p - np.repeat(mean, n), 0.0)
+            std = np.sqrt(np.add.reduceat(dev * dev, offsets) / p_count)
+        table.update(pressure_mean=mean, pressure_max=np.fmax.reduceat(p, offsets), pressure_std=std)
+    else:
+        table.update(pressure_mean=None, pressure_max=None, pressure_std=None)
+    gap = np.empty(count)
+    gap[0] = time_diff[starts[0]] - time_diff[0]
+    np.subtract(time_diff[starts[1:]], time_diff[ends[:-1] - 1], out=gap[1:])
+    table['gap_before'] = gap
+    return table
+
+
+def strokes_from_columns(columns, derived=None):
+    # {'시간', 'X', 'Y', '버튼', ('압력_NORMAL')} -> stroke_table. 버튼 컬럼이 없으면 None
+    # derived: extract_features(derived=...)가 채운 미분 배열 (없으면 여기서 다시 계산)
+    if columns.get(BUTTON_COL) is None:
+        return None
+    if derived is None:
+        time_diff, _, distance, speed, _, jerk = compute_derivatives(columns[TIME_COL], columns[X_COL], columns[Y_COL])
+        speed, _ = _fill_with_mean(speed)
+        jerk, _ = _fill_with_mean(jerk)
+        derived = {'time_diff': time_diff, 'distance': distance, 'speed': speed, 'jerk': jerk}
+    return stroke_table(derived['time_diff'], columns[BUTTON_COL], derived['distance'], derived['speed'],
+                        derived['jerk'], columns.get(PRESSURE_COL))
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+
+from feature_engine import TIME_COL, BUTTON_COL, X_COL, Y_COL, PRESSURE_COL
+
+
+# 벤치마크용 합성 필기 데이터. 태블릿 CSV(dummy_*.csv)와 같은 형식/범위:
+#   시간(ms, 7~11ms 간격), 버튼(1=펜 닿음, 0=공중), X/Y(정수 좌표), Z(펜 높이), 압력_NORMAL(0~1023)
+# 획(pen-down)과 공중 이동(pen-up)이 번갈아 나오고, 획 안에서는 부드러운 곡선 + 손떨림,
+# 압력은 획 시작/끝에서 올라갔다 내려가는 곡선이다.
+CSV_COLUMNS = [TIME_COL, BUTTON_COL, X_COL, Y_COL, 'Z', PRESSURE_COL]
+
+
+def _segment_lengths(n, rng, down=(40, 300), up=(15, 120)):
+    # [(pen_down, 길이), ...] 합이 정확히 n
+    segs = []
+    total = 0
+    pen_down = False
+    while total < n:
+        lo, hi = down if pen_down else up
+        k = min(int(rng.integers(lo, hi)), n - total)
+        segs.append((pen_down, k))
+        total += k
+        pen_down = not pen_down
+    return segs
+
+
+def generate(n, seed=0, start_time=255006832, origin=(6900, 8600)):
+    # n개 샘플의 컬럼 dict ({'시간': int64, '버튼': int64, 'X': int64, 'Y': int64, 'Z': int64, '압력_NORMAL': int64})
+    rng = np.random.default_rng(seed)
+    t = start_time + np.concatenate([[0], np.cumsum(rng.integers(7, 12, n - 1))]) if n else np.empty(0, np.int64)
+
+    segs = _segment_lengths(n, rng)
+    button = np.empty(n, dtype=np.int64)
+    pressure = np.empty(n, dtype=np.float64)
+    z = np.empty(n, dtype=np.float64)
+    vx = np.empty(n, dtype=np.float64)
+    vy = np.empty(n, dtype=np.float64)
+
+    pos = 0
+    for pen_down, k in segs:
+        s = slice(pos, pos + k)
+        u = np.linspace(0.0, 1.0, k)
+        if pen_down:
+            # 글자 획: 몇 개 사인파를 섞은 속도 곡선 (샘플당 좌표 이동량)
+            freq = rng.uniform(0.5, 3.0, 2)
+            phase = rng.uniform(0, 2 * np.pi, 2)
+            amp = rng.uniform(2.0, 8.0, 2)
+            vx[s] = amp[0] * np.sin(2 * np.pi * freq[0] * u + phase[0]) + rng.uniform(0.5, 2.0)
+            vy[s] = amp[1] * np.cos(2 * np.pi * freq[1] * u + phase[1])
+            # 압력: 시작/끝에서 0에 가깝고 가운데가 높은 곡선 + 잡음
+            peak = rng.uniform(500, 950)
+            pressure[s] = peak * np.sin(np.pi * u) ** 0.6 + rng.normal(0, 15, k)
+            z[s] = rng.normal(560, 10, k)
+            button[s] = 1
+        else:
+            # 공중 이동: 다음 획 위치로 거의 직선 이동, 압력 0, 펜이 떠 있음
+            step = rng.uniform(-6, 12, 2)
+            vx[s] = step[0]
+            vy[s] = step[1]
+            pressure[s] = 0.0
+            z[s] = 600 + 40 * np.sin(np.pi * u) + rng.normal(0, 5, k)
+            button[s] = 0
+        pos += k
+
+    # 손떨림(jitter)을 더한 뒤 누적해서 좌표로
+    x = origin[0] + np.cumsum(vx + rng.normal(0, 0.8, n))
+    y = origin[1] + np.cumsum(vy + rng.normal(0, 0.8, n))
+    return {
+        TIME_COL: np.asarray(t, dtype=np.int64),
+        BUTTON_COL: button,
+        X_COL: np.rint(x).astype(np.int64),
+        Y_COL: np.rint(y).astype(np.int64),
+        'Z': np.rint(z).astype(np.int64),
+        PRESSURE_COL: np.clip(np.rint(pressure), 0, 1023).astype(np.int64),
+    }
+
+
+def write_csv(path, columns, encoding='cp949'):
+    # 태블릿 내보내기와 같은 cp949 CSV
+    pd.DataFrame({c: columns[c] for c in CSV_COLUMNS if c in columns}).to_csv(path, index=False, encoding=encoding)